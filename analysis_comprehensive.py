@@ -15,14 +15,44 @@ from datetime import datetime
 from typing import List, Dict, Tuple
 import math
 
+from candle_decoder import decode_candle_rows
+from level_index import LevelIndex
+from swing_tracker import SwingTracker
+from profiler import stage, enable_from_argv
+
+
+def _candle_rsi(candle: Dict):
+    """캔들의 rsi14 값 (없으면 None - SwingTracker가 종가로 계산)"""
+    value = candle.get('rsi14', candle.get('rsi_14'))
+    return None if value is None else float(value)
+
+
 class ComprehensiveAnalyzer:
     def __init__(self, candle_data: List[Dict]):
         self.candles = candle_data
-        self.closes = [float(c['close']) for c in candle_data]
-        self.highs = [float(c['high']) for c in candle_data]
-        self.lows = [float(c['low']) for c in candle_data]
-        self.volumes = [float(c['volume']) for c in candle_data]
-        self.timestamps = [int(c['timestamp']) for c in candle_data]
+        with stage('parse'):
+            columns = decode_candle_rows(candle_data, chronological=False)
+            self.closes = columns.close.tolist()
+            self.highs = columns.high.tolist()
+            self.lows = columns.low.tolist()
+            self.volumes = columns.volume.tolist()
+            self.timestamps = columns.timestamp.tolist()
+
+        # Swing pivots are tracked as bars arrive (add_candle), not rescanned per call
+        self.swings = SwingTracker(window=20)
+        for candle, close in zip(candle_data, self.closes):
+            self.swings.update(close, _candle_rsi(candle))
+
+    def add_candle(self, candle: Dict):
+        """Append a newly closed candle (same fields as candle_data)"""
+        columns = decode_candle_rows([candle], chronological=False)
+        self.candles.append(candle)
+        self.closes.append(float(columns.close[0]))
+        self.highs.append(float(columns.high[0]))
+        self.lows.append(float(columns.low[0]))
+        self.volumes.append(float(columns.volume[0]))
+        self.timestamps.append(int(columns.timestamp[0]))
+        self.swings.update(self.closes[-1], _candle_rsi(candle))
 
     def analyze_volatility(self) -> Dict:
         """변동성 분석"""
@@ -38,30 +68,21 @@ class ComprehensiveAnalyzer:
         }
 
     def detect_support_resistance(self, lookback: int = 20) -> Dict:
-        """지지/저항 레벨 탐지"""
-        # 최근 lookback 기간의 고점/저점 클러스터 찾기
-        recent_highs = self.highs[-lookback:]
-        recent_lows = self.lows[-lookback:]
-
-        # 가격대별 빈도수 계산 (0.1% 단위로 그룹화)
-        price_clusters = {}
-        for high in recent_highs:
-            bucket = round(high, -1)  # 10 단위로 반올림
-            price_clusters[bucket] = price_clusters.get(bucket, 0) + 1
-
-        for low in recent_lows:
-            bucket = round(low, -1)
-            price_clusters[bucket] = price_clusters.get(bucket, 0) + 1
+        """지지/저항 레벨 탐지 (가격 스케일에 맞춘 구간 - LevelIndex)"""
+        # 최근 lookback 기간의 고점/저점 터치 수 (구간 폭 = ATR 비례, 틱 단위)
+        levels = LevelIndex.from_history(self.highs, self.lows, self.closes, window=lookback)
+        price = self.closes[-1]
 
-        # 가장 많이 터치된 레벨 (저항/지지)
-        sorted_levels = sorted(price_clusters.items(), key=lambda x: x[1], reverse=True)
+        support = levels.nearest_support(price)
+        resistance = levels.nearest_resistance(price)
 
         return {
-            'resistance_levels': [level for level, _ in sorted_levels[:3]],
-            'support_levels': [level for level, _ in sorted_levels[-3:]],
-            'current_price': self.closes[-1],
-            'distance_to_resistance': min([abs(self.closes[-1] - level) for level, _ in sorted_levels[:3]]) if sorted_levels else 0,
-            'distance_to_support': min([abs(self.closes[-1] - level) for level, _ in sorted_levels[-3:]]) if sorted_levels else 0
+            'resistance_levels': [level for level, _ in levels.levels(above=price)[:3]],
+            'support_levels': [level for level, _ in levels.levels(below=price)[:3]],
+            'current_price': price,
+            'distance_to_resistance': resistance - price if resistance is not None else 0,
+            'distance_to_support': price - support if support is not None else 0,
+            'bin_width': levels.bin_width
         }
 
     def analyze_volume_profile(self) -> Dict:
@@ -85,51 +106,8 @@ class ComprehensiveAnalyzer:
         }
 
     def detect_rsi_divergence(self) -> Dict:
-        """RSI 다이버전스 탐지"""
-        if len(self.candles) < 20:
-            return {'bullish_divergence': False, 'bearish_divergence': False}
-
-        # 최근 20개 캔들에서 가격과 RSI의 방향성 비교
-        recent_candles = self.candles[-20:]
-
-        price_highs = []
-        price_lows = []
-        rsi_highs = []
-        rsi_lows = []
-
-        for i in range(1, len(recent_candles) - 1):
-            price = float(recent_candles[i]['close'])
-            rsi = float(recent_candles[i].get('rsi14', recent_candles[i].get('rsi_14', 50)))
-
-            # 고점/저점 탐지
-            if (float(recent_candles[i-1]['close']) < price and
-                price > float(recent_candles[i+1]['close'])):
-                price_highs.append((i, price))
-                rsi_highs.append((i, rsi))
-
-            if (float(recent_candles[i-1]['close']) > price and
-                price < float(recent_candles[i+1]['close'])):
-                price_lows.append((i, price))
-                rsi_lows.append((i, rsi))
-
-        # 강세 다이버전스: 가격은 낮아지는데 RSI는 높아짐
-        bullish_div = False
-        if len(price_lows) >= 2 and len(rsi_lows) >= 2:
-            if price_lows[-1][1] < price_lows[-2][1] and rsi_lows[-1][1] > rsi_lows[-2][1]:
-                bullish_div = True
-
-        # 약세 다이버전스: 가격은 높아지는데 RSI는 낮아짐
-        bearish_div = False
-        if len(price_highs) >= 2 and len(rsi_highs) >= 2:
-            if price_highs[-1][1] > price_highs[-2][1] and rsi_highs[-1][1] < rsi_highs[-2][1]:
-                bearish_div = True
-
-        return {
-            'bullish_divergence': bullish_div,
-            'bearish_divergence': bearish_div,
-            'price_lows_count': len(price_lows),
-            'price_highs_count': len(price_highs)
-        }
+        """RSI 다이버전스 탐지 (최근 20개 캔들의 스윙 포인트 - SwingTracker 상태)"""
+        return self.swings.state()
 
     def calculate_bollinger_bands(self, period: int = 20, std_dev: int = 2) -> Dict:
         """볼린저 밴드 계산"""
@@ -274,20 +252,31 @@ class ComprehensiveAnalyzer:
 
     def comprehensive_analysis(self) -> Dict:
         """종합 분석 실행"""
-        return {
-            'volatility': self.analyze_volatility(),
-            'support_resistance': self.detect_support_resistance(),
-            'volume_profile': self.analyze_volume_profile(),
-            'rsi_divergence': self.detect_rsi_divergence(),
-            'bollinger_bands': self.calculate_bollinger_bands(),
-            'trend': self.analyze_trend(),
-            'summary': {
-                'total_candles': len(self.candles),
-                'timeframe': f"{self.timestamps[0]} to {self.timestamps[-1]}",
-                'price_range': f"{min(self.lows)} - {max(self.highs)}",
-                'current_price': self.closes[-1]
+        with stage('indicators'):
+            volatility = self.analyze_volatility()
+            bollinger_bands = self.calculate_bollinger_bands()
+            trend = self.analyze_trend()
+
+        with stage('evaluate'):
+            support_resistance = self.detect_support_resistance()
+            volume_profile = self.analyze_volume_profile()
+            rsi_divergence = self.detect_rsi_divergence()
+
+        with stage('report'):
+            return {
+                'volatility': volatility,
+                'support_resistance': support_resistance,
+                'volume_profile': volume_profile,
+                'rsi_divergence': rsi_divergence,
+                'bollinger_bands': bollinger_bands,
+                'trend': trend,
+                'summary': {
+                    'total_candles': len(self.candles),
+                    'timeframe': f"{self.timestamps[0]} to {self.timestamps[-1]}",
+                    'price_range': f"{min(self.lows)} - {max(self.highs)}",
+                    'current_price': self.closes[-1]
+                }
             }
-        }
 
 
 def analyze_symbol(symbol: str, interval: str, data: List[Dict]) -> Dict:
@@ -315,12 +304,13 @@ def analyze_symbol(symbol: str, interval: str, data: List[Dict]) -> Dict:
     }
 
     backtest_results = {}
-    for strategy_name, conditions in strategies.items():
-        backtest_results[strategy_name] = analyzer.backtest_strategy(
-            conditions,
-            tp_percent=0.5,  # 0.5% TP
-            sl_percent=0.3   # 0.3% SL
-        )
+    with stage('evaluate'):
+        for strategy_name, conditions in strategies.items():
+            backtest_results[strategy_name] = analyzer.backtest_strategy(
+                conditions,
+                tp_percent=0.5,  # 0.5% TP
+                sl_percent=0.3   # 0.3% SL
+            )
 
     analysis['backtests'] = backtest_results
 
@@ -350,4 +340,5 @@ def main():
 
 
 if __name__ == "__main__":
+    enable_from_argv()
     main()
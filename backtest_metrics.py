@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Vectorized backtest performance metrics
+
+analyze_trades (coinone_xrp_backtest.py) only looks at the SELL rows of a
+trade log: win rate, profit statistics and the last recorded capital. This
+builds the bar-level equity curve instead and derives the risk metrics
+from it:
+
+    position, cash   cumulative sums of the trades' quantity / cash flows,
+                     scattered onto the bar they happened on (np.bincount)
+    equity           cash + position x close, marked to market every bar
+    max drawdown     1 - equity / running peak (np.maximum.accumulate)
+    Sharpe, Sortino  annualized from bar returns (24/7 market, bar length
+                     taken from the timestamps)
+    time in market   share of bars with an open position
+    turnover         traded notional / average equity
+    fee drag         fees paid, % of the initial capital
+
+Every step is a handful of whole-array NumPy operations, no per-bar Python.
+The equity_* functions also take 2-D (runs x bars) arrays and return one
+value per run, so a sweep can score all of its candidates in one call.
+
+Usage:
+    metrics = trade_metrics(trades, df['timestamp'].to_numpy(), df['Close'].to_numpy(),
+                            initial_capital=100000, fee_rate=0.0002)
+    equity = equity_curve(position, cash, closes)
+    mdd = max_drawdown_pct(equity)
+"""
+
+import numpy as np
+
+from trade_log import BUY, SELL
+
+MS_PER_YEAR = 365 * 24 * 3600 * 1000
+
+
+# ==============================================================================
+# Equity curve
+# ==============================================================================
+
+def to_ms(timestamps):
+    """int64 epoch ms from datetime64 (any unit) or integer ms timestamps"""
+    timestamps = np.asarray(timestamps)
+    if timestamps.dtype.kind == 'M':
+        return timestamps.astype('datetime64[ms]').view(np.int64)
+    return timestamps.astype(np.int64, copy=False)
+
+
+def holdings_from_trades(records, timestamps, initial_capital, fee_rate=0.0):
+    """
+    Per-bar position (units held after the bar's close) and cash from
+    TradeLog records, plus per-bar traded notional and fees
+
+    A BUY of q at price p costs q x p / (1 - fee_rate) (the fee comes out
+    of the spent capital); a SELL returns q x p x (1 - fee_rate), which is
+    how the backtest strategies account for fees.
+    """
+    bars = to_ms(timestamps)
+    n = len(bars)
+    index = np.clip(np.searchsorted(bars, to_ms(records['timestamp'])), 0, max(n - 1, 0))
+    is_buy = records['type'] == BUY
+    quantity = records['quantity']
+    notional = records['price'] * quantity
+
+    gross = np.where(is_buy, notional / (1 - fee_rate), notional)
+    net = np.where(is_buy, notional, notional * (1 - fee_rate))
+    flows = {
+        'position': np.where(is_buy, quantity, -quantity),
+        'cash': np.where(is_buy, -gross, net),
+        'notional': notional,
+        'fees': gross - net,
+    }
+    out = {name: np.bincount(index, weights=values, minlength=n) for name, values in flows.items()}
+    out['position'] = np.cumsum(out['position'])
+    out['cash'] = initial_capital + np.cumsum(out['cash'])
+    # A sold position should read 0, not a rounding residue
+    if len(quantity):
+        out['position'][np.abs(out['position']) <= 1e-12 * np.abs(quantity).max()] = 0.0
+    return out
+
+
+def equity_curve(position, cash, closes):
+    """Marked-to-market equity per bar (broadcasts over leading run axes)"""
+    return cash + position * closes
+
+
+def periods_per_year(timestamps):
+    """Bars per year from the median bar spacing"""
+    bars = to_ms(timestamps)
+    if len(bars) < 2:
+        return 1.0
+    return MS_PER_YEAR / float(np.median(np.diff(bars)))
+
+
+# ==============================================================================
+# Equity metrics (1-D or runs x bars)
+# ==============================================================================
+
+def bar_returns(equity):
+    equity = np.asarray(equity, dtype=np.float64)
+    return np.diff(equity, axis=-1) / equity[..., :-1]
+
+
+def max_drawdown_pct(equity):
+    """Largest fall from a running peak, in %"""
+    equity = np.asarray(equity, dtype=np.float64)
+    if equity.shape[-1] == 0:
+        return np.zeros(equity.shape[:-1]) if equity.ndim > 1 else 0.0
+    peak = np.maximum.accumulate(equity, axis=-1)
+    return (1 - equity / peak).max(axis=-1) * 100
+
+
+def sharpe_ratio(returns, bars_per_year):
+    """Annualized mean / std of bar returns (0 when they don't vary)"""
+    returns = np.asarray(returns, dtype=np.float64)
+    if returns.shape[-1] < 2:
+        return np.zeros(returns.shape[:-1]) if returns.ndim > 1 else 0.0
+    std = returns.std(axis=-1, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(std > 0, returns.mean(axis=-1) / std, 0.0) * np.sqrt(bars_per_year)
+    return ratio if ratio.ndim else float(ratio)
+
+
+def sortino_ratio(returns, bars_per_year):
+    """Annualized mean return over the downside deviation (0 without losing bars)"""
+    returns = np.asarray(returns, dtype=np.float64)
+    if returns.shape[-1] < 2:
+        return np.zeros(returns.shape[:-1]) if returns.ndim > 1 else 0.0
+    downside = np.sqrt((np.minimum(returns, 0.0) ** 2).mean(axis=-1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(downside > 0, returns.mean(axis=-1) / downside, 0.0) * np.sqrt(bars_per_year)
+    return ratio if ratio.ndim else float(ratio)
+
+
+def equity_metrics(equity, bars_per_year, initial_capital=None):
+    """
+    Return, drawdown and risk-adjusted ratios of equity curves
+
+    `equity` is 1-D (one run) or runs x bars; values are floats or per-run
+    arrays accordingly. initial_capital defaults to the first bar's equity.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    start = equity[..., 0] if initial_capital is None else initial_capital
+    returns = bar_returns(equity)
+    return {
+        'final_capital': equity[..., -1],
+        'return_pct': (equity[..., -1] - start) / start * 100,
+        'max_drawdown_pct': max_drawdown_pct(equity),
+        'sharpe': sharpe_ratio(returns, bars_per_year),
+        'sortino': sortino_ratio(returns, bars_per_year),
+    }
+
+
+# ==============================================================================
+# Trade logs
+# ==============================================================================
+
+def trade_metrics(trades, timestamps, closes, initial_capital, fee_rate=0.0):
+    """
+    Equity-curve metrics of one TradeLog over the bars it ran on
+
+    final_capital is the marked-to-market equity of the last bar, so an
+    open position at the end is valued at the last close.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    if len(closes) == 0:
+        raise ValueError('trade_metrics needs at least one bar')
+    holdings = holdings_from_trades(trades.records, timestamps, initial_capital, fee_rate)
+    equity = equity_curve(holdings['position'], holdings['cash'], closes)
+
+    metrics = {k: float(v) for k, v in equity_metrics(equity, periods_per_year(timestamps), initial_capital).items()}
+    fees = float(holdings['fees'].sum())
+    metrics.update({
+        'time_in_market_pct': float(np.count_nonzero(holdings['position'] > 0)) / len(closes) * 100,
+        'turnover': float(holdings['notional'].sum() / equity.mean()),
+        'fees': fees,
+        'fee_drag_pct': fees / initial_capital * 100,
+    })
+    return metrics
+
+
+def sell_metrics(records):
+    """Win / loss statistics of the SELL rows of TradeLog records"""
+    profits = np.nan_to_num(records['profit'][records['type'] == SELL])
+    count = len(profits)
+    return {
+        'winning_trades': int(np.count_nonzero(profits > 0)),
+        'losing_trades': int(np.count_nonzero(profits < 0)),
+        'win_rate': float(np.count_nonzero(profits > 0)) / count * 100 if count else 0.0,
+        'avg_profit': float(profits.mean()) if count else 0.0,
+        'max_profit': float(profits.max()) if count else 0.0,
+        'max_loss': float(profits.min()) if count else 0.0,
+    }
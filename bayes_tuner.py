@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+Bayesian (TPE) tuner for continuous strategy parameters
+
+The sideways entry weights and cutoffs (coinone_strategy_backtest
+check_sideways_entry) and strategy_combined's RSI 35 / 65 band margins and
+2% stop are continuous. A grid over a dozen of them is hopeless, and
+strategy_tuner.py can only rank a fixed candidate list. This proposes
+candidates with a Tree-structured Parzen Estimator instead:
+
+    1. the first evaluations are uniform random
+    2. observations are split into the best gamma share ("good") and the rest
+    3. a Parzen density (truncated Gaussian kernels) is fitted to each set
+    4. many points are drawn from the good density; the batch is the ones
+       with the highest good / bad density ratio
+
+Batches of --batch candidates are proposed at once and evaluated in parallel
+(--workers processes, each holding its own copy of the indicator arrays).
+Points already picked for the batch are added to the bad set ("constant
+liar"), so a batch doesn't collapse onto one spot.
+
+With --objective pareto both return and max drawdown are objectives:
+observations are ranked by non-dominated sorting and the result is the
+return / drawdown Pareto front rather than a single best point.
+
+Usage:
+    python3 bayes_tuner.py --target entry --evals 300 --batch 8 --workers 4
+    python3 bayes_tuner.py --target combined --objective return_pct --compare-random 300
+    python3 bayes_tuner.py --check-combined 20000     # target combined == strategy_combined?
+"""
+
+import argparse
+import math
+
+import numpy as np
+
+from strategy_tuner import DEFAULT_PARAMS, FEE_RATE, Market, evaluate, load_market
+
+# (low, high) of every tuned parameter
+ENTRY_SPACE = {
+    'tier1_rsi': (20, 35),
+    'tier2_rsi': (25, 40),
+    'tier3_rsi': (30, 48),
+    'uptrend_strength': (0.25, 1.0),
+    'sideways_rsi': (22, 40),
+    'w_near_lower_band': (0.0, 0.6),
+    'w_deeply_oversold': (0.0, 0.6),
+    'w_not_extreme': (0.0, 0.4),
+    'w_volume_spike': (0.0, 0.6),
+    'near_lower_band_cutoff': (0.1, 0.6),
+    'volume_spike_ratio': (0.8, 2.0),
+    'sideways_threshold': (0.4, 1.0),
+}
+
+# strategy_combined (coinone_xrp_backtest.py)
+COMBINED_PARAMS = {
+    'rsi_entry': 35, 'bb_entry': 1.002,
+    'rsi_exit': 65, 'bb_exit': 0.998,
+    'stop_loss_pct': 2.0, 'position_size': 0.95,
+}
+COMBINED_SPACE = {
+    'rsi_entry': (20, 45),
+    'bb_entry': (0.99, 1.01),
+    'rsi_exit': (55, 80),
+    'bb_exit': (0.98, 1.01),
+    'stop_loss_pct': (0.5, 6.0),
+}
+
+
+# ==============================================================================
+# strategy_combined on the shared arrays
+# ==============================================================================
+
+def evaluate_combined(market, params, n=None, initial_capital=100000, fee_rate=FEE_RATE):
+    """
+    strategy_combined's rules on the first n bars -> metrics dict (same keys
+    as strategy_tuner.evaluate)
+
+    Runs on the market's calculate_all_indicators columns (not the tuner's
+    own arrays) from the first bar strategy_combined trades on. Entry:
+    uptrend (EMA50 > EMA200), RSI < rsi_entry or close <= BB lower x
+    bb_entry, EMA9 rising. Exit at the close of the first bar, the entry
+    bar included, with RSI > rsi_exit, close >= BB upper x bb_exit, the
+    stop hit or the trend turned. The unused (1 - position_size) share
+    stays in capital; a position still open at the end is marked to the
+    last close, as analyze_trades does.
+    """
+    p = params
+    n = market.n if n is None else min(n, market.n)
+    close = market.close[:n]
+    ticks = market.ticks
+    # Stops compare on integer ticks when the market has them
+    stop_close = close if ticks is None else ticks.close[:n]
+    columns = market.indicator_columns()
+    rsi = columns['RSI'][:n]
+    ema9 = columns['EMA_9'][:n]
+    uptrend = columns['EMA_50'][:n] > columns['EMA_200'][:n]
+    rising = np.concatenate(([False], ema9[1:] > ema9[:-1]))
+    # strategy_combined skips bars without RSI / Bollinger values, and bar 0
+    ready = ~(np.isnan(rsi) | np.isnan(columns['BB_Lower'][:n]))
+    ready[:1] = False
+
+    with np.errstate(invalid='ignore'):
+        entries = ready & uptrend & rising & ((rsi < p['rsi_entry']) | (close <= columns['BB_Lower'][:n] * p['bb_entry']))
+        exits = ready & ((rsi > p['rsi_exit']) | (close >= columns['BB_Upper'][:n] * p['bb_exit']) | ~uptrend)
+
+    capital = peak = initial_capital
+    max_drawdown = 0.0
+    trades = wins = 0
+    candidates = np.flatnonzero(entries)
+    k = 0
+    while k < len(candidates):
+        i = int(candidates[k])
+        entry = close[i]
+        if ticks is None:
+            stop = entry * (1 - p['stop_loss_pct'] / 100)
+        else:
+            stop = ticks.spec.stop_ticks(ticks.close[i], p['stop_loss_pct'])
+        exit_bar = _first_exit(exits, stop_close, i, n, stop)
+
+        invested = capital * p['position_size']
+        quantity = invested * (1 - fee_rate) / entry
+        if exit_bar is None:
+            proceeds = quantity * close[n - 1]
+        else:
+            proceeds = quantity * close[exit_bar] * (1 - fee_rate)
+        capital += proceeds - invested
+        trades += 1
+        wins += int(proceeds > invested)
+        peak = max(peak, capital)
+        max_drawdown = max(max_drawdown, (peak - capital) / peak * 100)
+        if exit_bar is None:
+            break
+
+        k = int(np.searchsorted(candidates, exit_bar, side='right'))
+
+    return {
+        'return_pct': (capital - initial_capital) / initial_capital * 100,
+        'final_capital': capital,
+        'trades': trades,
+        'win_rate': wins / trades * 100 if trades else 0.0,
+        'max_drawdown_pct': max_drawdown,
+        'bars': n,
+    }
+
+
+def check_combined(columns, bars=20000):
+    """
+    evaluate_combined at COMBINED_PARAMS against coinone_xrp_backtest's
+    strategy_combined on the last `bars` candles -> (ours, theirs) metrics
+    """
+    from candle_decoder import CandleColumns
+    from coinone_xrp_backtest import analyze_trades, calculate_all_indicators, strategy_combined
+
+    start = max(len(columns) - bars, 0)
+    window = CandleColumns(*(None if getattr(columns, field) is None else np.asarray(getattr(columns, field))[start:]
+                             for field in CandleColumns.__slots__))
+    df = calculate_all_indicators(window.to_dataframe())
+    trades, _ = strategy_combined(df, position_size=COMBINED_PARAMS['position_size'], fee_rate=FEE_RATE)
+    theirs = analyze_trades(trades, 100000, 'Combined', df, FEE_RATE)
+
+    ours = evaluate_combined(Market(window), COMBINED_PARAMS)
+    return ours, theirs
+
+
+def _first_exit(exits, close, start, end, stop, step=256):
+    """First bar in [start, end) with an exit signal or a close at / below the stop"""
+    while start < end:
+        stop_at = start + min(step, end - start)
+        hits = np.flatnonzero(exits[start:stop_at] | (close[start:stop_at] <= stop))
+        if len(hits):
+            return start + int(hits[0])
+        start = stop_at
+        step *= 2
+    return None
+
+
+def _entry_params(params):
+    # The uptrend tiers must stay ordered (tier1 is the most oversold)
+    params = dict(params)
+    tiers = sorted(params[f'tier{t}_rsi'] for t in (1, 2, 3))
+    for t, value in zip((1, 2, 3), tiers):
+        params[f'tier{t}_rsi'] = value
+    return params
+
+
+# name -> (evaluate function, base params, search space, params repair)
+TARGETS = {
+    'entry': (evaluate, DEFAULT_PARAMS, ENTRY_SPACE, _entry_params),
+    'combined': (evaluate_combined, COMBINED_PARAMS, COMBINED_SPACE, dict),
+}
+
+
+# ==============================================================================
+# Pareto utilities (every objective minimized)
+# ==============================================================================
+
+def nondominated_ranks(Y):
+    """Front number of every row of Y (0 = Pareto front), by repeated peeling"""
+    Y = np.asarray(Y, dtype=np.float64)
+    ranks = np.full(len(Y), -1)
+    remaining = np.arange(len(Y))
+    front = 0
+    while len(remaining):
+        sub = Y[remaining]
+        dominated = np.array([np.any(np.all(sub <= y, axis=1) & np.any(sub < y, axis=1)) for y in sub])
+        ranks[remaining[~dominated]] = front
+        remaining = remaining[dominated]
+        front += 1
+    return ranks
+
+
+def pareto_front(Y):
+    """Indices of the non-dominated rows of Y"""
+    return np.flatnonzero(nondominated_ranks(Y) == 0)
+
+
+def hypervolume_2d(Y, reference):
+    """Area dominated by the 2-objective points Y up to `reference`"""
+    Y = np.asarray(Y, dtype=np.float64)
+    Y = Y[np.all(Y < reference, axis=1)]
+    if not len(Y):
+        return 0.0
+    Y = Y[pareto_front(Y)]
+    Y = Y[np.argsort(Y[:, 0])]
+    area = 0.0
+    ceiling = reference[1]
+    for x, y in Y:
+        area += (reference[0] - x) * (ceiling - y)
+        ceiling = y
+    return area
+
+
+# ==============================================================================
+# Tree-structured Parzen Estimator
+# ==============================================================================
+
+_erf = np.frompyfunc(math.erf, 1, 1)
+
+
+def _normal_cdf(z):
+    return 0.5 * (1 + _erf(z / math.sqrt(2)).astype(np.float64))
+
+
+class ParzenEstimator:
+    """Product of truncated Gaussian kernels on [0, 1]^d plus a uniform prior component"""
+
+    def __init__(self, points, prior_weight=1.0):
+        points = np.asarray(points, dtype=np.float64)
+        m, d = points.shape
+        self.points = points
+        # Scott's rule per dimension, floored so a tight cluster still explores
+        spread = points.std(axis=0) if m > 1 else np.full(d, 0.5)
+        self.sigma = np.clip(spread * m ** (-1 / (d + 4)), 0.02, 0.5)
+        self.weights = np.append(np.ones(m), prior_weight)
+        self.weights /= self.weights.sum()
+        # Kernel mass inside [0, 1]
+        self.log_mass = np.log(_normal_cdf((1 - points) / self.sigma) - _normal_cdf(-points / self.sigma)).sum(axis=1)
+
+    def sample(self, rng, size):
+        m, d = self.points.shape
+        component = rng.choice(m + 1, size=size, p=self.weights)
+        out = rng.random((size, d))                     # prior component: uniform
+        kernel = component < m
+        centers = self.points[component[kernel]]
+        draws = centers + self.sigma * rng.standard_normal(centers.shape)
+        # Redraw what fell outside the cube a few times, clip the rest
+        for _ in range(8):
+            outside = (draws < 0) | (draws > 1)
+            if not outside.any():
+                break
+            redraw = centers + self.sigma * rng.standard_normal(centers.shape)
+            draws = np.where(outside, redraw, draws)
+        out[kernel] = np.clip(draws, 0, 1)
+        return out
+
+    def log_pdf(self, X):
+        z = (X[:, None, :] - self.points[None, :, :]) / self.sigma
+        log_kernel = (-0.5 * z ** 2).sum(axis=2) - np.log(self.sigma * math.sqrt(2 * math.pi)).sum() - self.log_mass
+        log_terms = np.concatenate((log_kernel + np.log(self.weights[:-1]),
+                                    np.full((len(X), 1), np.log(self.weights[-1]))), axis=1)
+        top = log_terms.max(axis=1, keepdims=True)
+        return (top + np.log(np.exp(log_terms - top).sum(axis=1, keepdims=True)))[:, 0]
+
+
+class TPE:
+    """
+    Ask / tell optimizer over a {name: (low, high)} space, minimizing one or
+    more objectives
+    """
+
+    def __init__(self, space, gamma=0.15, n_startup=24, n_candidates=128, seed=0):
+        self.names = list(space)
+        self.low = np.array([space[name][0] for name in self.names], dtype=np.float64)
+        self.high = np.array([space[name][1] for name in self.names], dtype=np.float64)
+        self.gamma = gamma
+        self.n_startup = n_startup
+        self.n_candidates = n_candidates
+        self.rng = np.random.default_rng(seed)
+        self.X = np.empty((0, len(self.names)))     # observed points, unit cube
+        self.Y = None                               # (n, objectives)
+
+    def decode(self, unit):
+        values = self.low + unit * (self.high - self.low)
+        return {name: round(float(value), 3) for name, value in zip(self.names, values)}
+
+    def encode(self, params):
+        values = np.array([params[name] for name in self.names], dtype=np.float64)
+        return np.clip((values - self.low) / (self.high - self.low), 0, 1)
+
+    def ask(self, q=1):
+        """q parameter dicts to evaluate next"""
+        d = len(self.names)
+        if len(self.X) < self.n_startup:
+            return [self.decode(unit) for unit in self.rng.random((q, d))]
+
+        order = self._order()
+        n_good = max(2, min(int(math.ceil(self.gamma * len(order))), 25))
+        good = self.X[order[:n_good]]
+        bad = self.X[order[n_good:]]
+        below = ParzenEstimator(good)
+
+        batch = []
+        for _ in range(q):
+            above = ParzenEstimator(np.concatenate([bad] + [np.array(batch)] * bool(batch)))
+            draws = below.sample(self.rng, self.n_candidates)
+            ratio = below.log_pdf(draws) - above.log_pdf(draws)
+            batch.append(draws[int(np.argmax(ratio))])
+        return [self.decode(unit) for unit in batch]
+
+    def tell(self, params_list, objectives):
+        """Record evaluated params with their objective vectors (lower is better)"""
+        Y = np.atleast_2d(np.asarray(objectives, dtype=np.float64))
+        self.X = np.concatenate((self.X, [self.encode(params) for params in params_list]))
+        self.Y = Y if self.Y is None else np.concatenate((self.Y, Y))
+
+    def _order(self):
+        """Observations best first: Pareto rank, then the first objective"""
+        if self.Y.shape[1] == 1:
+            return np.argsort(self.Y[:, 0], kind='stable')
+        return np.lexsort((self.Y[:, 0], nondominated_ranks(self.Y)))
+
+
+# ==============================================================================
+# Evaluation workers
+# ==============================================================================
+
+_worker_market = None
+_worker_target = None
+
+
+def _init_worker(store_root, symbol, interval, target, ticks):
+    global _worker_market, _worker_target
+    from candle_store import CandleStore
+    _worker_market = load_market(CandleStore(store_root), symbol, interval, ticks)
+    _worker_target = target
+
+
+def _evaluate_worker(params):
+    evaluate_fn, base, _, repair = TARGETS[_worker_target]
+    return evaluate_fn(_worker_market, repair(dict(base, **params)))
+
+
+class Evaluator:
+    """Evaluates batches of tuned params, in-process or on a multiprocessing pool"""
+
+    def __init__(self, market, target, workers=1, store_root=None, symbol=None, interval=None):
+        self.market = market
+        self.target = target
+        self.evaluations = 0
+        self.pool = None
+        if workers > 1:
+            import multiprocessing
+            self.pool = multiprocessing.Pool(workers, initializer=_init_worker,
+                                             initargs=(store_root, symbol, interval, target,
+                                                       market.ticks is not None))
+
+    def __call__(self, params_list):
+        self.evaluations += len(params_list)
+        if self.pool is not None:
+            return self.pool.map(_evaluate_worker, params_list)
+        evaluate_fn, base, _, repair = TARGETS[self.target]
+        return [evaluate_fn(self.market, repair(dict(base, **params))) for params in params_list]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+
+
+def objective_vector(metrics, objective, min_trades):
+    """Objectives to minimize; too few trades makes a point worse than any real one"""
+    if metrics['trades'] < min_trades:
+        return [math.inf, math.inf] if objective == 'pareto' else [math.inf]
+    if objective == 'pareto':
+        return [-metrics['return_pct'], metrics['max_drawdown_pct']]
+    return [-metrics[objective]]
+
+
+def optimize(evaluator, space, evals, batch, objective='pareto', min_trades=10, seed=0, start=None):
+    """
+    Run TPE for `evals` evaluations in batches -> (params list, metrics list)
+
+    `start` (tuned params of the current rules) is evaluated first.
+    """
+    tpe = TPE(space, seed=seed)
+    tried, results = [], []
+    pending = [{name: start[name] for name in space}] if start else []
+    while len(tried) < evals:
+        q = min(batch, evals - len(tried))
+        proposals = (pending + tpe.ask(q))[:q]
+        pending = []
+        metrics = evaluator(proposals)
+        tpe.tell(proposals, [objective_vector(m, objective, min_trades) for m in metrics])
+        tried += proposals
+        results += metrics
+    return tried, results
+
+
+def random_search(evaluator, space, evals, batch, seed=0):
+    tpe = TPE(space, n_startup=evals, seed=seed)
+    tried, results = [], []
+    while len(tried) < evals:
+        proposals = tpe.ask(min(batch, evals - len(tried)))
+        tried += proposals
+        results += evaluator(proposals)
+    return tried, results
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def _summary(results, objective, min_trades, reference):
+    Y = np.array([objective_vector(m, objective, min_trades) for m in results])
+    best = min(range(len(results)), key=lambda i: Y[i, 0])
+    line = f"best return {results[best]['return_pct']:+.2f}% (MDD {results[best]['max_drawdown_pct']:.1f}%)"
+    if objective == 'pareto':
+        line += f", hypervolume {hypervolume_2d(Y, reference):,.0f}"
+    return line
+
+
+def main():
+    import time
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description='TPE tuner for continuous strategy parameters')
+    parser.add_argument('--symbol', default='XRP')
+    parser.add_argument('--interval', default='5m')
+    parser.add_argument('--store', default='candle_store', help='Candle store directory')
+    parser.add_argument('--target', default='entry', choices=sorted(TARGETS))
+    parser.add_argument('--objective', default='pareto', choices=('pareto', 'return_pct', 'win_rate'))
+    parser.add_argument('--evals', type=int, default=300)
+    parser.add_argument('--batch', type=int, default=8, help='Candidates proposed (and evaluated) at once')
+    parser.add_argument('--workers', type=int, default=1, help='Evaluation processes')
+    parser.add_argument('--min-trades', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ticks', action='store_true', help='Exact stops on integer price ticks (price_ticks)')
+    parser.add_argument('--compare-random', type=int, default=0, metavar='EVALS',
+                        help='Also run a random search with this many evaluations')
+    parser.add_argument('--check-combined', type=int, default=0, metavar='BARS',
+                        help='Only compare --target combined at default params with strategy_combined '
+                             'on the last BARS candles')
+    args = parser.parse_args()
+
+    if args.check_combined:
+        columns = CandleStore(args.store).load(args.symbol, args.interval)
+        if columns is None:
+            raise SystemExit(f"✗ No stored candles for {args.symbol} {args.interval}")
+        ours, theirs = check_combined(columns, args.check_combined)
+        same = ours['trades'] == theirs['total_trades'] and abs(ours['return_pct'] - theirs['return_pct']) < 1e-6
+        print(f"{'✓' if same else '✗'} evaluate_combined: {ours['trades']} trades, {ours['return_pct']:+.4f}%  "
+              f"strategy_combined: {theirs['total_trades']} trades, {theirs['return_pct']:+.4f}%")
+        if not same:
+            raise SystemExit(1)
+        return
+
+    market = load_market(CandleStore(args.store), args.symbol, args.interval, args.ticks)
+    evaluate_fn, base, space, repair = TARGETS[args.target]
+    evaluator = Evaluator(market, args.target, args.workers, args.store, args.symbol, args.interval)
+    print(f"✓ {args.symbol} {args.interval}: {market.n:,} bars, {len(space)} parameters ({args.target})")
+
+    try:
+        started = time.perf_counter()
+        tried, results = optimize(evaluator, space, args.evals, args.batch, args.objective,
+                                  args.min_trades, args.seed, start=base)
+        elapsed = time.perf_counter() - started
+        current = results[0]
+        # Hypervolume reference: no gain, the current rules' drawdown doubled
+        reference = np.array([0.0, max(2 * current['max_drawdown_pct'], 1.0)])
+        print(f"  TPE: {len(results)} evaluations in {elapsed:.1f}s — "
+              f"{_summary(results, args.objective, args.min_trades, reference)}")
+
+        if args.compare_random:
+            started = time.perf_counter()
+            _, random_results = random_search(evaluator, space, args.compare_random, args.batch, args.seed + 1)
+            elapsed = time.perf_counter() - started
+            print(f"  random: {len(random_results)} evaluations in {elapsed:.1f}s — "
+                  f"{_summary(random_results, args.objective, args.min_trades, reference)}")
+    finally:
+        evaluator.close()
+
+    print(f"\n현재 규칙: return {current['return_pct']:+.2f}%  trades {current['trades']}  "
+          f"win {current['win_rate']:.0f}%  MDD {current['max_drawdown_pct']:.1f}%")
+
+    Y = np.array([objective_vector(m, args.objective, args.min_trades) for m in results])
+    if args.objective == 'pareto':
+        feasible = np.flatnonzero(np.isfinite(Y[:, 0]))
+        picks = feasible[pareto_front(Y[feasible])]
+        picks = picks[np.argsort(Y[picks, 1])]
+        print(f"\nReturn / drawdown Pareto front ({len(picks)} points):")
+    else:
+        picks = np.argsort(Y[:, 0], kind='stable')[:5]
+        print("\nTop 5:")
+    for i in picks:
+        metrics = results[i]
+        params = repair(dict(base, **tried[i]))
+        changed = {k: v for k, v in params.items() if k in space}
+        print(f"  return {metrics['return_pct']:+8.2f}%  MDD {metrics['max_drawdown_pct']:5.1f}%  "
+              f"trades {metrics['trades']:4d}  win {metrics['win_rate']:3.0f}%  {changed}")
+
+
+if __name__ == '__main__':
+    main()
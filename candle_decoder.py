@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Fast candle decoder - chart JSON payload to typed NumPy columns
+
+Instead of json.loads() -> list of dicts -> float(c['close']) per field, the
+raw response bytes are flattened to a comma-separated number list with a
+single bytes.translate() and parsed by NumPy in C. No per-candle Python
+objects are created, so parse time and peak memory drop severalfold for
+large (100k+) payloads.
+
+Both Coinone (`chart` list of objects) and Bybit (`result.list` list of
+string arrays) payloads are supported. Newest-first payloads are flipped
+while the columns are laid out, so no separate reverse() pass is needed.
+
+If the payload doesn't fit the fast path (non-numeric values, exponent
+notation, inconsistent key order), it falls back to a parsed-JSON path,
+using orjson when it is installed.
+
+Usage:
+    candles = decode_coinone_chart(response.content)
+    closes = candles.close          # float64 ndarray, oldest first
+    df = candles.to_dataframe()     # same layout as coinone_xrp_backtest
+"""
+
+import json
+import re
+import warnings
+from operator import itemgetter
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+# Source field name -> CandleColumns attribute
+FIELD_ALIASES = {
+    'timestamp': 'timestamp',
+    'open': 'open',
+    'high': 'high',
+    'low': 'low',
+    'close': 'close',
+    'target_volume': 'volume',
+    'volume': 'volume',
+    'quote_volume': 'quote_volume',
+    'turnover': 'quote_volume',
+}
+
+# Bybit v5 kline row layout: [startTime, open, high, low, close, volume, turnover]
+BYBIT_KLINE_FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume', 'quote_volume')
+
+# Bytes that make up the numbers themselves; stripping them leaves the
+# "skeleton" (keys, quotes, braces) used to verify every row has one layout.
+_NUMBER_BYTES = b'0123456789.-+'
+# Everything else, which is stripped to leave a flat "n,n,n,..." list.
+_STRIP_BYTES = bytes(b for b in range(256) if b not in _NUMBER_BYTES + b',')
+_KEY = re.compile(rb'"[A-Za-z_]+"\s*:')
+
+
+def loads(payload):
+    """json.loads, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+class CandleColumns:
+    """Oldest-first OHLCV columns (timestamp in ms as int64, the rest float64)"""
+
+    __slots__ = ('timestamp', 'open', 'high', 'low', 'close', 'volume', 'quote_volume')
+
+    def __init__(self, timestamp, open, high, low, close, volume, quote_volume=None):
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.quote_volume = quote_volume if quote_volume is not None else np.zeros_like(close)
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def to_dataframe(self):
+        """DataFrame with the column names used by coinone_xrp_backtest"""
+        import pandas as pd
+
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(self.timestamp, unit='ms'),
+            'Open': self.open,
+            'High': self.high,
+            'Low': self.low,
+            'Close': self.close,
+            'Volume': self.volume,
+            'Quote_Volume': self.quote_volume,
+        })
+
+
+# ==============================================================================
+# Public decoders
+# ==============================================================================
+
+def decode_coinone_chart(payload):
+    """
+    Decode a Coinone /public/v2/chart response
+
+    Args:
+        payload: Raw response bytes/str (fast path) or the already parsed dict
+
+    Returns:
+        CandleColumns, oldest first
+    """
+    if isinstance(payload, (bytes, bytearray, str)):
+        raw = payload.encode() if isinstance(payload, str) else bytes(payload)
+        columns = _fast_coinone(raw)
+        if columns is not None:
+            return columns
+        payload = loads(raw)
+
+    if 'chart' not in payload:
+        raise ValueError(f"No chart data in response: {payload}")
+    return decode_candle_rows(payload['chart'])
+
+
+def decode_bybit_kline(payload):
+    """
+    Decode a Bybit /v5/market/kline response
+
+    Args:
+        payload: Raw response bytes/str (fast path) or the already parsed dict
+
+    Returns:
+        CandleColumns, oldest first
+    """
+    if isinstance(payload, (bytes, bytearray, str)):
+        raw = payload.encode() if isinstance(payload, str) else bytes(payload)
+        columns = _fast_bybit(raw)
+        if columns is not None:
+            return columns
+        payload = loads(raw)
+
+    rows = payload.get('result', {}).get('list')
+    if rows is None:
+        raise ValueError(f"No kline data in response: {payload}")
+    if not rows:
+        return _empty()
+
+    values = np.array(rows, dtype=np.float64)[:, :len(BYBIT_KLINE_FIELDS)]
+    return _from_matrix(values, BYBIT_KLINE_FIELDS)
+
+
+def decode_candle_rows(rows, chronological=True):
+    """
+    Decode an already parsed list of candle dicts (e.g. from response.json())
+
+    Args:
+        rows: List of candle dicts with Coinone or Bybit-style field names
+        chronological: Return oldest first regardless of input order; when
+            False the input order is kept (index-aligned with `rows`)
+
+    Returns:
+        CandleColumns
+    """
+    if not rows:
+        return _empty()
+
+    fields = [k for k in rows[0] if k in FIELD_ALIASES]
+    getter = itemgetter(*fields)
+    ordered = rows
+    if chronological and int(rows[0]['timestamp']) > int(rows[-1]['timestamp']):
+        ordered = reversed(rows)
+
+    values = np.array(list(map(getter, ordered)), dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    return _from_matrix(values, [FIELD_ALIASES[k] for k in fields], flip=False)
+
+
+# ==============================================================================
+# Fast paths over the raw bytes
+# ==============================================================================
+
+def _fast_coinone(raw):
+    start = raw.find(b'"chart"')
+    if start < 0:
+        return None
+    start = raw.find(b'[', start)
+    end = raw.find(b']', start)
+    if start < 0 or end < 0:
+        return None
+    body = raw[start + 1:end]
+    if not body.strip():
+        return _empty()
+
+    # Learn the key layout from the first object; every object must match it.
+    first_end = body.find(b'}')
+    try:
+        first = json.loads(body[:first_end + 1])
+    except ValueError:
+        return None
+    keys = list(first)
+    if any(k not in FIELD_ALIASES for k in keys):
+        return None
+
+    values = _parse_numbers(body, b'{', b'}', len(keys))
+    if values is None:
+        return None
+    return _from_matrix(values, [FIELD_ALIASES[k] for k in keys])
+
+
+def _fast_bybit(raw):
+    start = raw.find(b'"list"')
+    if start < 0:
+        return None
+    start = raw.find(b'[', start)
+    end = raw.find(b']]', start)
+    if end < 0:
+        # Empty list
+        return _empty() if raw.find(b'[]', start) == start else None
+    body = raw[start + 1:end + 1]
+
+    first_end = body.find(b']')
+    n_fields = body[:first_end].count(b',') + 1
+    values = _parse_numbers(body, b'[', b']', n_fields)
+    if values is None or n_fields < len(BYBIT_KLINE_FIELDS):
+        return None
+    return _from_matrix(values[:, :len(BYBIT_KLINE_FIELDS)], BYBIT_KLINE_FIELDS)
+
+
+def _parse_numbers(body, row_open, row_close, n_fields):
+    """Strip everything but the numbers and parse them in one C call"""
+    n_rows = body.count(row_open)
+    if n_rows == 0:
+        return None
+
+    # Every row must share the first row's key order and quoting, otherwise
+    # the flattened numbers wouldn't line up with the field names. Exponents
+    # ("1e-05") survive in the skeleton, so checking the first row's values
+    # for 'e' covers every row.
+    skeleton = body.translate(None, _NUMBER_BYTES)
+    first_row = skeleton[:skeleton.find(row_close) + 1]
+    separator = skeleton[len(first_row):skeleton.find(row_open, len(first_row))]
+    if skeleton != (first_row + separator) * (n_rows - 1) + first_row:
+        return None
+    first_values = _KEY.sub(b'', first_row)
+    if b'e' in first_values or b'E' in first_values:
+        return None
+
+    flat = body.translate(None, _STRIP_BYTES)
+    if b',,' in flat:
+        # Empty values
+        return None
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        try:
+            values = np.fromstring(flat, dtype=np.float64, sep=',')
+        except (ValueError, DeprecationWarning):
+            return None
+
+    if values.size != n_fields * n_rows:
+        return None
+    return values.reshape(n_rows, n_fields)
+
+
+# ==============================================================================
+# Helpers
+# ==============================================================================
+
+def _from_matrix(values, names, flip=None):
+    """Lay out a rows x fields matrix as contiguous oldest-first columns"""
+    idx = list(names).index('timestamp')
+    if flip is None:
+        flip = len(values) > 1 and values[0, idx] > values[-1, idx]
+    if flip:
+        values = values[::-1]
+
+    # Transposing into contiguous columns is the one copy we pay; the flip
+    # above is a view, so reordering rides along for free.
+    matrix = np.ascontiguousarray(values.T)
+    columns = {name: matrix[i] for i, name in enumerate(names)}
+    columns['timestamp'] = columns['timestamp'].astype(np.int64)
+    return CandleColumns(**{k: columns.get(k) for k in CandleColumns.__slots__})
+
+
+def _empty():
+    empty = np.empty(0, dtype=np.float64)
+    return CandleColumns(np.empty(0, dtype=np.int64), empty, empty, empty, empty, empty, empty)
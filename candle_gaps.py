@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Candle gap detection and repair
+
+The scanners and backtests treat the candle columns as a contiguous grid
+(`duration_candles * 5` minutes, `i < 200` warm-up, 20-bar rolling
+windows), but Coinone skips candles in quiet periods, and merged fetches
+can leave duplicate or out-of-order bars. This validates a stored series
+with a few whole-array passes (np.diff / np.flatnonzero, no per-bar
+Python, fine on millions of rows) and repairs it:
+
+    duplicates      the later row wins (the more recent fetch)
+    out of order    stable sort by timestamp
+    missing bars    policy 'ffill': insert flat bars at the previous close
+                                    with zero volume
+                    policy 'mark':  leave the series as is
+
+Either way the gaps go into a GapIndex persisted next to the candles
+(store index 'gaps'), so a backtest can ask which bars have a trustworthy
+window behind them: GapIndex.trusted(timestamps, 20) is False for any bar
+whose last 20 bars include a synthetic bar or span a gap.
+
+Usage:
+    index = gap_index_for(store, 'XRP', '5m', policy='ffill')   # repairs the store
+    ok = index.trusted(candles.timestamp, 20)
+
+    python3 candle_gaps.py --symbol XRP --interval 5m              # report only
+    python3 candle_gaps.py --symbol XRP --interval 5m --repair ffill
+"""
+
+import argparse
+
+import numpy as np
+
+from candle_decoder import CandleColumns
+from multi_timeframe import INTERVAL_MS
+
+POLICIES = ('ffill', 'mark')
+GAPS_VERSION = 'v1'
+
+
+# ==============================================================================
+# Detection
+# ==============================================================================
+
+def scan_timestamps(timestamps, interval_ms):
+    """
+    Problems in an oldest-first timestamp column (positions are row indexes)
+
+        out_of_order  rows older than the row before them
+        duplicates    rows with the same timestamp as the row before them
+        misaligned    rows not on a multiple of interval_ms
+        gap_after     rows followed by at least one missing bar
+        gap_missing   number of missing bars after each of those
+    """
+    ts = np.asarray(timestamps, dtype=np.int64)
+    steps = np.diff(ts)
+    gap_after = np.flatnonzero(steps > interval_ms)
+    return {
+        'bars': len(ts),
+        'out_of_order': np.flatnonzero(steps < 0) + 1,
+        'duplicates': np.flatnonzero(steps == 0) + 1,
+        'misaligned': np.flatnonzero(ts % interval_ms),
+        'gap_after': gap_after,
+        'gap_missing': (steps[gap_after] - 1) // interval_ms,
+    }
+
+
+def find_gaps(timestamps, interval_ms):
+    """(first missing timestamp, missing bar count) arrays of a sorted, unique timestamp column"""
+    ts = np.asarray(timestamps, dtype=np.int64)
+    steps = np.diff(ts)
+    after = np.flatnonzero(steps > interval_ms)
+    return ts[after] + interval_ms, (steps[after] - 1) // interval_ms
+
+
+# ==============================================================================
+# Repair
+# ==============================================================================
+
+def normalize(columns):
+    """Sorted by timestamp with one row per timestamp (the last one given)"""
+    ts = np.asarray(columns.timestamp, dtype=np.int64)
+    order = np.argsort(ts, kind='stable')
+    ordered = ts[order]
+    last = np.append(ordered[1:] != ordered[:-1], True) if len(ordered) else np.zeros(0, dtype=bool)
+    keep = order[last]
+    if len(keep) == len(ts) and np.array_equal(keep, np.arange(len(ts))):
+        return columns
+    return CandleColumns(*(np.asarray(getattr(columns, field))[keep] for field in CandleColumns.__slots__))
+
+
+def fill_gaps(columns, interval_ms):
+    """
+    Insert a flat zero-volume bar at the previous close for every missing
+    grid slot; returns (contiguous columns, mask of the inserted bars)
+
+    Expects normalized columns. Off-grid timestamps are snapped down to the
+    interval, the later bar winning a slot.
+    """
+    n = len(columns)
+    if n == 0:
+        return columns, np.zeros(0, dtype=bool)
+    ts = np.asarray(columns.timestamp, dtype=np.int64)
+    start = ts[0] - ts[0] % interval_ms
+    slots = (ts - ts % interval_ms - start) // interval_ms
+    size = int(slots[-1]) + 1
+    if size == n and ts[0] == start and np.array_equal(np.diff(ts), np.full(n - 1, interval_ms)):
+        return columns, np.zeros(n, dtype=bool)
+
+    source = np.full(size, -1, dtype=np.int64)
+    source[slots] = np.arange(n)                   # later rows overwrite a shared slot
+    real = source >= 0
+    source = np.maximum.accumulate(source)         # last real bar at or before each slot
+    close = np.asarray(columns.close)[source]
+
+    def column(field, filler):
+        values = np.asarray(getattr(columns, field))[source]
+        return np.where(real, values, filler)
+
+    filled = CandleColumns(
+        start + np.arange(size, dtype=np.int64) * interval_ms,
+        column('open', close), column('high', close), column('low', close), close,
+        column('volume', 0.0), column('quote_volume', 0.0))
+    return filled, ~real
+
+
+# ==============================================================================
+# Gap index
+# ==============================================================================
+
+class GapIndex:
+    """Missing-bar ranges of one symbol / interval and the policy they were handled with"""
+
+    def __init__(self, interval_ms, starts, missing, policy, last_timestamp=None, bars=0):
+        self.interval_ms = interval_ms
+        self.starts = np.asarray(starts, dtype=np.int64)     # first missing timestamp per gap
+        self.missing = np.asarray(missing, dtype=np.int64)   # missing bars per gap
+        self.policy = policy
+        self.last_timestamp = last_timestamp
+        self.bars = bars
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def missing_bars(self):
+        return int(self.missing.sum())
+
+    def synthetic(self, timestamps):
+        """Bars that fall inside a recorded gap, i.e. were inserted by 'ffill'"""
+        ts = np.asarray(timestamps, dtype=np.int64)
+        gap = np.searchsorted(self.starts, ts, side='right') - 1
+        inside = gap >= 0
+        ends = self.starts + self.missing * self.interval_ms
+        inside[inside] = ts[inside] < ends[gap[inside]]
+        return inside
+
+    def trusted(self, timestamps, window):
+        """
+        True for bars whose last `window` bars (themselves included) are all
+        real and consecutive; the first window - 1 bars are never trusted
+        """
+        ts = np.asarray(timestamps, dtype=np.int64)
+        n = len(ts)
+        bad_bar = self.synthetic(ts).astype(np.int64)
+        bad_step = np.zeros(n, dtype=np.int64)
+        bad_step[1:] = np.diff(ts) != self.interval_ms    # step from bar i - 1 to bar i
+        bars = np.concatenate(([0], np.cumsum(bad_bar)))
+        steps = np.concatenate(([0], np.cumsum(bad_step)))
+
+        ok = np.zeros(n, dtype=bool)
+        if n >= window:
+            end = np.arange(window - 1, n)
+            ok[window - 1:] = ((bars[end + 1] - bars[end + 1 - window] == 0) &
+                               (steps[end + 1] - steps[end + 2 - window] == 0))
+        return ok
+
+    def gaps_between(self, start_ms, end_ms):
+        """(start, missing) of the gaps overlapping [start_ms, end_ms]"""
+        ends = self.starts + self.missing * self.interval_ms
+        hit = (self.starts <= end_ms) & (ends > start_ms)
+        return list(zip(self.starts[hit].tolist(), self.missing[hit].tolist()))
+
+    def save(self, store, symbol, interval):
+        store.save_index(symbol, interval, f'gaps_{GAPS_VERSION}', {'starts': self.starts, 'missing': self.missing},
+                         meta={'interval_ms': self.interval_ms, 'policy': self.policy,
+                               'last_timestamp': self.last_timestamp, 'bars': self.bars})
+
+    @classmethod
+    def load(cls, store, symbol, interval):
+        stored = store.load_index(symbol, interval, f'gaps_{GAPS_VERSION}')
+        if stored is None:
+            return None
+        arrays, meta = stored
+        return cls(meta['interval_ms'], arrays['starts'], arrays['missing'], meta['policy'],
+                   meta.get('last_timestamp'), meta.get('bars', 0))
+
+
+def _merge_gaps(starts_a, missing_a, starts_b, missing_b):
+    starts = np.concatenate((starts_a, starts_b))
+    missing = np.concatenate((missing_a, missing_b))
+    order = np.lexsort((-missing, starts))
+    starts, missing = starts[order], missing[order]
+    first = np.append(True, starts[1:] != starts[:-1]) if len(starts) else np.zeros(0, dtype=bool)
+    return starts[first], missing[first]
+
+
+def gap_index_for(store, symbol, interval, candles=None, policy='mark'):
+    """
+    Validate the stored candles, repair them per `policy` (rewriting the
+    store when anything changed) and return the up-to-date GapIndex
+
+    Gaps filled by 'ffill' no longer show in the timestamps, so they are
+    kept from the stored index; with 'mark' the index is the current scan.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown gap policy {policy!r} (expected one of {POLICIES})")
+    if candles is None:
+        candles = store.load(symbol, interval)
+        if candles is None:
+            raise ValueError(f"No stored candles for {symbol} {interval}")
+    interval_ms = INTERVAL_MS[interval]
+    index = GapIndex.load(store, symbol, interval)
+    if (index is not None and index.policy == policy and index.bars == len(candles)
+            and len(candles) and index.last_timestamp == int(candles.timestamp[-1])):
+        return index
+
+    repaired = normalize(candles)
+    starts, missing = find_gaps(repaired.timestamp, interval_ms)
+    if policy == 'ffill':
+        repaired, _ = fill_gaps(repaired, interval_ms)
+        if index is not None and index.policy == 'ffill':
+            starts, missing = _merge_gaps(index.starts, index.missing, starts, missing)
+    if repaired is not candles:
+        store.save(symbol, interval, repaired)
+
+    last = int(repaired.timestamp[-1]) if len(repaired) else None
+    index = GapIndex(interval_ms, starts, missing, policy, last, len(repaired))
+    index.save(store, symbol, interval)
+    return index
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def main():
+    import time
+    from datetime import datetime
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description='Candle gap detection and repair')
+    parser.add_argument('--symbol', default='XRP')
+    parser.add_argument('--interval', default='5m')
+    parser.add_argument('--store', default='candle_store', help='Candle store directory')
+    parser.add_argument('--repair', choices=POLICIES, help='Fix the store and update its gap index')
+    parser.add_argument('--window', type=int, default=20, help='Window length for the trusted-bar count')
+    parser.add_argument('--top', type=int, default=10, help='Largest gaps to list')
+    args = parser.parse_args()
+
+    store = CandleStore(args.store)
+    candles = store.load(args.symbol, args.interval, mmap=True)
+    if candles is None:
+        raise SystemExit(f"✗ No stored candles for {args.symbol} {args.interval}")
+    interval_ms = INTERVAL_MS[args.interval]
+
+    started = time.perf_counter()
+    report = scan_timestamps(candles.timestamp, interval_ms)
+    elapsed = time.perf_counter() - started
+    print(f"✓ {args.symbol} {args.interval}: {report['bars']:,} bars scanned in {elapsed * 1000:.1f} ms")
+    print(f"  out of order {len(report['out_of_order']):,}  duplicates {len(report['duplicates']):,}  "
+          f"misaligned {len(report['misaligned']):,}")
+    print(f"  gaps {len(report['gap_after']):,} ({int(report['gap_missing'].sum()):,} missing bars)")
+
+    largest = np.argsort(report['gap_missing'])[::-1][:args.top]
+    for k in largest:
+        ts = int(candles.timestamp[report['gap_after'][k]]) + interval_ms
+        print(f"    {datetime.fromtimestamp(ts / 1000):%Y-%m-%d %H:%M}  {int(report['gap_missing'][k]):,} bars")
+
+    if args.repair:
+        index = gap_index_for(store, args.symbol, args.interval, policy=args.repair)
+        repaired = store.load(args.symbol, args.interval, mmap=True)
+        trusted = index.trusted(repaired.timestamp, args.window)
+        print(f"\n✓ Repaired ({args.repair}): {len(repaired):,} bars, {len(index):,} gaps indexed "
+              f"({index.missing_bars:,} bars)")
+        print(f"  {np.count_nonzero(trusted):,} of {len(repaired):,} bars have a trustworthy "
+              f"{args.window}-bar window")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Fixed-size candle ring buffer
+
+Holds the last `capacity` candles of one symbol / timeframe in preallocated
+NumPy arrays. Every value is written twice, at slot i and i + capacity, so
+the newest `capacity` candles are always one contiguous slice: the column
+views handed to the indicator kernels are zero-copy and need no unwrapping.
+
+    append()       new candle at the end, O(1)
+    update_last()  overwrite the forming candle in place, O(1)
+    upsert()       either of the two by timestamp (or a past bar in the window)
+
+Memory is 2 x capacity x 7 x 8 bytes per buffer, allocated once; appends and
+updates never allocate arrays.
+
+Usage:
+    ring = CandleRing(2000)
+    ring.extend(decode_coinone_chart(response.content))
+    ring.upsert(ts, open, high, low, close, volume)
+    closes = ring.close             # float64 view, oldest first
+    candles = ring.columns()        # CandleColumns of views
+"""
+
+import numpy as np
+
+from candle_decoder import CandleColumns
+
+PRICE_FIELDS = CandleColumns.__slots__[1:]     # open .. quote_volume
+
+
+class CandleRing:
+    """Last `capacity` candles, oldest first, as contiguous column views"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._timestamp = np.zeros(2 * capacity, dtype=np.int64)
+        self._values = np.zeros((len(PRICE_FIELDS), 2 * capacity), dtype=np.float64)
+        self._rows = list(self._values)     # 1-D row views; scalar writes to these are cheap
+        self._head = 0          # slot of the next append
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return self._timestamp.nbytes + self._values.nbytes
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+    # --------------------------------------------------------------------------
+    # Writes
+    # --------------------------------------------------------------------------
+
+    def append(self, timestamp, open, high, low, close, volume, quote_volume=0.0):
+        """Add a candle after the newest one, dropping the oldest when full"""
+        self._write(self._head, timestamp, open, high, low, close, volume, quote_volume)
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def update_last(self, timestamp, open, high, low, close, volume, quote_volume=0.0):
+        """Overwrite the newest (still forming) candle"""
+        if not self._count:
+            raise IndexError('update_last on an empty CandleRing')
+        self._write((self._head - 1) % self.capacity, timestamp, open, high, low, close, volume, quote_volume)
+
+    def upsert(self, timestamp, open, high, low, close, volume, quote_volume=0.0):
+        """
+        Place a candle by timestamp: append if newer than the newest, else
+        overwrite the bar with the same timestamp
+
+        Returns False (and writes nothing) if the candle falls before the
+        window or between two held bars, i.e. the caller has to rebuild.
+        """
+        if not self._count or timestamp > self.last_timestamp:
+            self.append(timestamp, open, high, low, close, volume, quote_volume)
+            return True
+        timestamps = self.timestamp
+        pos = int(np.searchsorted(timestamps, timestamp))
+        if pos == self._count or timestamps[pos] != timestamp:
+            return False
+        slot = (self._head - self._count + pos) % self.capacity
+        self._write(slot, timestamp, open, high, low, close, volume, quote_volume)
+        return True
+
+    def extend(self, columns):
+        """Append oldest-first CandleColumns (only the last `capacity` are kept)"""
+        n = min(len(columns), self.capacity)
+        if n == 0:
+            return
+        start = len(columns) - n
+        slots = (self._head + np.arange(n)) % self.capacity
+        self._timestamp[slots] = self._timestamp[slots + self.capacity] = columns.timestamp[start:]
+        for row, field in zip(self._rows, PRICE_FIELDS):
+            row[slots] = row[slots + self.capacity] = getattr(columns, field)[start:]
+        self._head = (self._head + n) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+
+    def _write(self, slot, timestamp, *values):
+        mirror = slot + self.capacity
+        self._timestamp[slot] = self._timestamp[mirror] = timestamp
+        for row, value in zip(self._rows, values):
+            row[slot] = row[mirror] = value
+
+    # --------------------------------------------------------------------------
+    # Views
+    # --------------------------------------------------------------------------
+
+    def _window(self):
+        end = self._head + self.capacity
+        return slice(end - self._count, end)
+
+    def view(self, field):
+        """Zero-copy contiguous view of one column, oldest first"""
+        if field == 'timestamp':
+            return self._timestamp[self._window()]
+        return self._values[PRICE_FIELDS.index(field), self._window()]
+
+    @property
+    def timestamp(self):
+        return self._timestamp[self._window()]
+
+    @property
+    def close(self):
+        return self._values[PRICE_FIELDS.index('close'), self._window()]
+
+    @property
+    def volume(self):
+        return self._values[PRICE_FIELDS.index('volume'), self._window()]
+
+    @property
+    def last_timestamp(self):
+        return int(self._timestamp[(self._head - 1) % self.capacity])
+
+    def columns(self):
+        """CandleColumns of views; valid until the next write"""
+        window = self._window()
+        return CandleColumns(self._timestamp[window],
+                             *(self._values[row, window] for row in range(len(PRICE_FIELDS))))
+
+    def copy(self):
+        """CandleColumns of copies that outlive later writes"""
+        window = self._window()
+        return CandleColumns(self._timestamp[window].copy(),
+                             *(self._values[row, window].copy() for row in range(len(PRICE_FIELDS))))
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Local candle store
+
+Keeps fetched candles on disk per symbol / interval as one .npy file per
+column, so later runs can load (or memory-map) them instead of re-fetching,
+and so derived indexes (market regimes, signal bitmaps, ...) can be
+persisted next to the candles they were built from.
+
+Layout:
+    <root>/<SYMBOL>/<interval>/timestamp.npy, open.npy, ..., quote_volume.npy
+    <root>/<SYMBOL>/<interval>/index/<name>.npz
+
+Usage:
+    store = CandleStore()
+    candles = store.append('XRP', '5m', decode_coinone_chart(response.content))
+    candles = store.load('XRP', '5m', mmap=True)
+"""
+
+import json
+import os
+import uuid
+
+import numpy as np
+
+from candle_decoder import CandleColumns
+
+DEFAULT_ROOT = 'candle_store'
+
+
+class CandleStore:
+    """Per-column .npy candle files plus named side indexes"""
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+
+    def path(self, symbol, interval):
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    # --------------------------------------------------------------------------
+    # Candles
+    # --------------------------------------------------------------------------
+
+    def exists(self, symbol, interval):
+        return os.path.exists(os.path.join(self.path(symbol, interval), 'timestamp.npy'))
+
+    def load(self, symbol, interval, mmap=False):
+        """Stored candles (oldest first), or None if nothing is stored yet"""
+        if not self.exists(symbol, interval):
+            return None
+        directory = self.path(symbol, interval)
+        mode = 'r' if mmap else None
+        return CandleColumns(**{
+            field: np.load(os.path.join(directory, f'{field}.npy'), mmap_mode=mode)
+            for field in CandleColumns.__slots__
+        })
+
+    def save(self, symbol, interval, columns):
+        """Replace the stored candles"""
+        directory = self.path(symbol, interval)
+        os.makedirs(directory, exist_ok=True)
+        for field in CandleColumns.__slots__:
+            # Write-then-rename so a reader never sees a half-written column
+            _write_replace(os.path.join(directory, f'{field}.npy'),
+                           lambda f: np.save(f, np.ascontiguousarray(getattr(columns, field))))
+
+    def append(self, symbol, interval, columns):
+        """
+        Merge newly fetched candles into the store and return the merged set
+
+        Overlapping timestamps take the new values (the last stored candle is
+        usually still forming when it was fetched).
+        """
+        stored = self.load(symbol, interval)
+        if stored is not None and len(stored):
+            merged = merge_candles(stored, columns)
+        else:
+            merged = columns
+        self.save(symbol, interval, merged)
+        return merged
+
+    # --------------------------------------------------------------------------
+    # Side indexes
+    # --------------------------------------------------------------------------
+
+    def save_index(self, symbol, interval, name, arrays, meta=None, compressed=False):
+        """Persist named arrays (+ JSON-able metadata) next to the candles"""
+        directory = os.path.join(self.path(symbol, interval), 'index')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{name}.npz')
+        savez = np.savez_compressed if compressed else np.savez
+        _write_replace(path, lambda f: savez(f, _meta=np.array(json.dumps(meta or {})), **arrays))
+
+    def load_index(self, symbol, interval, name):
+        """(arrays dict, meta dict) or None"""
+        path = os.path.join(self.path(symbol, interval), 'index', f'{name}.npz')
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            arrays = {key: data[key] for key in data.files if key != '_meta'}
+            meta = json.loads(str(data['_meta']))
+        return arrays, meta
+
+
+def merge_candles(old, new):
+    """Union of two oldest-first candle sets by timestamp; `new` wins on overlap"""
+    timestamps = np.concatenate((new.timestamp, old.timestamp))
+    # np.unique keeps the first occurrence, i.e. the new candle
+    _, first = np.unique(timestamps, return_index=True)
+    return CandleColumns(**{
+        field: np.concatenate((getattr(new, field), getattr(old, field)))[first]
+        for field in CandleColumns.__slots__
+    })
+
+
+def _write_replace(path, write):
+    """
+    write(file) into a temp file of its own, then rename it over `path`;
+    workers sharing a store may save the same column / index at once
+    """
+    tmp = f'{path}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp'
+    try:
+        with open(tmp, 'xb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
@@ -6,6 +6,8 @@
 import requests
 from datetime import datetime, timedelta
 
+from candle_decoder import decode_candle_rows
+
 def calculate_rsi(prices, period=14):
     if len(prices) < period + 1:
         return None
@@ -57,8 +59,9 @@ print(f"\n현재 시간: {now.strftime('%Y-%m-%d %H:%M:%S')}")
 print(f"4시간 전: {four_hours_ago.strftime('%Y-%m-%d %H:%M:%S')}")
 
 # Prepare data
-closes = [float(c['close']) for c in candles]
-volumes = [float(c['target_volume']) for c in candles]
+columns = decode_candle_rows(candles, chronological=False)
+closes = columns.close.tolist()
+volumes = columns.volume.tolist()
 
 print(f"\n{'='*100}")
 print(f"{'시간':20} {'가격':>8} {'RSI':>6} {'BB위치':>7} {'거래량':>7} {'강도':>6} {'진입':>4}")
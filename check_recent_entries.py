@@ -6,8 +6,14 @@
 
 import requests
 import json
+import numpy as np
 from datetime import datetime, timedelta
 
+from candle_decoder import decode_candle_rows
+from profiler import stage, enable_from_argv
+from signal_index import SignalIndex
+from trade_log import EntryLog
+
 def fetch_coinone_chart(symbol='XRP', interval='5m'):
     """Fetch recent chart data from Coinone API"""
     url = f'https://api.coinone.co.kr/public/v2/chart/KRW/{symbol}'
@@ -17,8 +23,9 @@ def fetch_coinone_chart(symbol='XRP', interval='5m'):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        with stage('fetch'):
+            response = requests.get(url, params=params, timeout=10)
+            data = response.json()
 
         if data.get('result') == 'success':
             candles = data.get('chart', [])
@@ -103,6 +110,10 @@ def detect_trend(ema50, ema200, price):
 
     return 'sideways'
 
+# Condition names reported by the entry checks (bit order in EntryLog)
+UPTREND_CONDITIONS = ('price_near_ema21', 'short_term_uptrend', 'not_overbought', 'volume_confirmation')
+SIDEWAYS_CONDITIONS = ('near_lower_band', 'deeply_oversold', 'not_extreme', 'volume_spike')
+
 def check_uptrend_entry(rsi, price, ema21, ema9, bb_middle, volume_ratio):
     """Check Uptrend Strategy entry conditions (GRADUAL ENTRY)"""
     # Determine RSI tier
@@ -154,14 +165,15 @@ def check_sideways_entry(rsi, bb_position, volume_ratio):
 
     return strength >= 0.8, strength, conditions
 
-def analyze_recent_4_hours(symbol='XRP'):
-    """Analyze last 4 hours for entry opportunities"""
+def analyze_recent_4_hours(symbol='XRP', candles=None):
+    """Analyze last 4 hours for entry opportunities (`candles`: already fetched rows, newest first)"""
     print(f"\n{'='*70}")
     print(f"최근 4시간 진입 포인트 분석 - {symbol}")
     print(f"{'='*70}\n")
 
     # Fetch data
-    candles = fetch_coinone_chart(symbol, '5m')
+    if candles is None:
+        candles = fetch_coinone_chart(symbol, '5m')
     if len(candles) < 200:
         print(f"✗ Not enough data (need 200+, got {len(candles)})")
         return
@@ -172,7 +184,7 @@ def analyze_recent_4_hours(symbol='XRP'):
     four_hours_ago = now - timedelta(hours=4)
 
     # Reverse candles to oldest first for analysis
-    candles.reverse()
+    candles = candles[::-1]
 
     # Filter candles from last 4 hours
     cutoff_timestamp = int(four_hours_ago.timestamp() * 1000)
@@ -196,125 +208,118 @@ def analyze_recent_4_hours(symbol='XRP'):
     print(f"총 캔들 수: {len(recent_candles_idx)}개 (5분봉)\n")
 
     # Prepare data
-    closes = [float(c['close']) for c in candles]
-    volumes = [float(c['target_volume']) for c in candles]
-
-    uptrend_entries = []
-    sideways_entries = []
-
-    # Analyze recent candles (need at least 200 candles of history for indicators)
-    for i in recent_candles_idx:
-        if i < 200:  # Skip if not enough historical data
-            continue
-        # Calculate indicators
-        rsi = calculate_rsi(closes[:i+1], 14)
-        ema9 = calculate_ema(closes[:i+1], 9)
-        ema21 = calculate_ema(closes[:i+1], 21)
-        ema50 = calculate_ema(closes[:i+1], 50)
-        ema200 = calculate_ema(closes[:i+1], 200)
-        bb_upper, bb_middle, bb_lower = calculate_bollinger_bands(closes[:i+1], 20, 2.0)
-        volume_ma5 = calculate_volume_ma(volumes[:i+1], 5)
-
-        if None in [rsi, ema9, ema21, ema50, ema200, bb_upper, volume_ma5]:
-            continue
-
-        price = closes[i]
-        volume = volumes[i]
-        volume_ratio = volume / volume_ma5 if volume_ma5 > 0 else 1.0
-
-        # Detect trend
-        trend = detect_trend(ema50, ema200, price)
-
-        # Calculate BB position
-        bb_range = bb_upper - bb_lower
-        bb_position = (price - bb_lower) / bb_range if bb_range > 0 else 0.5
-
-        timestamp = datetime.fromtimestamp(candles[i]['timestamp'] / 1000)
-
-        # Check entry conditions
-        if trend == 'uptrend':
-            is_entry, strength, conditions, position_size, sl_percent, tp_percent = check_uptrend_entry(
-                rsi, price, ema21, ema9, bb_middle, volume_ratio
-            )
-
-            if is_entry:
-                uptrend_entries.append({
-                    'time': timestamp,
-                    'price': price,
-                    'rsi': rsi,
-                    'volume_ratio': volume_ratio,
-                    'strength': strength,
-                    'conditions': conditions,
-                    'position_size': position_size,
-                    'sl_percent': sl_percent,
-                    'tp_percent': tp_percent
-                })
-
-        elif trend == 'sideways':
-            is_entry, strength, conditions = check_sideways_entry(
-                rsi, bb_position, volume_ratio
-            )
-
-            if is_entry:
-                sideways_entries.append({
-                    'time': timestamp,
-                    'price': price,
-                    'rsi': rsi,
-                    'bb_position': bb_position,
-                    'volume_ratio': volume_ratio,
-                    'strength': strength,
-                    'conditions': conditions
-                })
-
-    # Print results
-    print(f"{'='*70}")
-    print(f"📈 상승 전략 진입 포인트")
-    print(f"{'='*70}")
-
-    if uptrend_entries:
-        print(f"발견: {len(uptrend_entries)}개\n")
-        for idx, entry in enumerate(uptrend_entries, 1):
-            print(f"[{idx}] {entry['time'].strftime('%m-%d %H:%M')}")
-            print(f"    가격: {entry['price']:.0f}원")
-            print(f"    RSI: {entry['rsi']:.1f}")
-            print(f"    포지션: {entry['position_size']*100:.0f}%")
-            print(f"    SL: {entry['sl_percent']:.1f}% | TP: {entry['tp_percent']:.1f}%")
-            print(f"    거래량: {entry['volume_ratio']:.2f}x")
-            print(f"    조건: {', '.join([k for k, v in entry['conditions'].items() if v])}\n")
-    else:
-        print("✗ 진입 포인트 없음\n")
-
-    print(f"{'='*70}")
-    print(f"📊 횡보 전략 진입 포인트")
-    print(f"{'='*70}")
-
-    if sideways_entries:
-        print(f"발견: {len(sideways_entries)}개\n")
-        for idx, entry in enumerate(sideways_entries, 1):
-            print(f"[{idx}] {entry['time'].strftime('%m-%d %H:%M')}")
-            print(f"    가격: {entry['price']:.0f}원")
-            print(f"    RSI: {entry['rsi']:.1f}")
-            print(f"    BB 위치: {entry['bb_position']*100:.1f}%")
-            print(f"    거래량: {entry['volume_ratio']:.2f}x")
-            print(f"    조건: {', '.join([k for k, v in entry['conditions'].items() if v])}\n")
-    else:
-        print("✗ 진입 포인트 없음\n")
-
-    print(f"{'='*70}")
-    print(f"📊 요약")
-    print(f"{'='*70}")
-    print(f"총 진입 기회: {len(uptrend_entries) + len(sideways_entries)}개")
-    print(f"  - 상승: {len(uptrend_entries)}개")
-    print(f"  - 횡보: {len(sideways_entries)}개")
-
-    if len(uptrend_entries) + len(sideways_entries) > 0:
-        print(f"\n✅ 최근 4시간 동안 진입 기회가 있었습니다!")
-    else:
-        print(f"\n⚠️ 최근 4시간 동안 진입 조건을 충족한 포인트가 없었습니다.")
-        print(f"   - 시장이 횡보/약세이거나")
-        print(f"   - RSI가 진입 구간(상승: ≤40, 횡보: ≤32)에 도달하지 않았을 수 있습니다.")
+    with stage('parse'):
+        columns = decode_candle_rows(candles, chronological=False)
+        closes = columns.close.tolist()
+        volumes = columns.volume.tolist()
+
+    uptrend_entries = EntryLog(UPTREND_CONDITIONS)
+    sideways_entries = EntryLog(SIDEWAYS_CONDITIONS)
+
+    # Entry bars straight from the signal bitmaps (same rules as the check_*
+    # functions); indicators are only computed for the bars that fired
+    with stage('indicators'):
+        signals = SignalIndex.build(columns)
+    window_start = int(columns.timestamp[max(first_recent_idx, 200)])
+    window_end = int(columns.timestamp[last_recent_idx]) + 1
+
+    for name, entries in (('uptrend_entry', uptrend_entries), ('sideways_entry', sideways_entries)):
+        fired = signals.query(name, start_ms=window_start, end_ms=window_end)
+        for i in np.searchsorted(columns.timestamp, fired).tolist():
+            with stage('indicators'):
+                rsi = calculate_rsi(closes[:i+1], 14)
+                ema9 = calculate_ema(closes[:i+1], 9)
+                ema21 = calculate_ema(closes[:i+1], 21)
+                bb_upper, bb_middle, bb_lower = calculate_bollinger_bands(closes[:i+1], 20, 2.0)
+                volume_ma5 = calculate_volume_ma(volumes[:i+1], 5)
+
+            with stage('evaluate'):
+                price = closes[i]
+                volume = volumes[i]
+                volume_ratio = volume / volume_ma5 if volume_ma5 > 0 else 1.0
+                timestamp = datetime.fromtimestamp(candles[i]['timestamp'] / 1000)
+
+                if name == 'uptrend_entry':
+                    _, strength, conditions, position_size, sl_percent, tp_percent = check_uptrend_entry(
+                        rsi, price, ema21, ema9, bb_middle, volume_ratio
+                    )
+                    entries.append(
+                        time=timestamp,
+                        price=price,
+                        rsi=rsi,
+                        volume_ratio=volume_ratio,
+                        strength=strength,
+                        conditions=conditions,
+                        position_size=position_size,
+                        sl_percent=sl_percent,
+                        tp_percent=tp_percent
+                    )
+                else:
+                    # Calculate BB position
+                    bb_range = bb_upper - bb_lower
+                    bb_position = (price - bb_lower) / bb_range if bb_range > 0 else 0.5
+                    _, strength, conditions = check_sideways_entry(rsi, bb_position, volume_ratio)
+                    entries.append(
+                        time=timestamp,
+                        price=price,
+                        rsi=rsi,
+                        bb_position=bb_position,
+                        volume_ratio=volume_ratio,
+                        strength=strength,
+                        conditions=conditions
+                    )
+
+    with stage('report'):
+        # Print results
+        print(f"{'='*70}")
+        print(f"📈 상승 전략 진입 포인트")
+        print(f"{'='*70}")
+
+        if uptrend_entries:
+            print(f"발견: {len(uptrend_entries)}개\n")
+            for idx, entry in enumerate(uptrend_entries, 1):
+                print(f"[{idx}] {entry['time'].strftime('%m-%d %H:%M')}")
+                print(f"    가격: {entry['price']:.0f}원")
+                print(f"    RSI: {entry['rsi']:.1f}")
+                print(f"    포지션: {entry['position_size']*100:.0f}%")
+                print(f"    SL: {entry['sl_percent']:.1f}% | TP: {entry['tp_percent']:.1f}%")
+                print(f"    거래량: {entry['volume_ratio']:.2f}x")
+                print(f"    조건: {', '.join([k for k, v in entry['conditions'].items() if v])}\n")
+        else:
+            print("✗ 진입 포인트 없음\n")
+
+        print(f"{'='*70}")
+        print(f"📊 횡보 전략 진입 포인트")
+        print(f"{'='*70}")
+
+        if sideways_entries:
+            print(f"발견: {len(sideways_entries)}개\n")
+            for idx, entry in enumerate(sideways_entries, 1):
+                print(f"[{idx}] {entry['time'].strftime('%m-%d %H:%M')}")
+                print(f"    가격: {entry['price']:.0f}원")
+                print(f"    RSI: {entry['rsi']:.1f}")
+                print(f"    BB 위치: {entry['bb_position']*100:.1f}%")
+                print(f"    거래량: {entry['volume_ratio']:.2f}x")
+                print(f"    조건: {', '.join([k for k, v in entry['conditions'].items() if v])}\n")
+        else:
+            print("✗ 진입 포인트 없음\n")
 
-    print(f"{'='*70}\n")
+        print(f"{'='*70}")
+        print(f"📊 요약")
+        print(f"{'='*70}")
+        print(f"총 진입 기회: {len(uptrend_entries) + len(sideways_entries)}개")
+        print(f"  - 상승: {len(uptrend_entries)}개")
+        print(f"  - 횡보: {len(sideways_entries)}개")
+
+        if len(uptrend_entries) + len(sideways_entries) > 0:
+            print(f"\n✅ 최근 4시간 동안 진입 기회가 있었습니다!")
+        else:
+            print(f"\n⚠️ 최근 4시간 동안 진입 조건을 충족한 포인트가 없었습니다.")
+            print(f"   - 시장이 횡보/약세이거나")
+            print(f"   - RSI가 진입 구간(상승: ≤40, 횡보: ≤32)에 도달하지 않았을 수 있습니다.")
+
+        print(f"{'='*70}\n")
 
 if __name__ == '__main__':
+    enable_from_argv()
     analyze_recent_4_hours('XRP')
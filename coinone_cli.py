@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+통합 CLI - 모든 분석 / 백테스트 / 주문 스크립트의 단일 진입점
+
+Each subcommand imports its script (and NumPy / pandas / requests) only
+when it runs, so light commands such as `status` and `order` start without
+paying for them. Several subcommands can be chained with `+` in one
+process; chart data is fetched once per symbol / interval and shared.
+
+Usage:
+    python3 coinone_cli.py debug --symbol XRP
+    python3 coinone_cli.py scan --symbol ETH
+    python3 coinone_cli.py timing
+    python3 coinone_cli.py analyze --symbol XRP --interval 5m
+    python3 coinone_cli.py backtest
+    python3 coinone_cli.py status --symbol XRP          # asks a running scanner_daemon
+    python3 coinone_cli.py order active --currency BTC
+    python3 coinone_cli.py order place --currency XRP --side BUY --qty 10 --price 3000.1 --check-ticks
+    python3 coinone_cli.py debug --symbol XRP + scan --symbol XRP + timing --symbol XRP
+
+Add --profile (see profiler.py) to any command line for stage timings.
+"""
+
+import argparse
+import os
+import sys
+
+CHAIN_SEPARATOR = '+'
+
+
+# ==============================================================================
+# Shared data
+# ==============================================================================
+
+class ChartCache:
+    """Coinone chart rows fetched once per (symbol, interval, size) for the whole process"""
+
+    def __init__(self):
+        self._rows = {}
+
+    def get(self, symbol, interval='5m', size=500):
+        """Chart rows, newest first (as the API returns them); a new list each call"""
+        key = (symbol.upper(), interval, size)
+        if key not in self._rows:
+            self._rows[key] = self._fetch(*key)
+        return list(self._rows[key])
+
+    @staticmethod
+    def _fetch(symbol, interval, size):
+        import requests
+
+        url = f'https://api.coinone.co.kr/public/v2/chart/KRW/{symbol}'
+        try:
+            data = requests.get(url, params={'interval': interval, 'size': size}, timeout=10).json()
+        except Exception as e:
+            print(f"✗ Exception: {e}")
+            return []
+        if data.get('result') != 'success':
+            print(f"✗ API Error: {data.get('error_message', 'Unknown error')}")
+            return []
+        candles = data.get('chart', [])
+        print(f"✓ Fetched {len(candles)} candles for {symbol} {interval}")
+        return candles
+
+
+# ==============================================================================
+# Analysis subcommands
+# ==============================================================================
+
+def cmd_debug(args, cache):
+    from debug_bot_logic import analyze_current_state
+
+    analyze_current_state(args.symbol, candles=cache.get(args.symbol, '5m'))
+
+
+def cmd_scan(args, cache):
+    from check_recent_entries import analyze_recent_4_hours
+
+    analyze_recent_4_hours(args.symbol, candles=cache.get(args.symbol, '5m'))
+
+
+def cmd_timing(args, cache):
+    from analyze_bot_timing import analyze_bot_timing
+
+    return analyze_bot_timing(args.symbol, candles=cache.get(args.symbol, '5m'),
+                              candles_1m=cache.get(args.symbol, '1m'))
+
+
+def cmd_analyze(args, cache):
+    import json
+    from analysis_comprehensive import analyze_symbol
+
+    rows = cache.get(args.symbol, args.interval, args.size)
+    if not rows:
+        return
+    # ComprehensiveAnalyzer keeps row order; it expects oldest first
+    result = analyze_symbol(args.symbol, args.interval, rows[::-1])
+    print(json.dumps(result, indent=2, ensure_ascii=False, default=str))
+
+
+def cmd_backtest(args, cache):
+    if args.portfolio:
+        import portfolio_backtest
+        sys.argv = ['portfolio_backtest.py'] + args.rest
+        portfolio_backtest.main()
+    else:
+        import coinone_xrp_backtest
+        coinone_xrp_backtest.main(args.rest)
+
+
+# ==============================================================================
+# Lightweight subcommands (no NumPy / requests)
+# ==============================================================================
+
+def cmd_status(args, cache):
+    """Current state from a running scanner_daemon"""
+    import http.client
+    import json
+    import socket
+
+    class UnixHTTPConnection(http.client.HTTPConnection):
+        def __init__(self, path):
+            super().__init__('localhost', timeout=2)
+            self.socket_path = path
+
+        def connect(self):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(self.timeout)
+            self.sock.connect(self.socket_path)
+
+    if args.socket:
+        connection = UnixHTTPConnection(args.socket)
+    else:
+        connection = http.client.HTTPConnection(args.host, args.port, timeout=2)
+    try:
+        connection.request('GET', f'/state/{args.symbol}')
+        state = json.loads(connection.getresponse().read())
+    except OSError as e:
+        print(f"✗ scanner_daemon not reachable ({e}); start it with: python3 scanner_daemon.py --symbols {args.symbol}")
+        return 1
+    finally:
+        connection.close()
+
+    if 'error' in state:
+        print(f"✗ {state['error']}")
+        return 1
+    entry = '✅ 진입' if state.get('is_entry') else '대기'
+    print(f"{state['symbol']} {state['time']}  {state['price']:,.0f}원  {state['trend']}  "
+          f"RSI {state['rsi']:.1f}  BB {state['bb_position']*100:.0f}%  "
+          f"거래량 {state['volume_ratio']:.2f}x  강도 {state.get('strength', 0):.2f}  {entry}")
+
+
+def cmd_order(args, cache):
+    """Signed private API call, same signing as the 주문 scripts"""
+    import base64
+    import hashlib
+    import hmac
+    import json
+    import uuid
+
+    if args.order_command == 'active':
+        action = '/v2.1/order/active_orders'
+        payload = {'quote_currency': 'KRW', 'target_currency': args.currency}
+    elif args.order_command == 'place':
+        action = '/v2.1/order'
+        price, qty = args.price, args.qty
+        if args.check_ticks:
+            # Exact decimal check against the market's tick / quantity unit, no float round trip
+            from price_ticks import fetch_tick_spec
+            try:
+                spec = fetch_tick_spec(args.currency)
+                price = spec.format_price(spec.parse_price(price))
+                qty = spec.format_qty(spec.parse_qty(qty))
+            except Exception as e:
+                print(f"✗ {e}")
+                return 1
+        payload = {
+            'quote_currency': 'KRW',
+            'target_currency': args.currency,
+            'type': 'LIMIT',
+            'side': args.side,
+            'qty': qty,
+            'price': price,
+            'post_only': args.post_only,
+        }
+    else:
+        action = '/v2.1/order/cancel'
+        payload = {'user_order_id': args.order_id, 'quote_currency': 'KRW', 'target_currency': args.currency}
+
+    if args.dry_run:
+        print(f"POST {action} {json.dumps(payload)}")
+        return
+
+    access_token = os.environ.get('COINONE_ACCESS_TOKEN')
+    secret_key = os.environ.get('COINONE_SECRET_KEY')
+    if not access_token or not secret_key:
+        print("✗ Set COINONE_ACCESS_TOKEN and COINONE_SECRET_KEY")
+        return 1
+
+    import urllib.error
+    import urllib.request
+
+    payload = dict(payload, access_token=access_token, nonce=str(uuid.uuid4()))
+    encoded_payload = base64.b64encode(json.dumps(payload).encode())
+    request = urllib.request.Request(f'https://api.coinone.co.kr{action}', data=b'', method='POST', headers={
+        'Content-type': 'application/json',
+        'X-COINONE-PAYLOAD': encoded_payload,
+        'X-COINONE-SIGNATURE': hmac.new(secret_key.encode(), encoded_payload, hashlib.sha512).hexdigest(),
+    })
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            print(response.read().decode())
+    except urllib.error.HTTPError as e:
+        # Rejected orders come back as an HTTP error with the API's JSON error body
+        print(f"✗ HTTP {e.code}: {e.read().decode(errors='replace')}")
+        return 1
+    except urllib.error.URLError as e:
+        print(f"✗ {e.reason}")
+        return 1
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='coinone_cli.py',
+        description=f'Coinone bot tools; chain commands with "{CHAIN_SEPARATOR}"')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for name, handler, help in (
+        ('debug', cmd_debug, 'Current market state as the bot sees it (debug_bot_logic)'),
+        ('scan', cmd_scan, 'Entry opportunities in the last 4 hours (check_recent_entries)'),
+        ('timing', cmd_timing, 'How long entry signals stay valid (analyze_bot_timing)'),
+    ):
+        sub = commands.add_parser(name, help=help)
+        sub.add_argument('--symbol', default='XRP')
+        sub.set_defaults(handler=handler)
+
+    sub = commands.add_parser('analyze', help='Comprehensive chart analysis (analysis_comprehensive)')
+    sub.add_argument('--symbol', default='XRP')
+    sub.add_argument('--interval', default='5m')
+    sub.add_argument('--size', type=int, default=500)
+    sub.set_defaults(handler=cmd_analyze)
+
+    sub = commands.add_parser('backtest', help='XRP strategy backtest (coinone_xrp_backtest)')
+    sub.add_argument('--portfolio', action='store_true', help='Multi-symbol portfolio_backtest instead')
+    sub.add_argument('rest', nargs=argparse.REMAINDER,
+                     help='Arguments for portfolio_backtest / coinone_xrp_backtest (e.g. --orderbook)')
+    sub.set_defaults(handler=cmd_backtest)
+
+    sub = commands.add_parser('status', help='One-line state from a running scanner_daemon')
+    sub.add_argument('--symbol', default='XRP')
+    sub.add_argument('--host', default='127.0.0.1')
+    sub.add_argument('--port', type=int, default=8765)
+    sub.add_argument('--socket', help='Daemon Unix socket path')
+    sub.set_defaults(handler=cmd_status)
+
+    sub = commands.add_parser('order', help='Private order API (credentials from env)')
+    orders = sub.add_subparsers(dest='order_command', required=True)
+    active = orders.add_parser('active', help='List open orders')
+    place = orders.add_parser('place', help='Place a limit order')
+    place.add_argument('--side', choices=('BUY', 'SELL'), required=True)
+    place.add_argument('--qty', required=True)
+    place.add_argument('--price', required=True)
+    place.add_argument('--post-only', action='store_true')
+    place.add_argument('--check-ticks', action='store_true',
+                       help="Reject a price / qty off the market's tick and quantity units (price_ticks)")
+    cancel = orders.add_parser('cancel', help='Cancel an order')
+    cancel.add_argument('--order-id', required=True)
+    for order_parser in (active, place, cancel):
+        order_parser.add_argument('--currency', default='BTC')
+        order_parser.add_argument('--dry-run', action='store_true', help='Print the request, do not send')
+    sub.set_defaults(handler=cmd_order)
+
+    return parser
+
+
+def split_chain(argv):
+    """['debug', '+', 'scan', '--symbol', 'ETH'] -> [['debug'], ['scan', '--symbol', 'ETH']]"""
+    chain = [[]]
+    for arg in argv:
+        if arg == CHAIN_SEPARATOR:
+            chain.append([])
+        else:
+            chain[-1].append(arg)
+    return [segment for segment in chain if segment]
+
+
+def parse_segment(parser, segment):
+    if segment[0] == 'backtest':
+        # argparse's REMAINDER doesn't take options right after the subcommand,
+        # so everything but the CLI's own flags is forwarded to the script here
+        own = [arg for arg in segment[1:] if arg in ('--portfolio', '-h', '--help')]
+        args = parser.parse_args(['backtest'] + own)
+        args.rest = [arg for arg in segment[1:] if arg not in own]
+        return args
+    return parser.parse_args(segment)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if any(arg.startswith('--profile') for arg in argv) or os.environ.get('BOT_PROFILE'):
+        from profiler import enable_from_argv
+        argv = [sys.argv[0]] + list(argv)
+        enable_from_argv(argv)
+        argv = argv[1:]
+
+    parser = build_parser()
+    # Parse every segment up front so a typo fails before any work starts
+    commands = [parse_segment(parser, segment) for segment in split_chain(argv)] or [parser.parse_args([])]
+    cache = ChartCache()
+    status = 0
+    for args in commands:
+        status = args.handler(args, cache) or status
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,6 +12,11 @@ import json
 from datetime import datetime, timedelta
 import statistics
 
+from candle_decoder import decode_candle_rows
+from profiler import stage, enable_from_argv
+from regime_index import RegimeIndex, REGIMES
+from trade_log import EntryLog
+
 def fetch_coinone_chart(symbol='XRP', interval='5m', hours=24):
     """Fetch chart data from Coinone API"""
     url = f'https://api.coinone.co.kr/public/v2/chart/KRW/{symbol}'
@@ -21,8 +26,9 @@ def fetch_coinone_chart(symbol='XRP', interval='5m', hours=24):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        with stage('fetch'):
+            response = requests.get(url, params=params, timeout=10)
+            data = response.json()
 
         if data.get('result') == 'success':
             candles = data.get('chart', [])
@@ -112,6 +118,10 @@ def detect_trend(ema50, ema200, price):
 
     return 'sideways'
 
+# Condition names reported by the entry checks (bit order in EntryLog)
+UPTREND_CONDITIONS = ('price_near_ema21', 'short_term_uptrend', 'not_overbought', 'volume_confirmation')
+SIDEWAYS_CONDITIONS = ('near_lower_band', 'deeply_oversold', 'not_extreme', 'volume_spike')
+
 def check_uptrend_entry(rsi, price, ema21, ema9, bb_middle, volume_ratio):
     """Check Uptrend Strategy entry conditions (GRADUAL ENTRY)"""
     # Determine RSI tier
@@ -178,124 +188,137 @@ def backtest_strategy(symbol='XRP', hours=24):
         return
 
     # Prepare data (convert strings to floats)
-    closes = [float(c['close']) for c in candles]
-    volumes = [float(c['target_volume']) for c in candles]
+    with stage('parse'):
+        # API returns newest first; the decoder hands back oldest-first columns
+        columns = decode_candle_rows(candles)
+        closes = columns.close.tolist()
+        volumes = columns.volume.tolist()
+        timestamps = columns.timestamp.tolist()
 
-    uptrend_entries = []
-    sideways_entries = []
+    uptrend_entries = EntryLog(UPTREND_CONDITIONS)
+    sideways_entries = EntryLog(SIDEWAYS_CONDITIONS)
 
     print(f"\n📊 Analyzing {len(candles)} candles...\n")
 
+    # Regime segments for the whole series at once; downtrend spans are
+    # skipped outright instead of computing every indicator for them
+    with stage('indicators'):
+        regimes = RegimeIndex.from_candles(columns)
+        trends = regimes.labels()
+
     # Analyze each candle
-    for i in range(200, len(candles)):
+    for i in regimes.eligible(('uptrend', 'sideways'), start=200).tolist():
         # Calculate indicators
-        rsi = calculate_rsi(closes[:i+1], 14)
-        ema9 = calculate_ema(closes[:i+1], 9)
-        ema21 = calculate_ema(closes[:i+1], 21)
-        ema50 = calculate_ema(closes[:i+1], 50)
-        ema200 = calculate_ema(closes[:i+1], 200)
-        bb_upper, bb_middle, bb_lower = calculate_bollinger_bands(closes[:i+1], 20, 2.0)
-        volume_ma5 = calculate_volume_ma(volumes[:i+1], 5)
-
-        if None in [rsi, ema9, ema21, ema50, ema200, bb_upper, volume_ma5]:
+        with stage('indicators'):
+            rsi = calculate_rsi(closes[:i+1], 14)
+            ema9 = calculate_ema(closes[:i+1], 9)
+            ema21 = calculate_ema(closes[:i+1], 21)
+            bb_upper, bb_middle, bb_lower = calculate_bollinger_bands(closes[:i+1], 20, 2.0)
+            volume_ma5 = calculate_volume_ma(volumes[:i+1], 5)
+
+        if None in [rsi, ema9, ema21, bb_upper, volume_ma5]:
             continue
 
-        price = closes[i]
-        volume = volumes[i]
-        volume_ratio = volume / volume_ma5 if volume_ma5 > 0 else 1.0
-
-        # Detect trend
-        trend = detect_trend(ema50, ema200, price)
-
-        # Calculate BB position
-        bb_range = bb_upper - bb_lower
-        bb_position = (price - bb_lower) / bb_range if bb_range > 0 else 0.5
-
-        timestamp = datetime.fromtimestamp(candles[i]['timestamp'] / 1000)
-
-        # Check entry conditions
-        if trend == 'uptrend':
-            is_entry, strength, conditions, position_size, sl_percent, tp_percent = check_uptrend_entry(
-                rsi, price, ema21, ema9, bb_middle, volume_ratio
-            )
-
-            if is_entry:
-                uptrend_entries.append({
-                    'time': timestamp,
-                    'price': price,
-                    'rsi': rsi,
-                    'volume_ratio': volume_ratio,
-                    'strength': strength,
-                    'conditions': conditions,
-                    'position_size': position_size,
-                    'sl_percent': sl_percent,
-                    'tp_percent': tp_percent
-                })
-
-        elif trend == 'sideways':
-            is_entry, strength, conditions = check_sideways_entry(
-                rsi, bb_position, volume_ratio
-            )
-
-            if is_entry:
-                sideways_entries.append({
-                    'time': timestamp,
-                    'price': price,
-                    'rsi': rsi,
-                    'bb_position': bb_position,
-                    'volume_ratio': volume_ratio,
-                    'strength': strength,
-                    'conditions': conditions
-                })
-
-    # Print results
-    print(f"\n{'='*70}")
-    print(f"📈 UPTREND STRATEGY - GRADUAL ENTRY (RSI ≤ 40)")
-    print(f"{'='*70}")
-    print(f"Total Entry Opportunities: {len(uptrend_entries)}")
-
-    if uptrend_entries:
-        print(f"\nEntry Details:")
-        for idx, entry in enumerate(uptrend_entries, 1):
-            print(f"\n  [{idx}] {entry['time'].strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"      Price: {entry['price']:.2f} KRW")
-            print(f"      RSI: {entry['rsi']:.1f}")
-            print(f"      Position Size: {entry['position_size']*100:.0f}%")
-            print(f"      SL: {entry['sl_percent']:.1f}% | TP: {entry['tp_percent']:.1f}%")
-            print(f"      Volume: {entry['volume_ratio']:.2f}x")
-            print(f"      Strength: {entry['strength']:.1%}")
-            print(f"      Conditions: {', '.join([k for k, v in entry['conditions'].items() if v])}")
-    else:
-        print("  ✗ No entry opportunities found")
-
-    print(f"\n{'='*70}")
-    print(f"📊 SIDEWAYS STRATEGY - IMPROVED (RSI ≤ 32, SL: 2.5%, TP: 1.2%)")
-    print(f"{'='*70}")
-    print(f"Total Entry Opportunities: {len(sideways_entries)}")
-
-    if sideways_entries:
-        print(f"\nEntry Details:")
-        for idx, entry in enumerate(sideways_entries, 1):
-            print(f"\n  [{idx}] {entry['time'].strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"      Price: {entry['price']:.2f} KRW")
-            print(f"      RSI: {entry['rsi']:.1f}")
-            print(f"      BB Position: {entry['bb_position']*100:.1f}%")
-            print(f"      Volume: {entry['volume_ratio']:.2f}x")
-            print(f"      Strength: {entry['strength']:.1%}")
-            print(f"      Conditions: {', '.join([k for k, v in entry['conditions'].items() if v])}")
-    else:
-        print("  ✗ No entry opportunities found")
+        with stage('evaluate'):
+            price = closes[i]
+            volume = volumes[i]
+            volume_ratio = volume / volume_ma5 if volume_ma5 > 0 else 1.0
+
+            # Trend from the regime index (same rule as detect_trend)
+            trend = REGIMES[trends[i]]
+
+            # Calculate BB position
+            bb_range = bb_upper - bb_lower
+            bb_position = (price - bb_lower) / bb_range if bb_range > 0 else 0.5
+
+            timestamp = datetime.fromtimestamp(timestamps[i] / 1000)
+
+            # Check entry conditions
+            if trend == 'uptrend':
+                is_entry, strength, conditions, position_size, sl_percent, tp_percent = check_uptrend_entry(
+                    rsi, price, ema21, ema9, bb_middle, volume_ratio
+                )
+
+                if is_entry:
+                    uptrend_entries.append(
+                        time=timestamp,
+                        price=price,
+                        rsi=rsi,
+                        volume_ratio=volume_ratio,
+                        strength=strength,
+                        conditions=conditions,
+                        position_size=position_size,
+                        sl_percent=sl_percent,
+                        tp_percent=tp_percent
+                    )
+
+            elif trend == 'sideways':
+                is_entry, strength, conditions = check_sideways_entry(
+                    rsi, bb_position, volume_ratio
+                )
+
+                if is_entry:
+                    sideways_entries.append(
+                        time=timestamp,
+                        price=price,
+                        rsi=rsi,
+                        bb_position=bb_position,
+                        volume_ratio=volume_ratio,
+                        strength=strength,
+                        conditions=conditions
+                    )
+
+    with stage('report'):
+        # Print results
+        print(f"\n{'='*70}")
+        print(f"📈 UPTREND STRATEGY - GRADUAL ENTRY (RSI ≤ 40)")
+        print(f"{'='*70}")
+        print(f"Total Entry Opportunities: {len(uptrend_entries)}")
+
+        if uptrend_entries:
+            print(f"\nEntry Details:")
+            for idx, entry in enumerate(uptrend_entries, 1):
+                print(f"\n  [{idx}] {entry['time'].strftime('%Y-%m-%d %H:%M:%S')}")
+                print(f"      Price: {entry['price']:.2f} KRW")
+                print(f"      RSI: {entry['rsi']:.1f}")
+                print(f"      Position Size: {entry['position_size']*100:.0f}%")
+                print(f"      SL: {entry['sl_percent']:.1f}% | TP: {entry['tp_percent']:.1f}%")
+                print(f"      Volume: {entry['volume_ratio']:.2f}x")
+                print(f"      Strength: {entry['strength']:.1%}")
+                print(f"      Conditions: {', '.join([k for k, v in entry['conditions'].items() if v])}")
+        else:
+            print("  ✗ No entry opportunities found")
+
+        print(f"\n{'='*70}")
+        print(f"📊 SIDEWAYS STRATEGY - IMPROVED (RSI ≤ 32, SL: 2.5%, TP: 1.2%)")
+        print(f"{'='*70}")
+        print(f"Total Entry Opportunities: {len(sideways_entries)}")
+
+        if sideways_entries:
+            print(f"\nEntry Details:")
+            for idx, entry in enumerate(sideways_entries, 1):
+                print(f"\n  [{idx}] {entry['time'].strftime('%Y-%m-%d %H:%M:%S')}")
+                print(f"      Price: {entry['price']:.2f} KRW")
+                print(f"      RSI: {entry['rsi']:.1f}")
+                print(f"      BB Position: {entry['bb_position']*100:.1f}%")
+                print(f"      Volume: {entry['volume_ratio']:.2f}x")
+                print(f"      Strength: {entry['strength']:.1%}")
+                print(f"      Conditions: {', '.join([k for k, v in entry['conditions'].items() if v])}")
+        else:
+            print("  ✗ No entry opportunities found")
 
-    print(f"\n{'='*70}")
-    print(f"📊 SUMMARY")
-    print(f"{'='*70}")
-    print(f"Total Opportunities: {len(uptrend_entries) + len(sideways_entries)}")
-    print(f"  - Uptrend: {len(uptrend_entries)}")
-    print(f"  - Sideways: {len(sideways_entries)}")
-    print(f"Frequency: {(len(uptrend_entries) + len(sideways_entries)) / hours:.2f} entries per hour")
-    print(f"{'='*70}\n")
+        print(f"\n{'='*70}")
+        print(f"📊 SUMMARY")
+        print(f"{'='*70}")
+        print(f"Total Opportunities: {len(uptrend_entries) + len(sideways_entries)}")
+        print(f"  - Uptrend: {len(uptrend_entries)}")
+        print(f"  - Sideways: {len(sideways_entries)}")
+        print(f"Frequency: {(len(uptrend_entries) + len(sideways_entries)) / hours:.2f} entries per hour")
+        print(f"{'='*70}\n")
 
 if __name__ == '__main__':
+    enable_from_argv()
+
     # Test with XRP (default coin)
     backtest_strategy('XRP', hours=24)
 
@@ -8,13 +8,24 @@ Fetches 5-minute candle data from Coinone API and tests multiple scalping strate
 3. EMA Crossover
 4. Support/Resistance Breakout
 5. Combined Multi-Strategy
+
+Usage:
+    python3 coinone_xrp_backtest.py
+    python3 coinone_xrp_backtest.py --orderbook orderbooks/coinone_XRP_*.obk   # book-based fills
 """
 
+import argparse
 import requests
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import json
+
+from candle_decoder import decode_coinone_chart
+from profiler import stage, enable_from_argv
+from backtest_metrics import to_ms, trade_metrics, sell_metrics
+from result_cache import ResultCache, data_fingerprint
+from result_writer import ResultWriter
+from trade_log import TradeLog, SELL
 
 # ==============================================================================
 # Data Fetching
@@ -48,37 +59,17 @@ def fetch_coinone_chart(quote_currency='KRW', target_currency='XRP', interval='5
     print(f"Fetching {target_currency}/{quote_currency} {interval} chart data...")
     print(f"Period: {days} days ({datetime.fromtimestamp(start_time)} to {datetime.fromtimestamp(end_time)})")
 
-    response = requests.get(url, params=params)
+    with stage('fetch'):
+        response = requests.get(url, params=params)
 
     if response.status_code != 200:
         raise Exception(f"API Error: {response.status_code} - {response.text}")
 
-    data = response.json()
-
-    if 'chart' not in data:
-        raise Exception(f"No chart data in response: {data}")
-
-    # Convert to DataFrame
-    df = pd.DataFrame(data['chart'])
-
-    # Convert timestamp to datetime (milliseconds)
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-
-    # Rename columns for clarity
-    df = df.rename(columns={
-        'open': 'Open',
-        'high': 'High',
-        'low': 'Low',
-        'close': 'Close',
-        'target_volume': 'Volume',
-        'quote_volume': 'Quote_Volume'
-    })
-
-    # Convert to numeric
-    for col in ['Open', 'High', 'Low', 'Close', 'Volume', 'Quote_Volume']:
-        df[col] = pd.to_numeric(df[col])
-
-    df = df.sort_values('timestamp').reset_index(drop=True)
+    with stage('parse'):
+        # Decode the raw payload straight into columns (oldest first);
+        # raises ValueError when the response has no chart data
+        candles = decode_coinone_chart(response.content)
+        df = candles.to_dataframe()
 
     print(f"✓ Fetched {len(df)} candles")
     print(f"  Date range: {df['timestamp'].min()} to {df['timestamp'].max()}")
@@ -150,7 +141,7 @@ def strategy_bollinger_bands(df, initial_capital=100000, position_size=0.95):
     capital = initial_capital
     position = 0
     entry_price = 0
-    trades = []
+    trades = TradeLog()
 
     for i in range(len(df)):
         if pd.isna(df.loc[i, 'BB_Lower']):
@@ -166,42 +157,42 @@ def strategy_bollinger_bands(df, initial_capital=100000, position_size=0.95):
             quantity = (capital * position_size) / close
             position = quantity
             entry_price = close
-            trades.append({
-                'timestamp': df.loc[i, 'timestamp'],
-                'type': 'BUY',
-                'price': close,
-                'quantity': quantity,
-                'capital': capital
-            })
+            trades.append(
+                timestamp=df.loc[i, 'timestamp'],
+                type='BUY',
+                price=close,
+                quantity=quantity,
+                capital=capital
+            )
 
         # Exit: Sell when price >= middle band
         elif position > 0 and close >= bb_middle * 0.999:  # 0.1% tolerance
-            capital = position * close
             profit = (close - entry_price) * position
-            trades.append({
-                'timestamp': df.loc[i, 'timestamp'],
-                'type': 'SELL',
-                'price': close,
-                'quantity': position,
-                'profit': profit,
-                'capital': capital
-            })
+            capital += profit
+            trades.append(
+                timestamp=df.loc[i, 'timestamp'],
+                type='SELL',
+                price=close,
+                quantity=position,
+                profit=profit,
+                capital=capital
+            )
             position = 0
             entry_price = 0
 
     # Close any open position at the end
     if position > 0:
         close = df.loc[len(df)-1, 'Close']
-        capital = position * close
         profit = (close - entry_price) * position
-        trades.append({
-            'timestamp': df.loc[len(df)-1, 'timestamp'],
-            'type': 'SELL',
-            'price': close,
-            'quantity': position,
-            'profit': profit,
-            'capital': capital
-        })
+        capital += profit
+        trades.append(
+            timestamp=df.loc[len(df)-1, 'timestamp'],
+            type='SELL',
+            price=close,
+            quantity=position,
+            profit=profit,
+            capital=capital
+        )
 
     return trades, capital
 
@@ -217,7 +208,7 @@ def strategy_rsi(df, initial_capital=100000, position_size=0.95, rsi_low=30, rsi
     capital = initial_capital
     position = 0
     entry_price = 0
-    trades = []
+    trades = TradeLog()
 
     for i in range(len(df)):
         if pd.isna(df.loc[i, 'RSI']):
@@ -231,44 +222,44 @@ def strategy_rsi(df, initial_capital=100000, position_size=0.95, rsi_low=30, rsi
             quantity = (capital * position_size) / close
             position = quantity
             entry_price = close
-            trades.append({
-                'timestamp': df.loc[i, 'timestamp'],
-                'type': 'BUY',
-                'price': close,
-                'quantity': quantity,
-                'capital': capital,
-                'rsi': rsi
-            })
+            trades.append(
+                timestamp=df.loc[i, 'timestamp'],
+                type='BUY',
+                price=close,
+                quantity=quantity,
+                capital=capital,
+                rsi=rsi
+            )
 
         # Exit: Sell when RSI > 70
         elif position > 0 and rsi > rsi_high:
-            capital = position * close
             profit = (close - entry_price) * position
-            trades.append({
-                'timestamp': df.loc[i, 'timestamp'],
-                'type': 'SELL',
-                'price': close,
-                'quantity': position,
-                'profit': profit,
-                'capital': capital,
-                'rsi': rsi
-            })
+            capital += profit
+            trades.append(
+                timestamp=df.loc[i, 'timestamp'],
+                type='SELL',
+                price=close,
+                quantity=position,
+                profit=profit,
+                capital=capital,
+                rsi=rsi
+            )
             position = 0
             entry_price = 0
 
     # Close any open position
     if position > 0:
         close = df.loc[len(df)-1, 'Close']
-        capital = position * close
         profit = (close - entry_price) * position
-        trades.append({
-            'timestamp': df.loc[len(df)-1, 'timestamp'],
-            'type': 'SELL',
-            'price': close,
-            'quantity': position,
-            'profit': profit,
-            'capital': capital
-        })
+        capital += profit
+        trades.append(
+            timestamp=df.loc[len(df)-1, 'timestamp'],
+            type='SELL',
+            price=close,
+            quantity=position,
+            profit=profit,
+            capital=capital
+        )
 
     return trades, capital
 
@@ -284,7 +275,7 @@ def strategy_ema_crossover(df, initial_capital=100000, position_size=0.95):
     capital = initial_capital
     position = 0
     entry_price = 0
-    trades = []
+    trades = TradeLog()
 
     for i in range(1, len(df)):
         if pd.isna(df.loc[i, 'EMA_9']) or pd.isna(df.loc[i, 'EMA_21']):
@@ -301,42 +292,42 @@ def strategy_ema_crossover(df, initial_capital=100000, position_size=0.95):
             quantity = (capital * position_size) / close
             position = quantity
             entry_price = close
-            trades.append({
-                'timestamp': df.loc[i, 'timestamp'],
-                'type': 'BUY',
-                'price': close,
-                'quantity': quantity,
-                'capital': capital
-            })
+            trades.append(
+                timestamp=df.loc[i, 'timestamp'],
+                type='BUY',
+                price=close,
+                quantity=quantity,
+                capital=capital
+            )
 
         # Exit: EMA9 crosses below EMA21 (bearish)
         elif position > 0 and ema9_prev >= ema21_prev and ema9 < ema21:
-            capital = position * close
             profit = (close - entry_price) * position
-            trades.append({
-                'timestamp': df.loc[i, 'timestamp'],
-                'type': 'SELL',
-                'price': close,
-                'quantity': position,
-                'profit': profit,
-                'capital': capital
-            })
+            capital += profit
+            trades.append(
+                timestamp=df.loc[i, 'timestamp'],
+                type='SELL',
+                price=close,
+                quantity=position,
+                profit=profit,
+                capital=capital
+            )
             position = 0
             entry_price = 0
 
     # Close any open position
     if position > 0:
         close = df.loc[len(df)-1, 'Close']
-        capital = position * close
         profit = (close - entry_price) * position
-        trades.append({
-            'timestamp': df.loc[len(df)-1, 'timestamp'],
-            'type': 'SELL',
-            'price': close,
-            'quantity': position,
-            'profit': profit,
-            'capital': capital
-        })
+        capital += profit
+        trades.append(
+            timestamp=df.loc[len(df)-1, 'timestamp'],
+            type='SELL',
+            price=close,
+            quantity=position,
+            profit=profit,
+            capital=capital
+        )
 
     return trades, capital
 
@@ -345,18 +336,31 @@ def strategy_ema_crossover(df, initial_capital=100000, position_size=0.95):
 # Strategy 4: Combined Multi-Strategy
 # ==============================================================================
 
-def strategy_combined(df, initial_capital=100000, position_size=0.95, fee_rate=0.0002):
+def strategy_combined(df, initial_capital=100000, position_size=0.95, fee_rate=0.0002, fill_model=None):
     """
     Combined strategy using multiple signals with UPTREND FILTER for spot trading:
     - TREND FILTER: Only trade when EMA50 > EMA200 (uptrend)
     - Entry: (RSI < 35 OR price < BB_Lower) AND EMA9 trending up
     - Exit: (RSI > 65 OR price > BB_Upper) OR stop loss hit
     - Fees: 0.02% per trade (Coinone spot fee)
+    - Fills: at the close, or via `fill_model` (orderbook_store.BookFillModel)
+      for spread / depth slippage from recorded order books (main: --orderbook)
     """
+    if fill_model is not None:
+        # Candle timestamps are open times; the fill is at the close, one bar later
+        open_ms = to_ms(df['timestamp'].to_numpy())
+        bar_ms = int(np.median(np.diff(open_ms))) if len(open_ms) > 1 else 0
+
+    def fill(side, i, quantity, close):
+        if fill_model is None:
+            return close
+        return fill_model.fill(side, int(open_ms[i]) + bar_ms, quantity, close)
+
     capital = initial_capital
     position = 0
     entry_price = 0
-    trades = []
+    invested = 0      # capital committed to the open position, buy fee included
+    trades = TradeLog()
     stop_loss_pct = 0.02  # 2% stop loss
 
     for i in range(1, len(df)):
@@ -389,20 +393,23 @@ def strategy_combined(df, initial_capital=100000, position_size=0.95, fee_rate=0
             # Apply fee on buy
             effective_capital = capital * (1 - fee_rate)
             quantity = (effective_capital * position_size) / close
+            buy_price = fill('BUY', i, quantity, close)
+            quantity = (effective_capital * position_size) / buy_price
             position = quantity
-            entry_price = close
-            trades.append({
-                'timestamp': df.loc[i, 'timestamp'],
-                'type': 'BUY',
-                'price': close,
-                'quantity': quantity,
-                'capital': capital,
-                'rsi': rsi,
-                'ema50': ema50,
-                'ema200': ema200,
-                'signal': 'RSI' if rsi_signal else 'BB',
-                'trend': 'UPTREND'
-            })
+            entry_price = buy_price
+            invested = capital * position_size
+            trades.append(
+                timestamp=df.loc[i, 'timestamp'],
+                type='BUY',
+                price=buy_price,
+                quantity=quantity,
+                capital=capital,
+                rsi=rsi,
+                ema50=ema50,
+                ema200=ema200,
+                signal='RSI' if rsi_signal else 'BB',
+                trend='UPTREND'
+            )
 
         # Exit signals
         if position > 0:
@@ -414,37 +421,38 @@ def strategy_combined(df, initial_capital=100000, position_size=0.95, fee_rate=0
 
             if rsi_exit or bb_exit or stop_loss_hit or trend_reversal:
                 # Apply fee on sell
-                gross_proceeds = position * close
-                capital = gross_proceeds * (1 - fee_rate)
-                profit = capital - (entry_price * position * (1 - fee_rate))  # Net profit after fees
-                trades.append({
-                    'timestamp': df.loc[i, 'timestamp'],
-                    'type': 'SELL',
-                    'price': close,
-                    'quantity': position,
-                    'profit': profit,
-                    'capital': capital,
-                    'rsi': rsi,
-                    'exit_reason': 'TREND_REVERSAL' if trend_reversal else ('STOP_LOSS' if stop_loss_hit else ('RSI' if rsi_exit else 'BB'))
-                })
+                sell_price = fill('SELL', i, position, close)
+                gross_proceeds = position * sell_price
+                profit = gross_proceeds * (1 - fee_rate) - invested  # Net profit after both fees
+                capital += profit
+                trades.append(
+                    timestamp=df.loc[i, 'timestamp'],
+                    type='SELL',
+                    price=sell_price,
+                    quantity=position,
+                    profit=profit,
+                    capital=capital,
+                    rsi=rsi,
+                    exit_reason='TREND_REVERSAL' if trend_reversal else ('STOP_LOSS' if stop_loss_hit else ('RSI' if rsi_exit else 'BB'))
+                )
                 position = 0
                 entry_price = 0
 
     # Close any open position
     if position > 0:
-        close = df.loc[len(df)-1, 'Close']
+        close = fill('SELL', len(df)-1, position, df.loc[len(df)-1, 'Close'])
         gross_proceeds = position * close
-        capital = gross_proceeds * (1 - fee_rate)
-        profit = capital - (entry_price * position * (1 - fee_rate))
-        trades.append({
-            'timestamp': df.loc[len(df)-1, 'timestamp'],
-            'type': 'SELL',
-            'price': close,
-            'quantity': position,
-            'profit': profit,
-            'capital': capital,
-            'exit_reason': 'END'
-        })
+        profit = gross_proceeds * (1 - fee_rate) - invested
+        capital += profit
+        trades.append(
+            timestamp=df.loc[len(df)-1, 'timestamp'],
+            type='SELL',
+            price=close,
+            quantity=position,
+            profit=profit,
+            capital=capital,
+            exit_reason='END'
+        )
 
     return trades, capital
 
@@ -453,61 +461,63 @@ def strategy_combined(df, initial_capital=100000, position_size=0.95, fee_rate=0
 # Backtest Analysis
 # ==============================================================================
 
-def analyze_trades(trades, initial_capital, strategy_name):
-    """Analyze trading performance"""
-    if len(trades) == 0:
-        return {
-            'strategy': strategy_name,
-            'total_trades': 0,
-            'final_capital': initial_capital,
-            'profit': 0,
-            'return_pct': 0
-        }
-
-    buy_trades = [t for t in trades if t['type'] == 'BUY']
-    sell_trades = [t for t in trades if t['type'] == 'SELL']
-
-    final_capital = trades[-1]['capital'] if trades[-1]['type'] == 'SELL' else initial_capital
+def analyze_trades(trades, initial_capital, strategy_name, df=None, fee_rate=0.0):
+    """
+    Analyze trading performance (computed directly on the TradeLog arrays)
+
+    With the DataFrame the strategy ran on, the equity curve metrics of
+    backtest_metrics (drawdown, Sharpe / Sortino, time in market, turnover,
+    fee drag) are added and an open position is marked to the last close.
+    """
+    records = trades.records
+    is_sell = records['type'] == SELL
+
+    if df is not None:
+        performance = trade_metrics(trades, df['timestamp'].to_numpy(), df['Close'].to_numpy(),
+                                    initial_capital, fee_rate)
+        final_capital = performance['final_capital']
+    else:
+        performance = {}
+        # Capital after the last trade (before it, for a still-open BUY)
+        final_capital = float(records['capital'][-1]) if len(records) else float(initial_capital)
     total_profit = final_capital - initial_capital
     return_pct = (total_profit / initial_capital) * 100
 
-    profits = [t.get('profit', 0) for t in sell_trades]
-    winning_trades = [p for p in profits if p > 0]
-    losing_trades = [p for p in profits if p < 0]
-
-    win_rate = (len(winning_trades) / len(sell_trades) * 100) if sell_trades else 0
-    avg_profit = np.mean(profits) if profits else 0
-    max_profit = max(profits) if profits else 0
-    max_loss = min(profits) if profits else 0
-
-    return {
+    sells = sell_metrics(records)
+    result = {
         'strategy': strategy_name,
-        'total_trades': len(buy_trades),
-        'winning_trades': len(winning_trades),
-        'losing_trades': len(losing_trades),
-        'win_rate': win_rate,
+        'total_trades': len(records) - int(np.count_nonzero(is_sell)),
+        'winning_trades': sells['winning_trades'],
+        'losing_trades': sells['losing_trades'],
+        'win_rate': sells['win_rate'],
         'final_capital': final_capital,
         'profit': total_profit,
         'return_pct': return_pct,
-        'avg_profit': avg_profit,
-        'max_profit': max_profit,
-        'max_loss': max_loss
+        'avg_profit': sells['avg_profit'],
+        'max_profit': sells['max_profit'],
+        'max_loss': sells['max_loss']
     }
+    result.update({k: v for k, v in performance.items() if k not in result})
+    return result
 
 
 def print_results(results):
     """Print backtest results in a formatted table"""
-    print("\n" + "="*80)
+    print("\n" + "="*96)
     print("BACKTEST RESULTS")
-    print("="*80)
-    print(f"{'Strategy':<25} {'Trades':<8} {'Win Rate':<10} {'Return %':<12} {'Profit (KRW)':<15}")
-    print("-"*80)
+    print("="*96)
+    print(f"{'Strategy':<25} {'Trades':<8} {'Win Rate':<10} {'Return %':<12} {'Profit (KRW)':<15} "
+          f"{'MDD %':<8} {'Sharpe':<8}")
+    print("-"*96)
 
     for r in results:
+        # Equity-curve metrics are only there when analyze_trades got the DataFrame
+        mdd = f"{r['max_drawdown_pct']:.2f}" if 'max_drawdown_pct' in r else '-'
+        sharpe = f"{r['sharpe']:.2f}" if 'sharpe' in r else '-'
         print(f"{r['strategy']:<25} {r['total_trades']:<8} "
-              f"{r['win_rate']:<10.1f} {r['return_pct']:<12.2f} {r['profit']:<15,.0f}")
+              f"{r['win_rate']:<10.1f} {r['return_pct']:<12.2f} {r['profit']:<15,.0f} {mdd:<8} {sharpe:<8}")
 
-    print("="*80)
+    print("="*96)
 
     # Find best strategy
     best = max(results, key=lambda x: x['return_pct'])
@@ -523,12 +533,22 @@ def print_results(results):
 # Main Execution
 # ==============================================================================
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='coinone_xrp_backtest.py',
+                                     description='Coinone XRP scalping strategy backtest')
+    parser.add_argument('--orderbook', nargs='+', metavar='OBK',
+                        help='Order-book recordings (orderbook_store.py record) to fill the combined '
+                             'strategy from, instead of at the candle close')
+    args = parser.parse_args(argv)
+
     # Configuration
     INITIAL_CAPITAL = 100000  # 10만원
     POSITION_SIZE = 0.95      # 95% of capital per trade
     DAYS = 30                 # 30 days of data (increased for statistical significance)
     FEE_RATE = 0.0002         # 0.02% Coinone spot trading fee
+    RESULTS_DIR = 'coinone_xrp_backtest_results'
+    RESULTS_FORMAT = 'jsonl'  # or 'parquet' (requires pyarrow)
+    CACHE_DIR = 'backtest_cache'  # unchanged candles + parameters are served from here
 
     print("="*80)
     print("COINONE XRP SCALPING STRATEGY BACKTEST (SPOT TRADING)")
@@ -545,54 +565,68 @@ def main():
 
     # Calculate indicators
     print("\nCalculating technical indicators...")
-    df = calculate_all_indicators(df)
+    with stage('indicators'):
+        df = calculate_all_indicators(df)
     print("✓ Indicators calculated")
 
     # Run strategies
     print("\nRunning backtests...")
     results = []
-
-    print("  1. Bollinger Band Mean Reversion...")
-    trades_bb, capital_bb = strategy_bollinger_bands(df, INITIAL_CAPITAL, POSITION_SIZE)
-    results.append(analyze_trades(trades_bb, INITIAL_CAPITAL, "Bollinger Bands"))
-
-    print("  2. RSI Oversold/Overbought...")
-    trades_rsi, capital_rsi = strategy_rsi(df, INITIAL_CAPITAL, POSITION_SIZE)
-    results.append(analyze_trades(trades_rsi, INITIAL_CAPITAL, "RSI"))
-
-    print("  3. EMA Crossover...")
-    trades_ema, capital_ema = strategy_ema_crossover(df, INITIAL_CAPITAL, POSITION_SIZE)
-    results.append(analyze_trades(trades_ema, INITIAL_CAPITAL, "EMA Crossover"))
-
-    print("  4. Combined Multi-Strategy (with Uptrend Filter)...")
-    trades_combined, capital_combined = strategy_combined(df, INITIAL_CAPITAL, POSITION_SIZE, FEE_RATE)
-    results.append(analyze_trades(trades_combined, INITIAL_CAPITAL, "Combined Strategy (Uptrend)"))
-
-    # Print results
-    print_results(results)
-
-    # Save detailed results
-    output = {
-        'config': {
-            'initial_capital': INITIAL_CAPITAL,
-            'position_size': POSITION_SIZE,
-            'period_days': DAYS,
-            'data_points': len(df)
-        },
-        'results': results,
-        'trades': {
-            'bollinger_bands': trades_bb,
-            'rsi': trades_rsi,
-            'ema_crossover': trades_ema,
-            'combined': trades_combined
-        }
+    cache = ResultCache(CACHE_DIR)
+    fingerprint = data_fingerprint(df)
+    config = {
+        'initial_capital': INITIAL_CAPITAL,
+        'position_size': POSITION_SIZE,
+        'period_days': DAYS,
+        'fee_rate': FEE_RATE,
+        'data_points': len(df)
     }
 
-    with open('coinone_xrp_backtest_results.json', 'w') as f:
-        json.dump(output, f, indent=2, default=str)
-
-    print(f"✓ Detailed results saved to: coinone_xrp_backtest_results.json")
+    # Each run is streamed to the result directory as soon as it finishes, so
+    # trade logs never pile up in memory and repeated runs / sweeps append.
+    with ResultWriter(RESULTS_DIR, format=RESULTS_FORMAT) as writer:
+        def record(trades, name, fee_rate=0.0):
+            result = analyze_trades(trades, INITIAL_CAPITAL, name, df, fee_rate)
+            run_id = writer.write_run(name, config, result)
+            writer.write_trades(run_id, trades)
+            results.append(result)
+
+        with stage('evaluate'):
+            print("  1. Bollinger Band Mean Reversion...")
+            trades_bb, capital_bb = cache.run(strategy_bollinger_bands, df, INITIAL_CAPITAL, POSITION_SIZE, fingerprint=fingerprint)
+            record(trades_bb, "Bollinger Bands")
+
+            print("  2. RSI Oversold/Overbought...")
+            trades_rsi, capital_rsi = cache.run(strategy_rsi, df, INITIAL_CAPITAL, POSITION_SIZE, fingerprint=fingerprint)
+            record(trades_rsi, "RSI")
+
+            print("  3. EMA Crossover...")
+            trades_ema, capital_ema = cache.run(strategy_ema_crossover, df, INITIAL_CAPITAL, POSITION_SIZE, fingerprint=fingerprint)
+            record(trades_ema, "EMA Crossover")
+
+            print("  4. Combined Multi-Strategy (with Uptrend Filter)...")
+            fill_model = None
+            if args.orderbook:
+                from orderbook_store import BookFillModel
+                fill_model = BookFillModel(args.orderbook)
+            # Runs uncached with a fill model (cache.run can't key on it)
+            trades_combined, capital_combined = cache.run(strategy_combined, df, INITIAL_CAPITAL, POSITION_SIZE, FEE_RATE,
+                                                          fill_model=fill_model, fingerprint=fingerprint)
+            record(trades_combined, "Combined Strategy (Uptrend)", FEE_RATE)
+            if fill_model is not None:
+                stats = fill_model.stats()
+                print(f"     order-book fills {stats['fills']}, fallbacks to the close {stats['fallbacks']}, "
+                      f"partial {stats['partial']}, avg slippage {stats['avg_slippage_bps']:.1f} bps")
+
+    if cache.hits:
+        print(f"✓ {cache.hits} of {cache.hits + cache.misses} strategies served from {CACHE_DIR}/")
+
+    with stage('report'):
+        print_results(results)
+
+    print(f"✓ Detailed results saved to: {RESULTS_DIR}/ (runs + trades, {RESULTS_FORMAT})")
 
 
 if __name__ == '__main__':
+    enable_from_argv()
     main()
@@ -8,6 +8,8 @@ import requests
 import json
 from datetime import datetime
 
+from candle_decoder import decode_candle_rows
+
 def fetch_coinone_chart(symbol='XRP', interval='5m', size=500):
     """Fetch chart data from Coinone API"""
     url = f'https://api.coinone.co.kr/public/v2/chart/KRW/{symbol}'
@@ -138,24 +140,26 @@ def check_sideways_conditions(rsi, bb_position, volume_ratio):
         'volume_spike': volume_spike
     }, reasons
 
-def analyze_current_state(symbol='XRP'):
-    """Analyze current market state as bot sees it"""
+def analyze_current_state(symbol='XRP', candles=None):
+    """Analyze current market state as bot sees it (`candles`: already fetched rows, newest first)"""
     print(f"\n{'='*70}")
     print(f"🤖 봇 로직 디버깅 - {symbol}")
     print(f"{'='*70}\n")
 
     # Fetch data
-    candles = fetch_coinone_chart(symbol, '5m', 500)
+    if candles is None:
+        candles = fetch_coinone_chart(symbol, '5m', 500)
     if len(candles) < 200:
         print(f"✗ Not enough data (need 200+, got {len(candles)})")
         return
 
     # Reverse to oldest-first
-    candles.reverse()
+    candles = candles[::-1]
 
     # Prepare data
-    closes = [float(c['close']) for c in candles]
-    volumes = [float(c['target_volume']) for c in candles]
+    columns = decode_candle_rows(candles, chronological=False)
+    closes = columns.close.tolist()
+    volumes = columns.volume.tolist()
 
     # Calculate indicators for LATEST candle
     rsi = calculate_rsi(closes, 14)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Incremental indicator state
+
+Streaming versions of the indicators used by the scanner scripts, with the
+same formulas (simple-average RSI over the last `period` changes, population
+std Bollinger Bands, SMA-seeded EMA, plain volume MA). Each indicator has:
+
+    update(value)  - commit a closed candle, O(period) at most
+    peek(value)    - value as if `value` were the close of the forming candle,
+                     O(1), does not change state. Accepts a scalar or a NumPy
+                     array of candidate closes (one result per element).
+
+`ready` is False until enough candles have been committed (same point at
+which the list-based functions stop returning None).
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class IncrementalRSI:
+    """RSI over the simple average of the last `period` gains / losses"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.last_close = None
+        self.gains = deque(maxlen=period)
+        self.losses = deque(maxlen=period)
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+
+    @property
+    def ready(self):
+        return len(self.gains) == self.period
+
+    def update(self, close):
+        if self.last_close is not None:
+            change = close - self.last_close
+            self.gains.append(max(0.0, change))
+            self.losses.append(max(0.0, -change))
+            # Re-sum instead of add/subtract so rounding never accumulates
+            self.gain_sum = sum(self.gains)
+            self.loss_sum = sum(self.losses)
+        self.last_close = close
+
+    def value(self):
+        if not self.ready:
+            return None
+        return _rsi(self.gain_sum / self.period, self.loss_sum / self.period)
+
+    def peek(self, close):
+        if self.last_close is None or len(self.gains) < self.period - 1:
+            return None
+        change = close - self.last_close
+        gain_sum = self.gain_sum + np.maximum(0.0, change)
+        loss_sum = self.loss_sum + np.maximum(0.0, -change)
+        if self.ready:
+            gain_sum = gain_sum - self.gains[0]
+            loss_sum = loss_sum - self.losses[0]
+        return _rsi(gain_sum / self.period, loss_sum / self.period)
+
+
+class IncrementalBollinger:
+    """Bollinger Bands over the last `period` closes (population std)"""
+
+    def __init__(self, period=20, std_dev=2.0):
+        self.period = period
+        self.std_dev = std_dev
+        self.closes = deque(maxlen=period)
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    @property
+    def ready(self):
+        return len(self.closes) == self.period
+
+    def update(self, close):
+        self.closes.append(close)
+        self.total = sum(self.closes)
+        self.total_sq = sum(c * c for c in self.closes)
+
+    def value(self):
+        """(upper, middle, lower) or (None, None, None)"""
+        if not self.ready:
+            return None, None, None
+        return self._bands(self.total, self.total_sq)
+
+    def peek(self, close):
+        if len(self.closes) < self.period - 1:
+            return None, None, None
+        total = self.total + close
+        total_sq = self.total_sq + close * close
+        if self.ready:
+            oldest = self.closes[0]
+            total = total - oldest
+            total_sq = total_sq - oldest * oldest
+        return self._bands(total, total_sq)
+
+    def _bands(self, total, total_sq):
+        middle = total / self.period
+        variance = np.maximum(total_sq / self.period - middle * middle, 0.0)
+        std = variance ** 0.5
+        return middle + std * self.std_dev, middle, middle - std * self.std_dev
+
+
+class IncrementalEMA:
+    """EMA seeded with the SMA of the first `period` values"""
+
+    def __init__(self, period):
+        self.period = period
+        self.multiplier = 2.0 / (period + 1)
+        self.seed = []
+        self.ema = None
+
+    @property
+    def ready(self):
+        return self.ema is not None
+
+    def update(self, close):
+        if self.ema is None:
+            self.seed.append(close)
+            if len(self.seed) == self.period:
+                self.ema = sum(self.seed) / self.period
+                self.seed = None
+        else:
+            self.ema = (close - self.ema) * self.multiplier + self.ema
+
+    def value(self):
+        return self.ema
+
+    def peek(self, close):
+        if self.ema is None:
+            if len(self.seed) == self.period - 1:
+                return (sum(self.seed) + close) / self.period
+            return None
+        return (close - self.ema) * self.multiplier + self.ema
+
+
+class IncrementalMA:
+    """Simple moving average (used for volume MA)"""
+
+    def __init__(self, period=5):
+        self.period = period
+        self.values = deque(maxlen=period)
+        self.total = 0.0
+
+    @property
+    def ready(self):
+        return len(self.values) == self.period
+
+    def update(self, value):
+        self.values.append(value)
+        self.total = sum(self.values)
+
+    def value(self):
+        return self.total / self.period if self.ready else None
+
+    def peek(self, value):
+        if len(self.values) < self.period - 1:
+            return None
+        total = self.total + value
+        if self.ready:
+            total = total - self.values[0]
+        return total / self.period
+
+
+def _rsi(avg_gain, avg_loss):
+    # avg_loss == 0 -> 100, same as the list-based calculate_rsi
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + np.divide(avg_gain, avg_loss)))
+    rsi = np.where(avg_loss == 0, 100.0, rsi)
+    return float(rsi) if rsi.ndim == 0 else rsi
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Persistent indicator cache
+
+calculate_all_indicators (coinone_xrp_backtest.py) recomputes Bollinger
+Bands, RSI, four EMAs and support / resistance over the whole history on
+every run, even when only a few candles are new. This keeps the computed
+columns next to the candle store together with the state needed to
+continue them: the EMA values and the last closes / highs / lows that the
+rolling windows reach back into. New candles only extend the columns, so
+a reload costs O(new bars).
+
+Column names and formulas are coinone_xrp_backtest's (ddof=1 Bollinger std,
+rolling-mean RSI with a zero first change, ewm(adjust=False) EMAs). Rolling
+windows are summed per window, so a column extended bar by bar is
+bit-identical to one computed in a single pass; against pandas' running
+sums it agrees to float rounding.
+
+Usage:
+    cache = indicator_cache_for(store, 'XRP', '5m', candles)
+    df = cache.to_dataframe(candles)    # same columns as calculate_all_indicators
+
+    python3 indicator_cache.py --symbol XRP --interval 5m
+"""
+
+import argparse
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicator_series import window_sum
+
+# Bump INDICATOR_VERSION whenever INDICATOR_PARAMS or the formulas below change;
+# each version is stored as its own index.
+INDICATOR_VERSION = 'v1'
+INDICATOR_PARAMS = {
+    'bb_period': 20,
+    'bb_std': 2,
+    'rsi_period': 14,
+    'emas': (9, 21, 50, 200),
+    'sr_window': 20,
+}
+COLUMNS = ('BB_Middle', 'BB_Std', 'BB_Upper', 'BB_Lower', 'BB_Width', 'RSI',
+           'EMA_9', 'EMA_21', 'EMA_50', 'EMA_200', 'Support', 'Resistance')
+
+
+# ==============================================================================
+# Incremental computation
+# ==============================================================================
+
+class IndicatorStream:
+    """calculate_all_indicators for consecutive blocks of candles"""
+
+    def __init__(self, params=INDICATOR_PARAMS):
+        self.params = params
+        # Bars of the previous block the windows reach back into
+        self.tail_size = max(params['bb_period'] - 1, params['rsi_period'], params['sr_window'] - 1)
+        self.tail = {'close': np.empty(0), 'high': np.empty(0), 'low': np.empty(0)}
+        self.emas = {period: None for period in params['emas']}
+
+    def update(self, closes, highs=None, lows=None):
+        """
+        Indicator arrays aligned with `closes` (NaN where the window isn't full
+        yet); Support / Resistance only when highs and lows are given
+        """
+        params = self.params
+        n = len(closes)
+        extended = np.concatenate((self.tail['close'], closes))
+
+        # RSI: pandas' diff() starts with NaN, which where(delta > 0, 0) turns into a 0 gain / loss
+        change = np.diff(extended)
+        if len(self.tail['close']) == 0:
+            change = np.concatenate(([0.0], change))
+        period = params['rsi_period']
+        gain = _rolling_mean(np.where(change > 0, change, 0.0), period, n)
+        loss = _rolling_mean(-np.where(change < 0, change, 0.0), period, n)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + gain / loss))
+
+        # Bollinger Bands with the sample std (pandas rolling().std(), ddof=1)
+        period = params['bb_period']
+        middle = _rolling_mean(extended, period, n)
+        std = np.full(n, np.nan)
+        windows = _windows(extended, period, n)
+        if windows is not None:
+            full = len(windows)
+            std[n - full:] = np.sqrt(((windows - middle[n - full:, None]) ** 2).sum(axis=1) / (period - 1))
+        upper = middle + (params['bb_std'] * std)
+        lower = middle - (params['bb_std'] * std)
+
+        out = {'BB_Middle': middle, 'BB_Std': std, 'BB_Upper': upper, 'BB_Lower': lower,
+               'BB_Width': (upper - lower) / middle, 'RSI': rsi}
+        for period in params['emas']:
+            out[f'EMA_{period}'] = self._ema(period, closes)
+
+        tails = {'close': extended}
+        if highs is not None and lows is not None:
+            tails['high'] = np.concatenate((self.tail['high'], highs))
+            tails['low'] = np.concatenate((self.tail['low'], lows))
+            out['Support'] = _rolling_extreme(tails['low'], params['sr_window'], n, np.min)
+            out['Resistance'] = _rolling_extreme(tails['high'], params['sr_window'], n, np.max)
+
+        for name, values in tails.items():
+            self.tail[name] = values[-self.tail_size:].copy()
+        return out
+
+    def _ema(self, period, closes):
+        """pandas ewm(span=period, adjust=False).mean(), continued from the previous block"""
+        alpha = 2 / (period + 1)
+        old_wt = 1 - alpha
+        weighted = self.emas[period]
+        out = []
+        for cur in closes.tolist():
+            if weighted is None:
+                weighted = cur
+            elif weighted != cur:
+                weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+            out.append(weighted)
+        self.emas[period] = weighted
+        return np.array(out)
+
+    # --------------------------------------------------------------------------
+    # State
+    # --------------------------------------------------------------------------
+
+    def state(self):
+        """JSON-able state; floats round-trip exactly through json"""
+        return {'tail': {name: values.tolist() for name, values in self.tail.items()},
+                'emas': {str(period): value for period, value in self.emas.items()}}
+
+    @classmethod
+    def from_state(cls, state, params=INDICATOR_PARAMS):
+        stream = cls(params)
+        stream.tail = {name: np.array(values, dtype=np.float64) for name, values in state['tail'].items()}
+        stream.emas = {period: state['emas'].get(str(period)) for period in params['emas']}
+        return stream
+
+
+def _windows(values, period, n):
+    """Full windows ending at the last n positions of `values` (fewer near the start), or None"""
+    if len(values) < period:
+        return None
+    return sliding_window_view(values, period)[-n:]
+
+
+def _rolling_mean(values, period, n):
+    """Window means of `values` for its last n positions, NaN where the window isn't full"""
+    out = np.full(n, np.nan)
+    if len(values) >= period:
+        means = window_sum(values, period) / period
+        out[n - min(n, len(means)):] = means[-n:]
+    return out
+
+
+def _rolling_extreme(values, period, n, reduce):
+    out = np.full(n, np.nan)
+    windows = _windows(values, period, n)
+    if windows is not None:
+        out[n - len(windows):] = reduce(windows, axis=1)
+    return out
+
+
+# ==============================================================================
+# Cache
+# ==============================================================================
+
+class IndicatorCache:
+    """Indicator columns for one symbol / interval plus the state to extend them"""
+
+    def __init__(self, timestamps, columns, state):
+        self.timestamps = timestamps      # int64 ms, one per bar
+        self.columns = columns            # name -> float64 array
+        self.state = state                # IndicatorStream state after the second-to-last bar
+
+    @classmethod
+    def build(cls, candles):
+        cache = cls(np.empty(0, dtype=np.int64), {name: np.empty(0) for name in COLUMNS}, None)
+        cache.update(candles)
+        return cache
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def update(self, candles):
+        """
+        Compute bars of `candles` (the whole stored series) not cached yet
+
+        The last cached bar is always recomputed, since it may have been a
+        still-forming candle. Falls back to a full rebuild if the history no
+        longer lines up. Returns the number of bars (re)computed.
+        """
+        n_old = len(self.timestamps)
+        keep = n_old - 1
+        if (keep < 1 or self.state is None or len(candles) < n_old
+                or candles.timestamp[0] != self.timestamps[0]
+                or candles.timestamp[keep - 1] != self.timestamps[keep - 1]):
+            keep = 0
+
+        stream = IndicatorStream.from_state(self.state) if keep else IndicatorStream()
+        n = len(candles)
+        new = {name: [self.columns[name][:keep]] for name in COLUMNS}
+        # Stop one bar short so the saved state excludes the (possibly forming) last bar
+        for start, stop in ((keep, n - 1), (n - 1, n)):
+            if stop <= start:
+                continue
+            block = stream.update(np.asarray(candles.close[start:stop], dtype=np.float64),
+                                  np.asarray(candles.high[start:stop], dtype=np.float64),
+                                  np.asarray(candles.low[start:stop], dtype=np.float64))
+            for name in COLUMNS:
+                new[name].append(block[name])
+            if stop == n - 1:
+                self.state = stream.state()
+        self.columns = {name: np.concatenate(parts) for name, parts in new.items()}
+        self.timestamps = np.asarray(candles.timestamp, dtype=np.int64).copy()
+        return n - keep
+
+    def to_dataframe(self, candles):
+        """candles.to_dataframe() with the indicator columns added"""
+        df = candles.to_dataframe()
+        for name in COLUMNS:
+            df[name] = self.columns[name]
+        return df
+
+    # --------------------------------------------------------------------------
+    # Persistence
+    # --------------------------------------------------------------------------
+
+    def save(self, store, symbol, interval, version=INDICATOR_VERSION):
+        arrays = {'timestamps': self.timestamps}
+        arrays.update(self.columns)
+        store.save_index(symbol, interval, f'indicators_{version}', arrays,
+                         meta={'params': INDICATOR_PARAMS, 'state': self.state})
+
+    @classmethod
+    def load(cls, store, symbol, interval, version=INDICATOR_VERSION):
+        stored = store.load_index(symbol, interval, f'indicators_{version}')
+        if stored is None:
+            return None
+        arrays, meta = stored
+        if meta.get('params') != _json_params():
+            return None
+        return cls(arrays['timestamps'], {name: arrays[name] for name in COLUMNS}, meta.get('state'))
+
+
+def indicator_cache_for(store, symbol, interval, candles=None):
+    """Load the persisted indicators, extend them over any new candles and save them back"""
+    if candles is None:
+        candles = store.load(symbol, interval)
+        if candles is None:
+            raise ValueError(f"No stored candles for {symbol} {interval}")
+    cache = IndicatorCache.load(store, symbol, interval)
+    if cache is None:
+        cache = IndicatorCache.build(candles)
+    elif len(cache) != len(candles) or cache.timestamps[-1] != candles.timestamp[-1]:
+        cache.update(candles)
+    else:
+        return cache
+    cache.save(store, symbol, interval)
+    return cache
+
+
+def _json_params():
+    # INDICATOR_PARAMS as it reads back from the JSON metadata
+    return {k: list(v) if isinstance(v, tuple) else v for k, v in INDICATOR_PARAMS.items()}
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def main():
+    import time
+    import requests
+    from candle_decoder import decode_coinone_chart
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description='Persistent indicator cache')
+    parser.add_argument('--symbol', default='XRP')
+    parser.add_argument('--interval', default='5m')
+    parser.add_argument('--size', type=int, default=500, help='Candles to fetch')
+    parser.add_argument('--store', default='candle_store', help='Candle store directory')
+    args = parser.parse_args()
+
+    url = f'https://api.coinone.co.kr/public/v2/chart/KRW/{args.symbol}'
+    response = requests.get(url, params={'interval': args.interval, 'size': args.size}, timeout=10)
+    store = CandleStore(args.store)
+    candles = store.append(args.symbol, args.interval, decode_coinone_chart(response.content))
+
+    cached = IndicatorCache.load(store, args.symbol, args.interval)
+    started = time.perf_counter()
+    cache = indicator_cache_for(store, args.symbol, args.interval, candles)
+    elapsed = time.perf_counter() - started
+    before = len(cached) if cached is not None else 0
+    print(f"✓ {args.symbol} {args.interval}: {len(cache)} bars cached "
+          f"({len(cache) - before:+d} new, {elapsed * 1000:.1f} ms)")
+
+    last = {name: float(cache.columns[name][-1]) for name in COLUMNS}
+    print('  ' + '  '.join(f"{name} {value:,.2f}" for name, value in last.items()))
+
+
+if __name__ == '__main__':
+    main()
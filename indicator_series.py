@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Whole-series indicators (vectorized)
+
+Array versions of the scanner scripts' calculate_* functions, computed for
+every bar at once instead of re-running the list-based function on
+`closes[:i+1]` for each i. Formulas are the same (simple-average RSI,
+SMA-seeded EMA, population-std Bollinger Bands, plain volume MA); element i
+equals calculate_*(values[:i+1]), with NaN where that function returns None.
+Window sums are added left to right like a plain float loop. That is
+exactly what sum() does up to Python 3.11, so there the values are
+bit-identical. From 3.12, sum() compensates float rounding (Neumaier), so
+values can differ in the last bits and a value sitting exactly on a
+threshold (RSI <= 32, ...) could land on the other side.
+
+Every function also takes a 2D (symbols x bars) array and works along the
+last axis, which is what portfolio_backtest uses.
+
+Usage:
+    closes = candles.close
+    rsi = rsi_series(closes, 14)
+    ema50, ema200 = ema_series(closes, 50), ema_series(closes, 200)
+"""
+
+import numpy as np
+
+
+def window_sum(values, period):
+    """sum(values[i-period+1:i+1]) for every full window, added left to right (sum() up to 3.11)"""
+    n = values.shape[-1] - period + 1
+    total = values[..., :n].copy()
+    for k in range(1, period):
+        total += values[..., k:k + n]
+    return total
+
+
+def sma_series(values, period):
+    """Simple moving average over the last `period` values"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= period:
+        out[..., period - 1:] = window_sum(values, period) / period
+    return out
+
+
+def rsi_series(closes, period=14):
+    """RSI over the simple average of the last `period` gains / losses"""
+    closes = np.asarray(closes, dtype=np.float64)
+    out = np.full(closes.shape, np.nan)
+    if closes.shape[-1] < period + 1:
+        return out
+
+    change = np.diff(closes, axis=-1)
+    avg_gain = window_sum(np.maximum(change, 0.0), period) / period
+    avg_loss = window_sum(np.maximum(-change, 0.0), period) / period
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+    out[..., period:] = np.where(avg_loss == 0, 100.0, rsi)
+    return out
+
+
+def ema_series(closes, period, prev=None):
+    """
+    EMA seeded with the SMA of the first `period` closes
+
+    With `prev` (the EMA of the bar before closes[0]) the recurrence just
+    continues from it, so a series can be extended without the old closes.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    out = np.full(closes.shape, np.nan)
+    multiplier = 2.0 / (period + 1)
+    if prev is not None:
+        ema, start = prev, 0
+    elif closes.shape[-1] < period:
+        return out
+    else:
+        # Summed left to right, as calculate_ema's sum() does up to Python 3.11
+        ema = window_sum(closes[..., :period], period)[..., 0] / period
+        out[..., period - 1] = ema
+        start = period
+
+    # The recurrence is inherently sequential; plain floats keep it cheap in
+    # 1D, and in 2D each step updates every symbol at once.
+    if closes.ndim == 1:
+        ema = float(ema)
+        for i, close in enumerate(closes[start:].tolist(), start=start):
+            ema = (close - ema) * multiplier + ema
+            out[i] = ema
+    else:
+        for i in range(start, closes.shape[-1]):
+            ema = (closes[:, i] - ema) * multiplier + ema
+            out[:, i] = ema
+    return out
+
+
+def bollinger_series(closes, period=20, std_dev=2.0):
+    """(upper, middle, lower) arrays, population std over the last `period` closes"""
+    closes = np.asarray(closes, dtype=np.float64)
+    middle = np.full(closes.shape, np.nan)
+    std = np.full(closes.shape, np.nan)
+    if closes.shape[-1] >= period:
+        n = closes.shape[-1] - period + 1
+        mean = window_sum(closes, period) / period
+        variance = (closes[..., :n] - mean) ** 2
+        for k in range(1, period):
+            variance += (closes[..., k:k + n] - mean) ** 2
+        middle[..., period - 1:] = mean
+        std[..., period - 1:] = (variance / period) ** 0.5
+    return middle + std * std_dev, middle, middle - std * std_dev
+
+
+def volume_ratio_series(volumes, period=5):
+    """Volume / volume MA (MA includes the current bar); 1.0 when the MA is 0"""
+    volumes = np.asarray(volumes, dtype=np.float64)
+    volume_ma = sma_series(volumes, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(volume_ma > 0, volumes / volume_ma, 1.0)
+    ratio[np.isnan(volume_ma)] = np.nan
+    return ratio
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Scale-aware support / resistance level index
+
+detect_support_resistance used to bucket highs / lows with round(x, -1),
+which is one bucket per 10 KRW for XRP but a far too fine grid for ETH in
+USDT, and it rebuilt the whole dict on every call. Here bins are sized from
+the instrument itself (a fraction of the average true range, never finer
+than the tick size), and touch counts are maintained over a sliding window
+of bars: each new bar adds its high / low bins and expires the bar that fell
+out of the window, with bisect lookups into a sorted list of active bins.
+
+Nearest support / resistance queries are a bisect, no rescan, so the same
+index serves live scanning (add() per closed candle) and backtests
+(support_resistance_series over a whole history).
+
+Usage:
+    levels = LevelIndex.from_history(highs, lows, closes, window=20)
+    levels.nearest_support(price), levels.nearest_resistance(price)
+    levels.add(high, low)            # next closed candle
+"""
+
+import math
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+
+import numpy as np
+
+
+def infer_tick_size(prices):
+    """Smallest price increment seen in `prices` (0.0 if it can't be told)"""
+    unique = np.unique(np.asarray(prices, dtype=np.float64))
+    if len(unique) < 2:
+        return 0.0
+    # Round away float noise (0.09999999 -> 0.1)
+    return float(np.round(np.diff(unique).min(), 10))
+
+
+def level_bin_width(highs, lows, closes, tick_size=None, atr_fraction=0.25):
+    """
+    Bin width for grouping touches: `atr_fraction` of the average true range,
+    rounded up to a whole number of ticks
+    """
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    closes = np.asarray(closes, dtype=np.float64)
+
+    true_range = highs - lows
+    if len(closes) > 1:
+        prev_close = closes[:-1]
+        true_range[1:] = np.maximum.reduce([true_range[1:],
+                                            np.abs(highs[1:] - prev_close),
+                                            np.abs(lows[1:] - prev_close)])
+    width = float(true_range.mean()) * atr_fraction if len(true_range) else 0.0
+
+    tick = infer_tick_size(closes) if tick_size is None else tick_size
+    if tick > 0:
+        return max(math.ceil(width / tick - 1e-9), 1) * tick
+    if width > 0:
+        return width
+    # Flat / empty history: 0.1% of price
+    return float(closes[-1]) * 0.001 if len(closes) and closes[-1] > 0 else 1.0
+
+
+class LevelIndex:
+    """Touch counts per price bin over the last `window` bars"""
+
+    def __init__(self, bin_width, window=20):
+        if bin_width <= 0:
+            raise ValueError(f"bin_width must be positive, got {bin_width}")
+        self.bin_width = bin_width
+        self.window = window
+        self.counts = {}        # bin -> touches within the window
+        self.bins = []          # active bins, sorted
+        self.bars = deque()     # (high_bin, low_bin) of each bar in the window
+
+    @classmethod
+    def from_history(cls, highs, lows, closes, window=20, tick_size=None, atr_fraction=0.25):
+        """Index sized from the history, holding its last `window` bars"""
+        width = level_bin_width(highs, lows, closes, tick_size, atr_fraction)
+        index = cls(width, window)
+        for high, low in zip(highs[-window:], lows[-window:]):
+            index.add(high, low)
+        return index
+
+    def __len__(self):
+        """Number of distinct levels in the window"""
+        return len(self.bins)
+
+    def level(self, b):
+        """Price of bin b"""
+        return round(b * self.bin_width, 10)
+
+    def add(self, high, low):
+        """Add a closed bar's high / low, expiring the oldest bar once the window is full"""
+        if len(self.bars) == self.window:
+            old_high, old_low = self.bars.popleft()
+            self._touch(old_high, -1)
+            self._touch(old_low, -1)
+        high_bin = self._bin(high)
+        low_bin = self._bin(low)
+        self._touch(high_bin, 1)
+        self._touch(low_bin, 1)
+        self.bars.append((high_bin, low_bin))
+
+    def nearest_support(self, price, min_touches=1):
+        """Closest level at or below `price` with enough touches, or None"""
+        i = bisect_right(self.bins, math.floor(price / self.bin_width)) - 1
+        while i >= 0:
+            b = self.bins[i]
+            if self.counts[b] >= min_touches:
+                return self.level(b)
+            i -= 1
+        return None
+
+    def nearest_resistance(self, price, min_touches=1):
+        """Closest level at or above `price` with enough touches, or None"""
+        i = bisect_left(self.bins, math.ceil(price / self.bin_width))
+        while i < len(self.bins):
+            b = self.bins[i]
+            if self.counts[b] >= min_touches:
+                return self.level(b)
+            i += 1
+        return None
+
+    def levels(self, above=None, below=None):
+        """[(level, touches)] most touched first, optionally only above / below a price"""
+        bins = self.bins
+        if above is not None:
+            bins = bins[bisect_left(bins, math.ceil(above / self.bin_width)):]
+        if below is not None:
+            bins = bins[:bisect_right(bins, math.floor(below / self.bin_width))]
+        ranked = sorted(bins, key=lambda b: (-self.counts[b], b))
+        return [(self.level(b), self.counts[b]) for b in ranked]
+
+    def _bin(self, price):
+        return math.floor(price / self.bin_width + 0.5)
+
+    def _touch(self, b, delta):
+        count = self.counts.get(b, 0) + delta
+        if count > 0:
+            if b not in self.counts:
+                insort(self.bins, b)
+            self.counts[b] = count
+        else:
+            del self.counts[b]
+            del self.bins[bisect_left(self.bins, b)]
+
+
+def support_resistance_series(highs, lows, closes, window=20, bin_width=None, min_touches=1):
+    """
+    Nearest support / resistance for every bar of a history (backtests)
+
+    Bar i only sees the `window` bars before it; NaN until the window has
+    filled or when there is no level on that side. The bin width defaults to
+    the ATR of the first `window` bars, the warm-up every output bar has
+    already seen, so no bar depends on later ones.
+
+    Returns:
+        (support array, resistance array)
+    """
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    closes = np.asarray(closes, dtype=np.float64)
+    if bin_width is None:
+        bin_width = level_bin_width(highs[:window], lows[:window], closes[:window])
+
+    index = LevelIndex(bin_width, window)
+    support = np.full(len(closes), np.nan)
+    resistance = np.full(len(closes), np.nan)
+    for i, (high, low, close) in enumerate(zip(highs.tolist(), lows.tolist(), closes.tolist())):
+        if len(index.bars) == window:
+            s = index.nearest_support(close, min_touches)
+            r = index.nearest_resistance(close, min_touches)
+            if s is not None:
+                support[i] = s
+            if r is not None:
+                resistance[i] = r
+        index.add(high, low)
+    return support, resistance
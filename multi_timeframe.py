@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+다중 타임프레임 지표 프레임 (1분봉 단일 소스)
+
+The strategy recommended by run_comprehensive_analysis.py mixes timeframes
+(5m RSI6, 1m RSI14, 1m volume vs average, 5m EMA20), which used to mean one
+API call per interval and lining the results up by hand. This builds every
+timeframe from a single 1m feed instead:
+
+    - 1m candles are resampled to any higher timeframe vectorially
+    - indicators are computed per timeframe (indicator_series formulas)
+    - each value is forward-aligned onto the 1m timeline: a 1m bar only sees
+      a higher-timeframe bar once that bar has closed (no look-ahead)
+
+The same frame can be fed bar by bar with update() as each 1m candle closes;
+it yields exactly the rows build() produces for the whole history.
+
+Usage:
+    frame = MultiTimeframeFrame(RECOMMENDED_INDICATORS)
+    values = frame.build(candles)               # dict of aligned arrays
+    signals = multi_timeframe_entry(values)
+
+    row = frame.update(ts, o, h, l, c, v)       # live, per closed 1m bar
+"""
+
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+from candle_decoder import CandleColumns
+from incremental_indicators import IncrementalRSI, IncrementalEMA, IncrementalMA
+from indicator_series import rsi_series, ema_series, sma_series, volume_ratio_series
+
+INTERVAL_MS = {
+    '1m': 60 * 1000,
+    '3m': 3 * 60 * 1000,
+    '5m': 5 * 60 * 1000,
+    '15m': 15 * 60 * 1000,
+    '30m': 30 * 60 * 1000,
+    '1h': 60 * 60 * 1000,
+    '4h': 4 * 60 * 60 * 1000,
+    '1d': 24 * 60 * 60 * 1000,
+}
+
+# Indicator kind -> (series function, source column, incremental class)
+INDICATOR_KINDS = {
+    'rsi': (rsi_series, 'close', IncrementalRSI),
+    'ema': (ema_series, 'close', IncrementalEMA),
+    'sma': (sma_series, 'close', IncrementalMA),
+    'volume_ma': (sma_series, 'volume', IncrementalMA),
+    'volume_ratio': (volume_ratio_series, 'volume', IncrementalMA),
+}
+
+# 최종 추천 전략 (run_comprehensive_analysis.py) 에 필요한 지표
+RECOMMENDED_INDICATORS = {
+    '1m': {'rsi14': ('rsi', 14), 'volume_ratio': ('volume_ratio', 5)},
+    '5m': {'rsi6': ('rsi', 6), 'ema20': ('ema', 20)},
+}
+
+
+# ==============================================================================
+# Resampling
+# ==============================================================================
+
+def resample(columns, interval_ms):
+    """
+    Aggregate oldest-first candles into `interval_ms` buckets
+
+    Buckets are aligned to the epoch (same as exchange candles). The last
+    bucket may still be forming; alignment handles that via its end time.
+    """
+    if len(columns) == 0:
+        return columns
+
+    buckets = columns.timestamp - columns.timestamp % interval_ms
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(buckets)])) - 1
+
+    return CandleColumns(
+        timestamp=buckets[starts],
+        open=columns.open[starts],
+        high=np.maximum.reduceat(columns.high, starts),
+        low=np.minimum.reduceat(columns.low, starts),
+        close=columns.close[ends],
+        volume=np.add.reduceat(columns.volume, starts),
+        quote_volume=np.add.reduceat(columns.quote_volume, starts),
+    )
+
+
+# ==============================================================================
+# Frame
+# ==============================================================================
+
+class MultiTimeframeFrame:
+    """Per-timeframe indicators aligned onto the base (1m) timeline"""
+
+    def __init__(self, indicators, base='1m'):
+        """
+        Args:
+            indicators: {timeframe: {name: (kind, period)}}, e.g.
+                {'5m': {'rsi6': ('rsi', 6)}}; output keys are '<tf>_<name>'
+            base: Interval of the source candles
+        """
+        self.base_ms = INTERVAL_MS[base]
+        self.indicators = indicators
+        for tf, specs in indicators.items():
+            if INTERVAL_MS[tf] % self.base_ms:
+                raise ValueError(f"Timeframe {tf} is not a multiple of the base interval {base}")
+            for name, (kind, _) in specs.items():
+                if kind not in INDICATOR_KINDS:
+                    raise ValueError(f"Unknown indicator kind for {tf}_{name}: {kind}")
+
+        self._forming = {}
+        self._state = {}
+        self._latest = {}
+        for tf, specs in indicators.items():
+            self._forming[tf] = None
+            self._state[tf] = {name: INDICATOR_KINDS[kind][2](period)
+                               for name, (kind, period) in specs.items()}
+            for name in specs:
+                self._latest[f'{tf}_{name}'] = np.nan
+
+    def build(self, columns):
+        """
+        Compute every indicator for a whole oldest-first 1m history
+
+        Returns:
+            Dict of arrays aligned with `columns`: 'timestamp', 'close',
+            'volume' plus one '<tf>_<name>' array per indicator
+        """
+        values = {'timestamp': columns.timestamp, 'close': columns.close, 'volume': columns.volume}
+        # A 1m bar's values are known when it closes
+        known_at = columns.timestamp + self.base_ms
+
+        for tf, specs in self.indicators.items():
+            tf_ms = INTERVAL_MS[tf]
+            bars = columns if tf_ms == self.base_ms else resample(columns, tf_ms)
+            # Latest higher-timeframe bar that had closed by each 1m close
+            idx = np.searchsorted(bars.timestamp + tf_ms, known_at, side='right') - 1
+            valid = idx >= 0
+            idx = np.maximum(idx, 0)
+
+            for name, (kind, period) in specs.items():
+                series_fn, source, _ = INDICATOR_KINDS[kind]
+                series = series_fn(getattr(bars, source), period)
+                values[f'{tf}_{name}'] = np.where(valid, series[idx] if len(series) else np.nan, np.nan)
+        return values
+
+    def update(self, timestamp, open, high, low, close, volume):
+        """
+        Feed one closed 1m candle; returns the aligned row for it
+
+        Higher-timeframe bars are committed when their last 1m candle closes
+        (or, across a gap, when the next bucket starts).
+        """
+        for tf in self.indicators:
+            tf_ms = INTERVAL_MS[tf]
+            bucket = timestamp - timestamp % tf_ms
+            forming = self._forming[tf]
+
+            if forming is not None and forming['bucket'] != bucket:
+                self._commit(tf, forming)
+                forming = None
+            if forming is None:
+                forming = {'bucket': bucket, 'open': open, 'high': high, 'low': low,
+                           'close': close, 'volume': 0.0}
+            forming['high'] = max(forming['high'], high)
+            forming['low'] = min(forming['low'], low)
+            forming['close'] = close
+            forming['volume'] += volume
+
+            if timestamp + self.base_ms >= bucket + tf_ms:
+                self._commit(tf, forming)
+                forming = None
+            self._forming[tf] = forming
+
+        row = {'timestamp': timestamp, 'close': close, 'volume': volume}
+        row.update(self._latest)
+        return row
+
+    def _commit(self, tf, bar):
+        for name, (kind, _) in self.indicators[tf].items():
+            indicator = self._state[tf][name]
+            source = INDICATOR_KINDS[kind][1]
+            indicator.update(bar[source])
+            value = indicator.value()
+            if value is not None and kind == 'volume_ratio':
+                value = bar['volume'] / value if value > 0 else 1.0
+            self._latest[f'{tf}_{name}'] = np.nan if value is None else value
+
+
+# ==============================================================================
+# Recommended strategy
+# ==============================================================================
+
+def multi_timeframe_entry(values):
+    """
+    최종 추천 전략 진입 조건 (scalars or aligned arrays):
+        1. 5분봉 RSI6 < 30
+        2. 1분봉 RSI14 30-50
+        3. 거래량 > 평균 거래량 x 1.2
+        4. 현재 가격 > 5분봉 EMA20
+    """
+    rsi6 = values['5m_rsi6']
+    rsi14 = values['1m_rsi14']
+    with np.errstate(invalid='ignore'):
+        return ((rsi6 < 30) &
+                (rsi14 >= 30) & (rsi14 <= 50) &
+                (values['1m_volume_ratio'] > 1.2) &
+                (values['close'] > values['5m_ema20']))
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def main():
+    import requests
+    from candle_decoder import decode_coinone_chart
+
+    parser = argparse.ArgumentParser(description='Multi-timeframe entry scan from one 1m feed')
+    parser.add_argument('--symbol', default='XRP')
+    parser.add_argument('--size', type=int, default=500, help='1m candles to fetch')
+    args = parser.parse_args()
+
+    url = f'https://api.coinone.co.kr/public/v2/chart/KRW/{args.symbol}'
+    response = requests.get(url, params={'interval': '1m', 'size': args.size}, timeout=10)
+    candles = decode_coinone_chart(response.content)
+    print(f"✓ Fetched {len(candles)} 1m candles for {args.symbol}")
+
+    values = MultiTimeframeFrame(RECOMMENDED_INDICATORS).build(candles)
+    signals = np.flatnonzero(multi_timeframe_entry(values))
+
+    print(f"\n{'='*80}")
+    print(f"다중 타임프레임 진입 신호: {len(signals)}개")
+    print(f"{'='*80}")
+    for i in signals:
+        time = datetime.fromtimestamp(values['timestamp'][i] / 1000)
+        print(f"{time.strftime('%m-%d %H:%M')}  가격 {values['close'][i]:,.2f}  "
+              f"5m RSI6 {values['5m_rsi6'][i]:.1f}  1m RSI14 {values['1m_rsi14'][i]:.1f}  "
+              f"거래량 {values['1m_volume_ratio'][i]:.2f}x  5m EMA20 {values['5m_ema20'][i]:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
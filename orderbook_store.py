@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+"""
+Order-book recorder / replay for slippage modelling
+
+The backtests fill at the candle close with a flat fee, which ignores the
+spread and the depth a 0.2-0.5% scalping target has to get through. This
+records Coinone / Bybit order books and replays them as a fill model.
+
+File format (<exchange>_<SYMBOL>_<YYYYMMDD>.obk, append-only):
+    b'OBK1' | u4 meta length | meta JSON (symbol, exchange, decimals)
+    chunk*: u4 payload bytes | u4 messages | u4 levels | i8 first ts | i8 last ts
+            | zlib(ts deltas, kinds, level counts, sides, price deltas, qtys)
+
+Prices and quantities are stored as fixed-point int64. Each chunk opens
+with a full snapshot (keyframe) followed by deltas, i.e. only the levels
+whose quantity changed (0 = level removed), so a reader can start at any
+chunk and decompresses one chunk at a time; chunks outside a time range
+are skipped by their headers without being read.
+
+Usage:
+    with OrderBookWriter('orderbooks/coinone_XRP_20261018.obk', 'XRP', 'coinone') as writer:
+        writer.write_snapshot(ts, bids, asks)        # [(price, qty), ...] best first
+    model = BookFillModel(['orderbooks/coinone_XRP_20261018.obk'])
+    price = model.fill('BUY', ts_ms, quantity, reference_price=close)
+
+    python3 orderbook_store.py record --exchange coinone --symbol XRP
+    python3 orderbook_store.py replay orderbooks/coinone_XRP_20261018.obk --quantity 1000
+"""
+
+import argparse
+import json
+import os
+import struct
+import time
+import zlib
+from datetime import datetime
+
+import numpy as np
+
+MAGIC = b'OBK1'
+CHUNK_HEADER = struct.Struct('<IIIqq')
+SNAPSHOT, DELTA = 0, 1
+BID, ASK = 0, 1
+
+
+# ==============================================================================
+# Book state
+# ==============================================================================
+
+class OrderBook:
+    """Price level -> quantity per side, both as fixed-point ints"""
+
+    def __init__(self, price_decimals=8, qty_decimals=8):
+        self.price_scale = 10 ** price_decimals
+        self.qty_scale = 10 ** qty_decimals
+        self.bids = {}
+        self.asks = {}
+        self.timestamp = None
+
+    def apply(self, side, price, qty):
+        levels = self.bids if side == BID else self.asks
+        if qty:
+            levels[price] = qty
+        else:
+            levels.pop(price, None)
+
+    def clear(self):
+        self.bids.clear()
+        self.asks.clear()
+
+    def levels(self, side):
+        """(prices, quantities) as float arrays, best first"""
+        levels = self.bids if side == BID else self.asks
+        prices = np.fromiter(levels, dtype=np.int64, count=len(levels))
+        prices.sort()
+        if side == BID:
+            prices = prices[::-1]
+        qtys = np.fromiter((levels[p] for p in prices.tolist()), dtype=np.int64, count=len(prices))
+        return prices / self.price_scale, qtys / self.qty_scale
+
+    @property
+    def best_bid(self):
+        return max(self.bids) / self.price_scale if self.bids else None
+
+    @property
+    def best_ask(self):
+        return min(self.asks) / self.price_scale if self.asks else None
+
+    @property
+    def mid(self):
+        if not self.bids or not self.asks:
+            return None
+        return (self.best_bid + self.best_ask) / 2
+
+    @property
+    def spread_bps(self):
+        mid = self.mid
+        return None if mid is None else (self.best_ask - self.best_bid) / mid * 10_000
+
+
+def walk_book(prices, qtys, quantity):
+    """
+    Fill `quantity` against levels best first
+
+    Returns:
+        (average price, filled quantity); filled < quantity when the book is too thin
+    """
+    if quantity <= 0 or len(prices) == 0:
+        return None, 0.0
+    cumulative = np.cumsum(qtys)
+    last = int(np.searchsorted(cumulative, quantity))
+    if last >= len(prices):
+        filled = float(cumulative[-1])
+        return float(np.dot(prices, qtys)) / filled, filled
+    taken = qtys[:last + 1].copy()
+    taken[-1] = quantity - (cumulative[last - 1] if last else 0.0)
+    return float(np.dot(prices[:last + 1], taken)) / quantity, float(quantity)
+
+
+# ==============================================================================
+# Writer
+# ==============================================================================
+
+class OrderBookWriter:
+    """Appends snapshots / deltas to an .obk file in compressed keyframed chunks"""
+
+    def __init__(self, path, symbol, exchange, price_decimals=8, qty_decimals=8,
+                 chunk_messages=1000, compress_level=6):
+        self.path = path
+        self.chunk_messages = chunk_messages
+        self.compress_level = compress_level
+        self.book = OrderBook(price_decimals, qty_decimals)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'ab')
+        if new_file:
+            meta = json.dumps({'symbol': symbol, 'exchange': exchange,
+                               'price_decimals': price_decimals, 'qty_decimals': qty_decimals}).encode()
+            self._file.write(MAGIC + struct.pack('<I', len(meta)) + meta)
+        self._reset_chunk()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _reset_chunk(self):
+        self._ts = []
+        self._kinds = []
+        self._counts = []
+        self._sides = []
+        self._prices = []
+        self._qtys = []
+
+    def _fixed(self, levels):
+        price_scale, qty_scale = self.book.price_scale, self.book.qty_scale
+        return [(int(round(float(p) * price_scale)), int(round(float(q) * qty_scale))) for p, q in levels]
+
+    def write_snapshot(self, timestamp, bids, asks):
+        """Full book [(price, qty), ...]; stored as the change against the previous one"""
+        new_bids = dict(self._fixed(bids))
+        new_asks = dict(self._fixed(asks))
+        changes = []
+        for side, old, new in ((BID, self.book.bids, new_bids), (ASK, self.book.asks, new_asks)):
+            changes += [(side, p, 0) for p in old if p not in new]
+            changes += [(side, p, q) for p, q in new.items() if old.get(p) != q]
+        self._write(timestamp, changes)
+
+    def write_delta(self, timestamp, bids=(), asks=()):
+        """Changed levels only [(price, qty)], qty 0 removes (e.g. a websocket delta feed)"""
+        changes = [(BID, p, q) for p, q in self._fixed(bids)] + [(ASK, p, q) for p, q in self._fixed(asks)]
+        self._write(timestamp, changes)
+
+    def _write(self, timestamp, changes):
+        for side, price, qty in changes:
+            self.book.apply(side, price, qty)
+        self.book.timestamp = int(timestamp)
+
+        if not self._ts:
+            # Keyframe: every chunk starts from the full book
+            kind = SNAPSHOT
+            changes = [(BID, p, q) for p, q in self.book.bids.items()] + \
+                      [(ASK, p, q) for p, q in self.book.asks.items()]
+        else:
+            kind = DELTA
+        self._ts.append(int(timestamp))
+        self._kinds.append(kind)
+        self._counts.append(len(changes))
+        for side, price, qty in changes:
+            self._sides.append(side)
+            self._prices.append(price)
+            self._qtys.append(qty)
+
+        if len(self._ts) >= self.chunk_messages:
+            self.flush()
+
+    def flush(self):
+        if not self._ts:
+            return
+        ts = np.array(self._ts, dtype=np.int64)
+        prices = np.array(self._prices, dtype=np.int64)
+        payload = b''.join((
+            np.diff(ts, prepend=ts[0]).tobytes(),
+            np.array(self._kinds, dtype=np.uint8).tobytes(),
+            np.array(self._counts, dtype=np.uint32).tobytes(),
+            np.array(self._sides, dtype=np.uint8).tobytes(),
+            np.diff(prices, prepend=0).tobytes(),
+            np.array(self._qtys, dtype=np.int64).tobytes(),
+        ))
+        compressed = zlib.compress(payload, self.compress_level)
+        self._file.write(CHUNK_HEADER.pack(len(compressed), len(ts), len(prices), ts[0], ts[-1]))
+        self._file.write(compressed)
+        self._file.flush()
+        self._reset_chunk()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+
+# ==============================================================================
+# Reader / replay
+# ==============================================================================
+
+class OrderBookReader:
+    """Reads an .obk file one chunk at a time"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(4) != MAGIC:
+                raise ValueError(f"{path} is not an order-book file")
+            (length,) = struct.unpack('<I', f.read(4))
+            self.meta = json.loads(f.read(length))
+            self._data_start = f.tell()
+
+    def new_book(self):
+        return OrderBook(self.meta['price_decimals'], self.meta['qty_decimals'])
+
+    def headers(self):
+        """[(offset of payload, n_messages, n_levels, first_ts, last_ts, size)] of complete chunks"""
+        headers = []
+        with open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            f.seek(self._data_start)
+            while True:
+                header = f.read(CHUNK_HEADER.size)
+                if len(header) < CHUNK_HEADER.size:
+                    break
+                size, n_messages, n_levels, first_ts, last_ts = CHUNK_HEADER.unpack(header)
+                offset = f.tell()
+                if offset + size > end:
+                    break       # torn write at the end of a file being recorded
+                headers.append((offset, n_messages, n_levels, first_ts, last_ts, size))
+                f.seek(size, os.SEEK_CUR)
+        return headers
+
+    def chunks(self, start_ms=None, end_ms=None):
+        """
+        Yield (n_messages, n_levels, first_ts, last_ts, payload) covering [start_ms, end_ms]
+
+        Starts at the last chunk beginning at or before start_ms, since the
+        book as of start_ms may come from a chunk that ended earlier.
+        """
+        headers = self.headers()
+        first = 0
+        if start_ms is not None:
+            starts = [h[3] for h in headers]
+            first = max(int(np.searchsorted(starts, start_ms, side='right')) - 1, 0)
+        with open(self.path, 'rb') as f:
+            for offset, n_messages, n_levels, first_ts, last_ts, size in headers[first:]:
+                if end_ms is not None and first_ts > end_ms:
+                    return
+                f.seek(offset)
+                yield n_messages, n_levels, first_ts, last_ts, f.read(size)
+
+    def messages(self, start_ms=None, end_ms=None):
+        """
+        Yield (timestamp, kind, sides, prices, qtys) per message, fixed-point ints
+
+        Starts at the keyframe of the chunk holding the book as of start_ms,
+        so the first messages may precede start_ms; stops after end_ms.
+        """
+        for n_messages, n_levels, first_ts, _, payload in self.chunks(start_ms, end_ms):
+            raw = zlib.decompress(payload)
+            offset = 0
+
+            def take(dtype, count):
+                nonlocal offset
+                array = np.frombuffer(raw, dtype=dtype, count=count, offset=offset)
+                offset += array.nbytes
+                return array
+
+            ts = np.cumsum(take(np.int64, n_messages)) + first_ts
+            kinds = take(np.uint8, n_messages)
+            counts = take(np.uint32, n_messages)
+            sides = take(np.uint8, n_levels)
+            prices = np.cumsum(take(np.int64, n_levels))
+            qtys = take(np.int64, n_levels)
+
+            bounds = np.concatenate(([0], np.cumsum(counts, dtype=np.int64))).tolist()
+            for i, t in enumerate(ts.tolist()):
+                if end_ms is not None and t > end_ms:
+                    return
+                lo, hi = bounds[i], bounds[i + 1]
+                yield t, int(kinds[i]), sides[lo:hi], prices[lo:hi], qtys[lo:hi]
+
+
+class BookCursor:
+    """Order book as of a time, moving forward through one or more .obk files"""
+
+    def __init__(self, paths):
+        self.readers = [OrderBookReader(p) for p in ([paths] if isinstance(paths, str) else paths)]
+        if not self.readers:
+            raise ValueError("No order-book files given")
+        self.readers.sort(key=lambda r: r.headers()[0][3] if r.headers() else 0)
+        self._restart(None)
+
+    def _restart(self, start_ms):
+        self.book = self.readers[0].new_book()
+        self._messages = (m for r in self.readers for m in r.messages(start_ms))
+        self._pending = next(self._messages, None)
+        self._position = start_ms
+
+    def at(self, timestamp_ms):
+        """The book after the last message at or before timestamp_ms (None before the first)"""
+        if self._position is not None and timestamp_ms < self._position:
+            self._restart(timestamp_ms)
+        elif self._position is None:
+            self._restart(timestamp_ms)
+        self._position = timestamp_ms
+
+        while self._pending is not None and self._pending[0] <= timestamp_ms:
+            ts, kind, sides, prices, qtys = self._pending
+            if kind == SNAPSHOT:
+                self.book.clear()
+            for side, price, qty in zip(sides.tolist(), prices.tolist(), qtys.tolist()):
+                self.book.apply(side, price, qty)
+            self.book.timestamp = ts
+            self._pending = next(self._messages, None)
+        return self.book if self.book.timestamp is not None else None
+
+
+class BookFillModel:
+    """
+    Fill prices from recorded order books, for the backtest strategies
+
+    The fill is the VWAP of walking the recorded book for the order size,
+    expressed relative to that book's mid and applied to the strategy's
+    reference price (the candle close). Falls back to the reference price
+    when no book was recorded within `max_staleness_ms`.
+    """
+
+    def __init__(self, paths, max_staleness_ms=60_000):
+        self.cursor = BookCursor(paths)
+        self.max_staleness_ms = max_staleness_ms
+        self.fills = 0
+        self.fallbacks = 0
+        self.partial = 0
+        self.slippage_bps = 0.0     # summed over modelled fills
+
+    def fill(self, side, timestamp_ms, quantity, reference_price):
+        book = self.cursor.at(int(timestamp_ms))
+        if book is None or timestamp_ms - book.timestamp > self.max_staleness_ms or book.mid is None:
+            self.fallbacks += 1
+            return reference_price
+
+        prices, qtys = book.levels(ASK if side == 'BUY' else BID)
+        vwap, filled = walk_book(prices, qtys, quantity)
+        if vwap is None:
+            self.fallbacks += 1
+            return reference_price
+        if filled < quantity:
+            # Book too thin: the rest goes at the worst recorded level
+            self.partial += 1
+            vwap = (vwap * filled + prices[-1] * (quantity - filled)) / quantity
+
+        slippage = vwap / book.mid
+        self.fills += 1
+        self.slippage_bps += abs(slippage - 1) * 10_000
+        return reference_price * slippage
+
+    def stats(self):
+        return {
+            'fills': self.fills,
+            'fallbacks': self.fallbacks,
+            'partial': self.partial,
+            'avg_slippage_bps': self.slippage_bps / self.fills if self.fills else 0.0,
+        }
+
+
+# ==============================================================================
+# Recording
+# ==============================================================================
+
+def fetch_orderbook(exchange, symbol, depth=15):
+    """(timestamp ms, bids, asks) from the exchange REST API; levels best first"""
+    import requests
+
+    if exchange == 'coinone':
+        url = f'https://api.coinone.co.kr/public/v2/orderbook/KRW/{symbol}'
+        data = requests.get(url, params={'size': depth}, timeout=10).json()
+        if data.get('result') != 'success':
+            raise ValueError(f"API Error: {data.get('error_message', 'Unknown error')}")
+        bids = [(b['price'], b['qty']) for b in data.get('bids', [])]
+        asks = [(a['price'], a['qty']) for a in data.get('asks', [])]
+        return int(data.get('timestamp') or time.time() * 1000), bids, asks
+
+    if exchange == 'bybit':
+        url = 'https://api.bybit.com/v5/market/orderbook'
+        data = requests.get(url, params={'category': 'spot', 'symbol': symbol, 'limit': depth}, timeout=10).json()
+        if data.get('retCode') != 0:
+            raise ValueError(f"API Error: {data.get('retMsg', 'Unknown error')}")
+        result = data['result']
+        return int(result['ts']), result['b'], result['a']
+
+    raise ValueError(f"Unknown exchange: {exchange}")
+
+
+def record(exchange, symbol, directory='orderbooks', interval=1.0, depth=15, duration=None):
+    """Poll snapshots into one file per UTC day until interrupted (or `duration` seconds)"""
+    writer = None
+    day = None
+    count = 0
+    started = time.time()
+    try:
+        while duration is None or time.time() - started < duration:
+            tick = time.time()
+            try:
+                timestamp, bids, asks = fetch_orderbook(exchange, symbol, depth)
+            except Exception as e:
+                print(f"✗ {e}")
+                time.sleep(interval)
+                continue
+
+            today = datetime.utcfromtimestamp(timestamp / 1000).strftime('%Y%m%d')
+            if today != day:
+                if writer is not None:
+                    writer.close()
+                day = today
+                path = os.path.join(directory, f'{exchange}_{symbol}_{day}.obk')
+                writer = OrderBookWriter(path, symbol, exchange)
+                print(f"✓ Recording {exchange} {symbol} -> {path}")
+
+            writer.write_snapshot(timestamp, bids, asks)
+            count += 1
+            if count % 600 == 0:
+                print(f"  {count} snapshots, spread {writer.book.spread_bps or 0:.1f} bps")
+            time.sleep(max(0.0, interval - (time.time() - tick)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def replay_summary(paths, quantity):
+    """Spread / slippage statistics over recorded books"""
+    readers = [OrderBookReader(p) for p in paths]
+    spreads, buy_bps, sell_bps = [], [], []
+    for reader in readers:
+        book = reader.new_book()
+        for ts, kind, sides, prices, qtys in reader.messages():
+            if kind == SNAPSHOT:
+                book.clear()
+            for side, price, qty in zip(sides.tolist(), prices.tolist(), qtys.tolist()):
+                book.apply(side, price, qty)
+            mid = book.mid
+            if mid is None:
+                continue
+            spreads.append(book.spread_bps)
+            for side, out in ((ASK, buy_bps), (BID, sell_bps)):
+                vwap, filled = walk_book(*book.levels(side), quantity)
+                if filled >= quantity:
+                    out.append(abs(vwap / mid - 1) * 10_000)
+    return {
+        'snapshots': len(spreads),
+        'avg_spread_bps': float(np.mean(spreads)) if spreads else None,
+        'avg_buy_slippage_bps': float(np.mean(buy_bps)) if buy_bps else None,
+        'avg_sell_slippage_bps': float(np.mean(sell_bps)) if sell_bps else None,
+        'fillable_pct': 100 * len(buy_bps) / len(spreads) if spreads else None,
+    }
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Order-book recorder / replay')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    rec = commands.add_parser('record', help='Record order-book snapshots')
+    rec.add_argument('--exchange', choices=('coinone', 'bybit'), default='coinone')
+    rec.add_argument('--symbol', default='XRP', help='XRP for Coinone, XRPUSDT for Bybit')
+    rec.add_argument('--dir', default='orderbooks')
+    rec.add_argument('--interval', type=float, default=1.0, help='Seconds between snapshots')
+    rec.add_argument('--depth', type=int, default=15)
+    rec.add_argument('--duration', type=float, help='Stop after N seconds')
+
+    rep = commands.add_parser('replay', help='Spread / slippage summary of recorded files')
+    rep.add_argument('files', nargs='+')
+    rep.add_argument('--quantity', type=float, default=1000, help='Order size (base currency)')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        count = record(args.exchange, args.symbol, args.dir, args.interval, args.depth, args.duration)
+        print(f"✓ Recorded {count} snapshots")
+    else:
+        summary = replay_summary(args.files, args.quantity)
+        print(f"\n{'='*70}")
+        print(f"호가 리플레이 - 주문 수량 {args.quantity:g}")
+        print(f"{'='*70}")
+        for key, value in summary.items():
+            print(f"{key:>24}: {value if value is None else round(value, 3)}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+포트폴리오 백테스트 - 다중 심볼, 공유 자본
+
+Every other backtest here trades one symbol with 95% of capital per trade.
+The bot would realistically pick among many KRW pairs, so this lays out
+symbols x bars as 2D arrays, computes indicators and the entry / exit rules
+for every symbol at once, and then walks the bars once, allocating one
+shared cash balance under a max-concurrent-positions limit.
+
+Rules are strategy_combined's (coinone_xrp_backtest), with the scanners'
+indicator formulas:
+    entry: EMA50 > EMA200 AND (RSI < 35 OR close <= BB lower x 1.002) AND EMA9 rising
+    exit:  EMA50 <= EMA200, 2% stop loss, RSI > 65 or close >= BB upper x 0.998
+When more symbols signal than there are free slots, the most oversold
+(lowest RSI) are taken. Each new position gets equity / max_positions,
+capped by the cash left.
+
+Usage:
+    data = align_symbols({'XRP': candles_xrp, 'BTC': candles_btc, ...})
+    trades, result = run_portfolio(data, max_positions=5)
+
+    python3 portfolio_backtest.py --limit 50 --max-positions 5
+"""
+
+import argparse
+
+import numpy as np
+
+from backtest_metrics import max_drawdown_pct
+from indicator_series import rsi_series, ema_series, bollinger_series
+from trade_log import PortfolioTradeLog, EXIT_REASONS, BUY, SELL
+
+STOP_LOSS = EXIT_REASONS.index('STOP_LOSS')
+TREND_REVERSAL = EXIT_REASONS.index('TREND_REVERSAL')
+RSI_EXIT = EXIT_REASONS.index('RSI')
+BB_EXIT = EXIT_REASONS.index('BB')
+END = EXIT_REASONS.index('END')
+
+
+# ==============================================================================
+# Data layout
+# ==============================================================================
+
+class PortfolioData:
+    """Symbols x bars price arrays on one shared timeline"""
+
+    __slots__ = ('symbols', 'timestamps', 'open', 'high', 'low', 'close', 'volume', 'valid')
+
+    def __init__(self, symbols, timestamps, open, high, low, close, volume, valid):
+        self.symbols = symbols
+        self.timestamps = timestamps    # int64 ms, shape (bars,)
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close              # forward-filled across gaps, NaN before listing
+        self.volume = volume
+        self.valid = valid              # True where the symbol had a real candle
+
+
+def align_symbols(candles_by_symbol):
+    """
+    Put CandleColumns of several symbols on the union of their timestamps
+
+    Missing bars are marked invalid (no trading there); close is carried
+    forward through them so indicators and valuation stay defined.
+    """
+    symbols = list(candles_by_symbol)
+    timestamps = np.unique(np.concatenate([candles_by_symbol[s].timestamp for s in symbols]))
+    shape = (len(symbols), len(timestamps))
+
+    arrays = {field: np.full(shape, np.nan) for field in ('open', 'high', 'low', 'close', 'volume')}
+    valid = np.zeros(shape, dtype=bool)
+    for row, symbol in enumerate(symbols):
+        candles = candles_by_symbol[symbol]
+        cols = np.searchsorted(timestamps, candles.timestamp)
+        for field in arrays:
+            arrays[field][row, cols] = getattr(candles, field)
+        valid[row, cols] = True
+
+    # Forward-fill close over gaps (index of the last valid bar, per row)
+    last = np.where(valid, np.arange(shape[1]), 0)
+    np.maximum.accumulate(last, axis=1, out=last)
+    listed = np.maximum.accumulate(valid, axis=1)
+    close = np.take_along_axis(arrays['close'], last, axis=1)
+    close[~listed] = np.nan
+    arrays['volume'][~valid] = 0.0
+
+    return PortfolioData(symbols, timestamps, arrays['open'], arrays['high'], arrays['low'],
+                         close, arrays['volume'], valid)
+
+
+def compute_indicators(data):
+    """RSI14, BB(20, 2), EMA9/50/200 for every symbol (symbols x bars)"""
+    close = data.close
+    names = ('rsi', 'bb_upper', 'bb_lower', 'ema9', 'ema50', 'ema200')
+    indicators = {name: np.full(close.shape, np.nan) for name in names}
+
+    # Symbols listed later start with NaN; compute each listing-start group
+    # on its own suffix so those NaNs don't poison the EMA recurrence.
+    first = np.argmax(~np.isnan(close), axis=1)
+    first[np.isnan(close).all(axis=1)] = close.shape[1]
+    for start in np.unique(first):
+        rows = np.flatnonzero(first == start)
+        if start >= close.shape[1]:
+            continue
+        block = close[rows, start:]
+        upper, _, lower = bollinger_series(block, 20, 2.0)
+        values = {
+            'rsi': rsi_series(block, 14),
+            'bb_upper': upper,
+            'bb_lower': lower,
+            'ema9': ema_series(block, 9),
+            'ema50': ema_series(block, 50),
+            'ema200': ema_series(block, 200),
+        }
+        for name in names:
+            indicators[name][rows, start:] = values[name]
+    return indicators
+
+
+def combined_signals(data, indicators):
+    """
+    strategy_combined rules for all symbols x bars at once
+
+    Returns:
+        dict of symbols x bars arrays: entry, exit (signal-based, before the
+        position-dependent stop loss), exit_reason codes and score
+    """
+    close = data.close
+    rsi = indicators['rsi']
+    ema9 = indicators['ema9']
+    ema9_prev = np.concatenate((np.full((len(close), 1), np.nan), ema9[:, :-1]), axis=1)
+    ema50, ema200 = indicators['ema50'], indicators['ema200']
+
+    with np.errstate(invalid='ignore'):
+        ready = ~(np.isnan(rsi) | np.isnan(indicators['bb_lower']) | np.isnan(ema50) | np.isnan(ema200))
+        in_uptrend = ema50 > ema200
+        rsi_signal = rsi < 35
+        bb_signal = close <= indicators['bb_lower'] * 1.002
+        ema_trending_up = ema9 > ema9_prev
+
+        rsi_exit = rsi > 65
+        bb_exit = close >= indicators['bb_upper'] * 0.998
+        trend_reversal = ema50 <= ema200
+
+    entry = ready & data.valid & in_uptrend & (rsi_signal | bb_signal) & ema_trending_up
+    exit_signal = ready & (trend_reversal | rsi_exit | bb_exit)
+    # Reason priority as in strategy_combined (stop loss is slotted in per bar)
+    reason = np.where(trend_reversal, TREND_REVERSAL, np.where(rsi_exit, RSI_EXIT, BB_EXIT)).astype(np.uint8)
+    return {
+        'entry': entry,
+        'exit': exit_signal,
+        'exit_reason': reason,
+        'trend_reversal': trend_reversal,
+        'score': np.where(np.isnan(rsi), np.inf, rsi),   # lower RSI = more oversold = first pick
+    }
+
+
+# ==============================================================================
+# Simulation
+# ==============================================================================
+
+def run_portfolio(data, signals=None, initial_capital=1_000_000, max_positions=5,
+                  fee_rate=0.0002, stop_loss_pct=0.02):
+    """
+    Walk the bars once with shared cash; every step is vectorized over symbols
+
+    Returns:
+        (PortfolioTradeLog, result dict)
+    """
+    if signals is None:
+        signals = combined_signals(data, compute_indicators(data))
+
+    n_symbols, n_bars = data.close.shape
+    # Bar-major copies so each step reads contiguous rows
+    close = np.ascontiguousarray(data.close.T)
+    valid = np.ascontiguousarray(data.valid.T)
+    entry = np.ascontiguousarray(signals['entry'].T)
+    exit_signal = np.ascontiguousarray(signals['exit'].T)
+    exit_reason = np.ascontiguousarray(signals['exit_reason'].T)
+    trend_reversal = np.ascontiguousarray(signals['trend_reversal'].T)
+    score = np.ascontiguousarray(signals['score'].T)
+    times = data.timestamps.astype('datetime64[ms]')
+
+    trades = PortfolioTradeLog(data.symbols)
+    cash = float(initial_capital)
+    holding = np.zeros(n_symbols, dtype=bool)
+    quantity = np.zeros(n_symbols)
+    entry_price = np.zeros(n_symbols)
+    cost = np.zeros(n_symbols)           # cash spent on the open position
+    equity = np.empty(n_bars)
+    open_positions = np.empty(n_bars, dtype=np.int64)
+
+    def sell(idx, t, price, reasons):
+        nonlocal cash
+        proceeds = quantity[idx] * price * (1 - fee_rate)
+        cash += float(proceeds.sum())
+        trades.extend(timestamp=np.repeat(times[t], len(idx)), symbol=idx, type=SELL, price=price,
+                      quantity=quantity[idx], profit=proceeds - cost[idx], cash=cash, exit_reason=reasons)
+        holding[idx] = False
+        quantity[idx] = 0.0
+
+    for t in range(n_bars):
+        price = close[t]
+
+        # Exits first, so freed capital / slots are usable on the same bar
+        if holding.any():
+            with np.errstate(invalid='ignore'):
+                stop = holding & (price <= entry_price * (1 - stop_loss_pct))
+            leaving = holding & valid[t] & (exit_signal[t] | stop)
+            if leaving.any():
+                idx = np.flatnonzero(leaving)
+                reasons = np.where(trend_reversal[t, idx], TREND_REVERSAL,
+                                   np.where(stop[idx], STOP_LOSS, exit_reason[t, idx]))
+                sell(idx, t, price[idx], reasons)
+                leaving_now = leaving
+            else:
+                leaving_now = None
+        else:
+            leaving_now = None
+
+        free = max_positions - int(holding.sum())
+        if free > 0:
+            candidates = entry[t] & ~holding
+            if leaving_now is not None:
+                candidates &= ~leaving_now
+            if candidates.any():
+                idx = np.flatnonzero(candidates)
+                if len(idx) > free:
+                    idx = idx[np.argsort(score[t, idx], kind='stable')[:free]]
+                marked = cash + float((quantity[holding] * price[holding]).sum())
+                budget = min(marked / max_positions, cash / len(idx))
+                if budget > 0:
+                    buy_price = price[idx]
+                    quantity[idx] = budget * (1 - fee_rate) / buy_price
+                    entry_price[idx] = buy_price
+                    cost[idx] = budget
+                    holding[idx] = True
+                    cash -= budget * len(idx)
+                    trades.extend(timestamp=np.repeat(times[t], len(idx)), symbol=idx, type=BUY,
+                                  price=buy_price, quantity=quantity[idx], profit=np.nan, cash=cash,
+                                  exit_reason=0)
+
+        equity[t] = cash + float((quantity[holding] * price[holding]).sum())
+        open_positions[t] = int(holding.sum())
+
+    # Close whatever is still open at the last price
+    if holding.any():
+        idx = np.flatnonzero(holding)
+        sell(idx, n_bars - 1, close[n_bars - 1, idx], END)
+        equity[-1] = cash
+
+    return trades, summarize(trades, equity, open_positions, initial_capital)
+
+
+def summarize(trades, equity, open_positions, initial_capital):
+    records = trades.records
+    sells = records[records['type'] == SELL]
+    profits = sells['profit']
+
+    return {
+        'initial_capital': initial_capital,
+        'final_equity': float(equity[-1]) if len(equity) else float(initial_capital),
+        'total_return_pct': (float(equity[-1]) / initial_capital - 1) * 100 if len(equity) else 0.0,
+        'total_trades': int(len(sells)),
+        'win_rate': float((profits > 0).mean() * 100) if len(profits) else 0.0,
+        'avg_profit': float(profits.mean()) if len(profits) else 0.0,
+        # Positive %, as backtest_metrics / strategy_tuner / bayes_tuner report it
+        'max_drawdown_pct': float(max_drawdown_pct(equity)),
+        'max_concurrent_positions': int(open_positions.max()) if len(open_positions) else 0,
+        'exposure_pct': float((open_positions > 0).mean() * 100) if len(open_positions) else 0.0,
+        'symbols_traded': int(len(np.unique(sells['symbol']))),
+        'equity_curve': equity,
+    }
+
+
+def print_results(data, trades, result, top=10):
+    print(f"\n{'='*80}")
+    print(f"포트폴리오 백테스트 - {len(data.symbols)}개 심볼, {len(data.timestamps)}개 캔들")
+    print(f"{'='*80}")
+    print(f"초기 자본:      {result['initial_capital']:>15,.0f} KRW")
+    print(f"최종 평가액:    {result['final_equity']:>15,.0f} KRW ({result['total_return_pct']:+.2f}%)")
+    print(f"거래 수:        {result['total_trades']:>15} (승률 {result['win_rate']:.1f}%)")
+    print(f"최대 낙폭:      {result['max_drawdown_pct']:>14.2f}%")
+    print(f"최대 동시 포지션: {result['max_concurrent_positions']:>13} | 노출 {result['exposure_pct']:.1f}%")
+
+    records = trades.records
+    sells = records[records['type'] == SELL]
+    if len(sells):
+        per_symbol = np.bincount(sells['symbol'], weights=sells['profit'], minlength=len(data.symbols))
+        print(f"\n심볼별 손익 (상위 {top}):")
+        for i in np.argsort(per_symbol)[::-1][:top]:
+            if per_symbol[i] != 0:
+                print(f"  {data.symbols[i]:>8}: {per_symbol[i]:>+12,.0f} KRW")
+    print()
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def fetch_krw_symbols(limit):
+    import requests
+
+    response = requests.get('https://api.coinone.co.kr/public/v2/markets/KRW', timeout=10)
+    markets = response.json().get('markets', [])
+    return [m['target_currency'] for m in markets][:limit]
+
+
+def main():
+    import requests
+    from candle_decoder import decode_coinone_chart
+
+    parser = argparse.ArgumentParser(description='Multi-symbol shared-capital backtest')
+    parser.add_argument('--symbols', nargs='+', help='Symbols (default: Coinone KRW markets)')
+    parser.add_argument('--limit', type=int, default=30, help='Max symbols when listing markets')
+    parser.add_argument('--interval', default='5m')
+    parser.add_argument('--size', type=int, default=500, help='Candles per symbol')
+    parser.add_argument('--capital', type=float, default=1_000_000)
+    parser.add_argument('--max-positions', type=int, default=5)
+    args = parser.parse_args()
+
+    symbols = args.symbols or fetch_krw_symbols(args.limit)
+    candles = {}
+    for symbol in symbols:
+        url = f'https://api.coinone.co.kr/public/v2/chart/KRW/{symbol}'
+        response = requests.get(url, params={'interval': args.interval, 'size': args.size}, timeout=10)
+        try:
+            candles[symbol] = decode_coinone_chart(response.content)
+        except ValueError as e:
+            print(f"✗ {symbol}: {e}")
+    print(f"✓ Fetched candles for {len(candles)} symbols")
+
+    data = align_symbols(candles)
+    trades, result = run_portfolio(data, initial_capital=args.capital, max_positions=args.max_positions)
+    print_results(data, trades, result)
+
+
+if __name__ == '__main__':
+    main()
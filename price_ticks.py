@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Integer tick representation for prices and quantities
+
+Prices arrive as decimal strings, become float64 and are then compared
+against thresholds like entry_price * (1 - stop_loss_pct). KRW markets
+trade on a fixed price unit (tick) and quantity unit per symbol, so every
+real price is an integer number of ticks. TickSpec holds those units
+(Coinone /public/v2/markets price_unit / qty_unit, or the finest decimal
+step a price history uses) and converts:
+
+    float64 columns -> int ticks    vectorized; refuses prices off the grid
+    int ticks -> float64            ticks x multiplier / 10^decimals, correctly
+                                    rounded, so it gives back exactly the float
+                                    the decimal string parses to
+    decimal string <-> int ticks    via Decimal, never through a float, for
+                                    order prices / quantities
+
+Price ticks are stored as int32 when the symbol's range allows (half the
+float64 size), volumes as int64 in VOLUME_UNIT steps. Thresholds become
+integer tick levels (stop_ticks rounds down, target_ticks up), so a
+comparison such as low <= stop is exact.
+
+The markets API only reports today's price unit, and the unit can depend
+on the price band, so stored candles are encoded on their own finest step
+(candle_tick_spec); the fetched spec is for checking order prices.
+
+Usage:
+    ticks = tick_candles_for(store, 'XRP', '5m')    # on the candles' own step
+    stop = ticks.spec.stop_ticks(ticks.close[i], 2.0)   # 2% below, on that grid
+    hit = ticks.low[i + 1:] <= stop
+    market = tick_spec_for('XRP')                   # markets API, for orders
+    payload['price'] = market.format_price(market.parse_price(price_text))
+
+    python3 price_ticks.py --symbol XRP --interval 5m
+"""
+
+import argparse
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+
+from candle_decoder import CandleColumns
+
+TICK_VERSION = 'v1'
+VOLUME_UNIT = '0.00000001'      # candle volumes carry up to 8 decimals
+BASIS_POINTS = 10000
+
+
+# ==============================================================================
+# Tick sizes
+# ==============================================================================
+
+class Unit:
+    """A decimal step (e.g. '0.1', '5') as multiplier x 10^-decimals"""
+
+    def __init__(self, text):
+        try:
+            value = Decimal(str(text)).normalize()
+        except InvalidOperation:
+            raise ValueError(f"Invalid unit {text!r}")
+        if value <= 0:
+            raise ValueError(f"Unit must be positive, got {text!r}")
+        sign, digits, exponent = value.as_tuple()
+        self.text = str(text)
+        self.decimals = max(0, -exponent)
+        self.multiplier = int(value.scaleb(self.decimals))
+        self.decimal = value
+
+    def __repr__(self):
+        return f"Unit({self.text!r})"
+
+    def to_ticks(self, values, dtype=np.int64):
+        """Float array -> integer steps; ValueError if any value is off the grid"""
+        values = np.asarray(values, dtype=np.float64)
+        ticks = np.rint(values * 10.0 ** self.decimals / self.multiplier)
+        if len(ticks) and np.abs(ticks).max() >= np.iinfo(dtype).max:
+            raise ValueError(f"Values too large for {np.dtype(dtype).name} steps of {self.text}")
+        ticks = ticks.astype(dtype)
+        off = np.count_nonzero(self.to_values(ticks) != values)
+        if off:
+            raise ValueError(f"{off} of {len(values)} values are not multiples of {self.text}")
+        return ticks
+
+    def on_grid(self, values):
+        """Bool array: which float values are whole multiples of the unit"""
+        values = np.asarray(values, dtype=np.float64)
+        return self.to_values(np.rint(values * 10.0 ** self.decimals / self.multiplier)) == values
+
+    def to_values(self, ticks):
+        """Integer steps -> float64; exact products, one correctly rounded division"""
+        return np.asarray(ticks, dtype=np.int64) * self.multiplier / 10.0 ** self.decimals
+
+    def parse(self, text):
+        """Decimal string -> int steps, without going through a float"""
+        try:
+            steps = Decimal(str(text)) / self.decimal
+        except InvalidOperation:
+            raise ValueError(f"Invalid number {text!r}")
+        if steps != steps.to_integral_value():
+            raise ValueError(f"{text} is not a multiple of {self.text}")
+        return int(steps)
+
+    def format(self, ticks):
+        """int steps -> plain decimal string ('3000.1', '2', '0.0001')"""
+        value = (Decimal(int(ticks)) * self.decimal).quantize(Decimal(1).scaleb(-self.decimals))
+        return f"{value:f}"
+
+
+class TickSpec:
+    """Price / quantity units of one symbol"""
+
+    def __init__(self, price_unit, qty_unit='0.0001', volume_unit=VOLUME_UNIT, source='manual'):
+        self.price = Unit(price_unit)
+        self.qty = Unit(qty_unit)
+        self.volume = Unit(volume_unit)
+        self.source = source
+
+    def __repr__(self):
+        return f"TickSpec(price_unit={self.price.text!r}, qty_unit={self.qty.text!r}, source={self.source!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, TickSpec) and self.to_meta()['units'] == other.to_meta()['units']
+
+    # Prices ----------------------------------------------------------------
+
+    def price_ticks(self, values, dtype=None):
+        """Float prices -> ticks (int32 when they fit, else int64)"""
+        values = np.asarray(values, dtype=np.float64)
+        if dtype is None:
+            largest = float(np.abs(values).max()) if len(values) else 0.0
+            dtype = np.int32 if largest * 10.0 ** self.price.decimals / self.price.multiplier < 2**31 - 1 else np.int64
+        return self.price.to_ticks(values, dtype)
+
+    def prices(self, ticks):
+        return self.price.to_values(ticks)
+
+    def parse_price(self, text):
+        return self.price.parse(text)
+
+    def format_price(self, ticks):
+        return self.price.format(ticks)
+
+    def stop_ticks(self, entry_ticks, pct):
+        """Highest tick at or below entry x (1 - pct%), in integer arithmetic (pct rounded to 0.01%)"""
+        return (int(entry_ticks) * (BASIS_POINTS - round(pct * 100))) // BASIS_POINTS
+
+    def target_ticks(self, entry_ticks, pct):
+        """Lowest tick at or above entry x (1 + pct%)"""
+        return -(-int(entry_ticks) * (BASIS_POINTS + round(pct * 100)) // BASIS_POINTS)
+
+    # Quantities ------------------------------------------------------------
+
+    def qty_ticks(self, values):
+        return self.qty.to_ticks(values)
+
+    def quantities(self, ticks):
+        return self.qty.to_values(ticks)
+
+    def parse_qty(self, text):
+        return self.qty.parse(text)
+
+    def format_qty(self, ticks):
+        return self.qty.format(ticks)
+
+    def floor_qty(self, quantity):
+        """Largest order quantity (in qty ticks) not above a float quantity"""
+        return int(Decimal(repr(float(quantity))) // self.qty.decimal)
+
+    # Metadata --------------------------------------------------------------
+
+    def to_meta(self):
+        return {'units': {'price': self.price.text, 'qty': self.qty.text, 'volume': self.volume.text},
+                'source': self.source}
+
+    @classmethod
+    def from_meta(cls, meta):
+        units = meta['units']
+        return cls(units['price'], units['qty'], units['volume'], meta.get('source', 'manual'))
+
+
+def fetch_tick_spec(symbol, quote_currency='KRW', timeout=10):
+    """TickSpec from Coinone /public/v2/markets (price_unit / qty_unit)"""
+    import requests
+
+    url = f'https://api.coinone.co.kr/public/v2/markets/{quote_currency}/{symbol.upper()}'
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    markets = data.get('markets') or []
+    if data.get('result') != 'success' or not markets:
+        raise ValueError(f"No market info for {symbol}: {data.get('error_code')}")
+    market = markets[0]
+    return TickSpec(market['price_unit'], market['qty_unit'], source='coinone')
+
+
+def fallback_tick_spec(prices):
+    """
+    Finest decimal step the prices actually use
+
+    Any exchange tick is a multiple of it, in every price band, so candles
+    encoded on it stay exact; order prices are checked against the real
+    tick with a fetched spec.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    for decimals in range(0, 9):
+        scaled = prices * 10.0 ** decimals
+        if np.array_equal(np.rint(scaled) / 10.0 ** decimals, prices):
+            return TickSpec(str(Decimal(1).scaleb(-decimals)), source='candles')
+    raise ValueError('Prices have more than 8 decimals; pass an explicit TickSpec')
+
+
+# ==============================================================================
+# Tick candles
+# ==============================================================================
+
+class TickCandles:
+    """CandleColumns with prices in ticks and volumes in VOLUME_UNIT steps"""
+
+    __slots__ = ('timestamp', 'open', 'high', 'low', 'close', 'volume', 'quote_volume', 'spec')
+    PRICE_FIELDS = ('open', 'high', 'low', 'close')
+
+    def __init__(self, timestamp, open, high, low, close, volume, quote_volume, spec):
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.quote_volume = quote_volume    # KRW turnover, not on any grid: stays float64
+        self.spec = spec
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    @classmethod
+    def encode(cls, columns, spec):
+        """ValueError if a price or volume is off the spec's grid"""
+        prices = np.concatenate([np.asarray(getattr(columns, field), dtype=np.float64)
+                                 for field in cls.PRICE_FIELDS])
+        ticks = spec.price_ticks(prices)
+        n = len(columns)
+        return cls(np.asarray(columns.timestamp, dtype=np.int64),
+                   *(ticks[k * n:(k + 1) * n] for k in range(4)),
+                   spec.volume.to_ticks(columns.volume),
+                   np.asarray(columns.quote_volume, dtype=np.float64), spec)
+
+    def to_columns(self):
+        """Back to float64 CandleColumns, bit-identical to the encoded ones"""
+        spec = self.spec
+        return CandleColumns(self.timestamp, *(spec.prices(getattr(self, field)) for field in self.PRICE_FIELDS),
+                             spec.volume.to_values(self.volume), self.quote_volume)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, field).nbytes for field in self.__slots__ if field != 'spec')
+
+    def arrays(self):
+        return {field: getattr(self, field) for field in self.__slots__ if field != 'spec'}
+
+
+def candle_tick_spec(candles):
+    """Finest decimal step the candle prices use: every stored bar is on its grid"""
+    return fallback_tick_spec(np.concatenate([np.asarray(getattr(candles, field), dtype=np.float64)
+                                              for field in TickCandles.PRICE_FIELDS]))
+
+
+def tick_spec_for(symbol, candles=None, fetch=True):
+    """
+    The market's current units, for checking order prices: the markets API
+    (fetch=True), else the finest step `candles` use
+
+    Not for encoding history: the price unit can depend on the price band,
+    so older candles may be off the current tick (see tick_candles_for).
+    """
+    if fetch:
+        try:
+            return fetch_tick_spec(symbol)
+        except Exception as e:
+            print(f"⚠ {symbol} market info unavailable ({type(e).__name__}); deriving ticks from the candles")
+    if candles is None:
+        raise ValueError(f"No market info or candles for {symbol}")
+    return candle_tick_spec(candles)
+
+
+def tick_candles_for(store, symbol, interval, spec=None, candles=None):
+    """
+    Tick-encoded candles, persisted next to the float columns
+
+    Prices are encoded on the finest step the stored candles use
+    (candle_tick_spec) unless `spec` is given, so bars from another price
+    band stay exact. Only bars newer than the stored ones (plus the last
+    stored bar, which may have been forming) are encoded; new bars on a
+    finer step, or a spec change, re-encode everything.
+    """
+    if candles is None:
+        candles = store.load(symbol, interval)
+        if candles is None:
+            raise ValueError(f"No stored candles for {symbol} {interval}")
+    name = f'ticks_{TICK_VERSION}'
+    stored = store.load_index(symbol, interval, name)
+    stored_spec = TickSpec.from_meta(stored[1]['spec']) if stored is not None else None
+
+    keep = 0
+    if stored is not None and (spec is None or stored_spec == spec):
+        arrays = stored[0]
+        n_old = len(arrays['timestamp'])
+        if n_old and len(candles) >= n_old and np.array_equal(arrays['timestamp'], candles.timestamp[:n_old]):
+            keep = n_old - 1
+    tail = CandleColumns(*(getattr(candles, field)[keep:] for field in CandleColumns.__slots__))
+    if spec is None:
+        spec = stored_spec if keep and stored_spec.source == 'candles' else None
+        if spec is None or candle_tick_spec(tail).price.decimals > spec.price.decimals:
+            spec, keep, tail = candle_tick_spec(candles), 0, candles     # new bars on a finer step
+    new = TickCandles.encode(tail, spec)
+    if keep:
+        if len(new) == 1 and all(np.array_equal(values, arrays[field][-1:]) for field, values in new.arrays().items()):
+            return TickCandles(spec=spec, **arrays)     # nothing changed
+        merged = {}
+        for field, values in new.arrays().items():
+            old = arrays[field][:keep]
+            dtype = np.promote_types(old.dtype, values.dtype)
+            merged[field] = np.concatenate((old.astype(dtype), values.astype(dtype)))
+        new = TickCandles(spec=spec, **merged)
+    store.save_index(symbol, interval, name, new.arrays(), meta={'spec': spec.to_meta()})
+    return new
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def main():
+    import time
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description='Integer tick candles')
+    parser.add_argument('--symbol', default='XRP')
+    parser.add_argument('--interval', default='5m')
+    parser.add_argument('--store', default='candle_store', help='Candle store directory')
+    parser.add_argument('--offline', action='store_true', help="Don't compare the candles with the market's current tick")
+    args = parser.parse_args()
+
+    store = CandleStore(args.store)
+    candles = store.load(args.symbol, args.interval)
+    if candles is None:
+        raise SystemExit(f"✗ No stored candles for {args.symbol} {args.interval}")
+    ticks = tick_candles_for(store, args.symbol, args.interval, candles=candles)
+    spec = ticks.spec
+    print(f"✓ {args.symbol} {args.interval}: {len(ticks):,} bars, {spec}")
+    if not args.offline:
+        market = tick_spec_for(args.symbol, candles)
+        if market.source == 'coinone':
+            off = len(candles) - int(np.count_nonzero(market.price.on_grid(candles.close)))
+            print(f"  market {market}: {off:,} stored closes off its current tick (other price bands)")
+
+    float_bytes = sum(getattr(candles, field).nbytes for field in CandleColumns.__slots__)
+    print(f"  {ticks.nbytes / 1e6:.2f} MB as ticks vs {float_bytes / 1e6:.2f} MB as float64 "
+          f"(prices {ticks.close.dtype.name})")
+
+    decoded = ticks.to_columns()
+    exact = all(np.array_equal(getattr(decoded, field), getattr(candles, field)) for field in CandleColumns.__slots__)
+    print(f"  {'✓' if exact else '✗'} decoded columns {'identical to' if exact else 'DIFFER from'} the stored floats")
+
+    # The same stop-loss scan both ways
+    entry = int(ticks.close[0])
+    stop = spec.stop_ticks(entry, 2.0)
+    started = time.perf_counter()
+    for _ in range(100):
+        hits_ticks = np.flatnonzero(ticks.low <= stop)
+    tick_ms = (time.perf_counter() - started) * 10
+    started = time.perf_counter()
+    for _ in range(100):
+        hits_float = np.flatnonzero(candles.low <= candles.close[0] * (1 - 0.02))
+    float_ms = (time.perf_counter() - started) * 10
+    print(f"  2% stop from {spec.format_price(entry)}: level {spec.format_price(stop)}, "
+          f"{len(hits_ticks):,} bars at / below ({tick_ms:.2f} ms ticks vs {float_ms:.2f} ms float, "
+          f"{len(hits_float):,} bars)")
+
+
+if __name__ == '__main__':
+    main()
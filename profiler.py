@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Opt-in stage profiler for the analysis / backtest scripts
+
+Wraps the fetch, parse, indicator, evaluate and report stages of a script and
+prints per-stage wall time, CPU time, call counts and allocated bytes.
+Disabled by default: when off, `stage()` returns a shared no-op context
+manager so the instrumented loops pay almost nothing.
+
+Enable with an env var or a CLI flag:
+    BOT_PROFILE=1 python3 coinone_xrp_backtest.py
+    python3 check_recent_entries.py --profile
+
+Optional outputs:
+    --profile-cprofile=out.pstats   (BOT_PROFILE_CPROFILE)  cProfile / pstats dump
+    --profile-flame=out.folded      (BOT_PROFILE_FLAME)     collapsed stacks for flamegraph.pl / speedscope
+"""
+
+import atexit
+import contextlib
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class StageStats:
+    """Accumulated cost of one named stage"""
+
+    __slots__ = ('name', 'calls', 'wall', 'cpu', 'alloc', 'peak')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.alloc = 0   # net bytes still allocated when the stage exits
+        self.peak = 0    # highest traced memory above the stage's entry level
+
+
+class StageProfiler:
+    """Collects per-stage timings; one instance per process (see PROFILER)"""
+
+    def __init__(self):
+        self.enabled = False
+        self.stats = {}
+        self.cprofile_path = None
+        self.flame_path = None
+        self._stack = []
+        self._cprofile = None
+        self._sampler = None
+        self._reported = False
+
+    # --------------------------------------------------------------------------
+    # Activation
+    # --------------------------------------------------------------------------
+
+    def enable(self, cprofile_path=None, flame_path=None, flame_interval=0.005):
+        """Turn profiling on; safe to call more than once"""
+        if cprofile_path:
+            self.cprofile_path = cprofile_path
+        if flame_path:
+            self.flame_path = flame_path
+
+        if not self.enabled:
+            self.enabled = True
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            atexit.register(self.report)
+
+        if self.cprofile_path and self._cprofile is None:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+        if self.flame_path and self._sampler is None:
+            self._sampler = _StackSampler(threading.main_thread().ident, flame_interval)
+            self._sampler.start()
+
+    def enable_from_env(self):
+        """Enable when BOT_PROFILE / BOT_PROFILE_CPROFILE / BOT_PROFILE_FLAME are set"""
+        cprofile_path = os.environ.get('BOT_PROFILE_CPROFILE')
+        flame_path = os.environ.get('BOT_PROFILE_FLAME')
+        if os.environ.get('BOT_PROFILE', '') not in ('', '0') or cprofile_path or flame_path:
+            self.enable(cprofile_path, flame_path)
+
+    def enable_from_argv(self, argv=None):
+        """
+        Consume --profile, --profile-cprofile=PATH and --profile-flame=PATH from argv
+
+        The flags are removed in place so the script's own argument handling
+        never sees them. Also honours the BOT_PROFILE* env vars.
+        """
+        argv = sys.argv if argv is None else argv
+        want = False
+        cprofile_path = None
+        flame_path = None
+
+        for arg in list(argv[1:]):
+            if arg == '--profile':
+                want = True
+            elif arg.startswith('--profile-cprofile='):
+                cprofile_path = arg.split('=', 1)[1]
+            elif arg.startswith('--profile-flame='):
+                flame_path = arg.split('=', 1)[1]
+            else:
+                continue
+            argv.remove(arg)
+
+        if want or cprofile_path or flame_path:
+            self.enable(cprofile_path, flame_path)
+        self.enable_from_env()
+
+    # --------------------------------------------------------------------------
+    # Instrumentation
+    # --------------------------------------------------------------------------
+
+    def stage(self, name):
+        """Context manager timing one stage; a shared no-op when disabled"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._measure(name)
+
+    def profiled(self, name):
+        """Decorator form of stage()"""
+        def decorator(func):
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            wrapper.__name__ = func.__name__
+            wrapper.__doc__ = func.__doc__
+            wrapper.__wrapped__ = func
+            return wrapper
+        return decorator
+
+    @contextlib.contextmanager
+    def _measure(self, name):
+        # tracemalloc has a single global peak, so each open stage keeps its
+        # own running peak on the stack and the counter is reset per segment.
+        mem_start, segment_peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1] = max(self._stack[-1], segment_peak)
+        tracemalloc.reset_peak()
+        self._stack.append(mem_start)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            mem_end, segment_peak = tracemalloc.get_traced_memory()
+
+            peak = max(self._stack.pop(), segment_peak)
+            tracemalloc.reset_peak()
+            if self._stack:
+                self._stack[-1] = max(self._stack[-1], peak)
+
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = StageStats(name)
+            stats.calls += 1
+            stats.wall += wall
+            stats.cpu += cpu
+            stats.alloc += mem_end - mem_start
+            stats.peak = max(stats.peak, peak - mem_start)
+
+    # --------------------------------------------------------------------------
+    # Reporting
+    # --------------------------------------------------------------------------
+
+    def report(self, file=None):
+        """Print the stage table and write the optional cProfile / flame outputs"""
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        file = file or sys.stderr
+
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_path)
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler.write(self.flame_path)
+
+        print(f"\n{'='*80}", file=file)
+        print("STAGE PROFILE", file=file)
+        print(f"{'='*80}", file=file)
+        print(f"{'Stage':<24} {'Calls':>8} {'Wall (s)':>10} {'CPU (s)':>10} "
+              f"{'Alloc':>11} {'Peak':>11}", file=file)
+        print("-"*80, file=file)
+        for s in sorted(self.stats.values(), key=lambda x: x.wall, reverse=True):
+            print(f"{s.name:<24} {s.calls:>8} {s.wall:>10.4f} {s.cpu:>10.4f} "
+                  f"{_fmt_bytes(s.alloc):>11} {_fmt_bytes(s.peak):>11}", file=file)
+        print("="*80, file=file)
+
+        if self._cprofile is not None:
+            print(f"✓ cProfile stats saved to: {self.cprofile_path} "
+                  f"(python3 -m pstats {self.cprofile_path})", file=file)
+        if self._sampler is not None:
+            print(f"✓ Collapsed stacks saved to: {self.flame_path} "
+                  f"({self._sampler.samples} samples)", file=file)
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval into collapsed-stack counts"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='stage-profiler-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.counts[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=1.0)
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _fmt_bytes(n):
+    sign = '-' if n < 0 else ''
+    n = abs(n)
+    for unit in ('B', 'KB', 'MB'):
+        if n < 1024:
+            return f"{sign}{n:.0f}{unit}" if unit == 'B' else f"{sign}{n:.1f}{unit}"
+        n /= 1024
+    return f"{sign}{n:.1f}GB"
+
+
+# Process-wide instance used by all scripts
+PROFILER = StageProfiler()
+PROFILER.enable_from_env()
+
+stage = PROFILER.stage
+profiled = PROFILER.profiled
+enable_from_argv = PROFILER.enable_from_argv
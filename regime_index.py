@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+시장 국면(regime) 구간 인덱스
+
+detect_trend(ema50, ema200, price) is evaluated per bar in every scanner,
+and the strategies only act in uptrend / sideways bars. This labels a whole
+series at once (same rule as detect_trend, vectorized), run-length encodes
+the labels into segments and persists them with the candle store, so
+backtests and scanners can jump straight to the eligible segments and skip
+downtrend spans without computing anything for them.
+
+Usage:
+    regimes = RegimeIndex.from_candles(candles)
+    for i in regimes.eligible(('uptrend', 'sideways'), start=200):
+        ...
+
+    python3 regime_index.py --symbol XRP     # fetch, store, print segments
+"""
+
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+from indicator_series import ema_series
+
+# 'unknown' = EMA200 not available yet (detect_trend is never called there)
+REGIMES = ('unknown', 'sideways', 'uptrend', 'downtrend')
+UNKNOWN, SIDEWAYS, UPTREND, DOWNTREND = range(len(REGIMES))
+
+INDEX_NAME = 'regime'
+
+
+def trend_series(ema50, ema200, price):
+    """detect_trend for every bar at once -> uint8 regime codes"""
+    ema50 = np.asarray(ema50, dtype=np.float64)
+    ema200 = np.asarray(ema200, dtype=np.float64)
+    price = np.asarray(price, dtype=np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        up = (ema50 > ema200) & (price > ema50) & ((price - ema50) / ema50 * 100 > 0.5)
+        down = (ema50 < ema200) & (price < ema50) & ((ema50 - price) / ema50 * 100 > 0.5)
+
+    codes = np.full(len(price), SIDEWAYS, dtype=np.uint8)
+    codes[up] = UPTREND
+    codes[down] = DOWNTREND
+    codes[np.isnan(ema50) | np.isnan(ema200)] = UNKNOWN
+    return codes
+
+
+def run_length_encode(codes):
+    """(starts, ends, values) of the runs in `codes`; ends are exclusive"""
+    codes = np.asarray(codes)
+    if len(codes) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.uint8)
+    starts = np.concatenate(([0], np.flatnonzero(codes[1:] != codes[:-1]) + 1))
+    ends = np.concatenate((starts[1:], [len(codes)]))
+    return starts, ends, codes[starts]
+
+
+class RegimeIndex:
+    """Run-length encoded regime labels of one candle series"""
+
+    def __init__(self, starts, ends, codes, timestamps):
+        self.starts = starts
+        self.ends = ends
+        self.codes = codes
+        self.timestamps = timestamps    # timestamp (ms) of each bar, for lookups by time
+
+    @classmethod
+    def from_series(cls, ema50, ema200, price, timestamps):
+        starts, ends, codes = run_length_encode(trend_series(ema50, ema200, price))
+        return cls(starts, ends, codes, np.asarray(timestamps, dtype=np.int64))
+
+    @classmethod
+    def from_candles(cls, columns):
+        closes = columns.close
+        return cls.from_series(ema_series(closes, 50), ema_series(closes, 200), closes, columns.timestamp)
+
+    def __len__(self):
+        """Number of segments"""
+        return len(self.starts)
+
+    @property
+    def n_bars(self):
+        return int(self.ends[-1]) if len(self.ends) else 0
+
+    def labels(self):
+        """Per-bar regime codes (decoded from the segments)"""
+        return np.repeat(self.codes, self.ends - self.starts)
+
+    def label_at(self, i):
+        """Regime name of bar i"""
+        segment = np.searchsorted(self.starts, i, side='right') - 1
+        return REGIMES[self.codes[segment]]
+
+    def segments(self, regimes=None, start=0, end=None):
+        """(start, end, regime) for segments overlapping [start, end), clipped"""
+        end = self.n_bars if end is None else end
+        wanted = _codes(regimes)
+        first = max(np.searchsorted(self.starts, start, side='right') - 1, 0)
+        for k in range(first, len(self.starts)):
+            s, e = int(self.starts[k]), int(self.ends[k])
+            if s >= end:
+                break
+            if wanted is None or self.codes[k] in wanted:
+                yield max(s, start), min(e, end), REGIMES[self.codes[k]]
+
+    def eligible(self, regimes, start=0, end=None):
+        """Bar indices in [start, end) whose regime is one of `regimes`"""
+        ranges = [np.arange(s, e) for s, e, _ in self.segments(regimes, start, end)]
+        return np.concatenate(ranges) if ranges else np.empty(0, dtype=np.int64)
+
+    def summary(self):
+        """{regime: (segments, bars)}"""
+        lengths = self.ends - self.starts
+        return {name: (int((self.codes == code).sum()), int(lengths[self.codes == code].sum()))
+                for code, name in enumerate(REGIMES)}
+
+    # --------------------------------------------------------------------------
+    # Persistence
+    # --------------------------------------------------------------------------
+
+    def save(self, store, symbol, interval):
+        last = int(self.timestamps[-1]) if len(self.timestamps) else None
+        store.save_index(symbol, interval, INDEX_NAME,
+                         {'starts': self.starts, 'ends': self.ends, 'codes': self.codes},
+                         meta={'n_bars': self.n_bars, 'last_timestamp': last})
+
+    @classmethod
+    def load(cls, store, symbol, interval, columns):
+        """Stored index if it was built from exactly these candles, else None"""
+        stored = store.load_index(symbol, interval, INDEX_NAME)
+        if stored is None or len(columns) == 0:
+            return None
+        arrays, meta = stored
+        if meta.get('n_bars') != len(columns) or meta.get('last_timestamp') != int(columns.timestamp[-1]):
+            return None
+        return cls(arrays['starts'], arrays['ends'], arrays['codes'], np.asarray(columns.timestamp))
+
+
+def regime_index_for(store, symbol, interval, columns=None):
+    """Load the persisted index for the stored candles, rebuilding it when stale"""
+    if columns is None:
+        columns = store.load(symbol, interval)
+        if columns is None:
+            raise ValueError(f"No stored candles for {symbol} {interval}")
+    index = RegimeIndex.load(store, symbol, interval, columns)
+    if index is None:
+        index = RegimeIndex.from_candles(columns)
+        index.save(store, symbol, interval)
+    return index
+
+
+def _codes(regimes):
+    if regimes is None:
+        return None
+    if isinstance(regimes, str):
+        regimes = (regimes,)
+    return {REGIMES.index(r) for r in regimes}
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def main():
+    import requests
+    from candle_decoder import decode_coinone_chart
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description='Build / show the market regime index')
+    parser.add_argument('--symbol', default='XRP')
+    parser.add_argument('--interval', default='5m')
+    parser.add_argument('--size', type=int, default=500)
+    parser.add_argument('--store', default='candle_store', help='Candle store directory')
+    args = parser.parse_args()
+
+    url = f'https://api.coinone.co.kr/public/v2/chart/KRW/{args.symbol}'
+    response = requests.get(url, params={'interval': args.interval, 'size': args.size}, timeout=10)
+    store = CandleStore(args.store)
+    candles = store.append(args.symbol, args.interval, decode_coinone_chart(response.content))
+    index = regime_index_for(store, args.symbol, args.interval, candles)
+
+    print(f"\n{'='*70}")
+    print(f"시장 국면 구간 - {args.symbol} {args.interval} ({len(candles)} candles, {len(index)} segments)")
+    print(f"{'='*70}")
+    for name, (segments, bars) in index.summary().items():
+        print(f"{name:>10}: {segments:>4}개 구간, {bars:>6}개 캔들")
+    print()
+    for start, end, name in index.segments(('uptrend', 'sideways', 'downtrend')):
+        first = datetime.fromtimestamp(candles.timestamp[start] / 1000)
+        last = datetime.fromtimestamp(candles.timestamp[end - 1] / 1000)
+        print(f"{first.strftime('%m-%d %H:%M')} ~ {last.strftime('%m-%d %H:%M')}  {name:<10} {end - start:>5} candles")
+
+
+if __name__ == '__main__':
+    main()
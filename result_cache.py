@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Content-addressed backtest result cache
+
+Re-running coinone_xrp_backtest.main or a parameter sweep recomputes every
+strategy even when neither the candles nor the parameters changed. Here a
+run is keyed by a hash of
+
+    - the data: every column of the DataFrame / CandleColumns it reads
+      (so the candle range and the indicator values are both covered)
+    - the strategy: module.qualname plus a hash of its source code, or an
+      explicit version string
+    - the parameters, after binding defaults
+
+and its trade log and final capital are stored on disk as one .npz per key.
+Reads refresh the file's mtime; when the cache outgrows `max_bytes`, the
+least recently used entries are evicted. Repeated and overlapping sweeps
+only compute combinations they haven't seen.
+
+Usage:
+    cache = ResultCache()
+    fingerprint = data_fingerprint(df)
+    trades, capital = cache.run(strategy_combined, df, 100000, 0.95, fingerprint=fingerprint)
+
+    python3 result_cache.py                 # entry count and size
+    python3 result_cache.py --clear
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import uuid
+
+import numpy as np
+
+from trade_log import TradeLog
+
+CACHE_DIR = 'backtest_cache'
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+
+# ==============================================================================
+# Keys
+# ==============================================================================
+
+def data_fingerprint(data):
+    """Hash of every column of a DataFrame or CandleColumns, names and dtypes included"""
+    digest = hashlib.blake2b(digest_size=16)
+    if hasattr(data, 'columns') and hasattr(data, 'index'):     # DataFrame
+        items = ((str(name), data[name].to_numpy()) for name in data.columns)
+    else:
+        items = ((name, getattr(data, name)) for name in type(data).__slots__)
+    for name, values in items:
+        values = np.ascontiguousarray(values)
+        if values.dtype.kind == 'M':
+            values = values.view(np.int64)
+        digest.update(f'{name}:{values.dtype.str}:{len(values)};'.encode())
+        digest.update(values.tobytes() if values.dtype != object else repr(values.tolist()).encode())
+    return digest.hexdigest()
+
+
+def strategy_identity(fn, version=None):
+    """'module.qualname:version', the version defaulting to a hash of the source"""
+    if version is None:
+        try:
+            version = hashlib.blake2b(inspect.getsource(fn).encode(), digest_size=8).hexdigest()
+        except (OSError, TypeError):
+            version = 'unversioned'
+    return f'{fn.__module__}.{fn.__qualname__}:{version}'
+
+
+def cache_key(fingerprint, strategy, params):
+    """Hex key for one (data, strategy, parameters) combination; raises TypeError on non-JSON params"""
+    payload = json.dumps({'data': fingerprint, 'strategy': strategy, 'params': params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# ==============================================================================
+# Cache
+# ==============================================================================
+
+class ResultCache:
+    """On-disk (TradeLog records, capital) per key, size-bounded with LRU eviction"""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None       # bytes on disk, scanned on first put
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}.npz')
+
+    def get(self, key):
+        """(records, meta) for `key`, or None"""
+        path = self.path(key)
+        try:
+            with np.load(path) as stored:
+                records = stored['records']
+                meta = json.loads(stored['meta'].tobytes())
+        except (OSError, KeyError, ValueError):
+            return None
+        try:
+            os.utime(path)      # mark as recently used
+        except OSError:
+            pass
+        return records, meta
+
+    def put(self, key, records, meta):
+        path = self.path(key)
+        # Write-then-rename so a concurrent reader never sees a half-written entry;
+        # the temp file is per writer, as sweep workers may store the same key at once
+        tmp = f'{path}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp'
+        try:
+            with open(tmp, 'xb') as f:
+                np.savez(f, records=records, meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        if self._size is None:
+            self._size = sum(size for _, _, size in self._entries())
+        else:
+            self._size += os.path.getsize(path)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, max_bytes=None):
+        """Delete least recently used entries until the cache fits `max_bytes`"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        removed = 0
+        for path, _, size in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
+
+    def clear(self):
+        return self.evict(0)
+
+    def info(self):
+        entries = list(self._entries())
+        return {'directory': self.directory, 'entries': len(entries),
+                'bytes': sum(size for _, _, size in entries), 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses}
+
+    def _entries(self):
+        """(path, mtime, size) of every cached entry"""
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith('.npz'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    yield entry.path, stat.st_mtime, stat.st_size
+
+    # --------------------------------------------------------------------------
+    # Strategies
+    # --------------------------------------------------------------------------
+
+    def run(self, fn, data, *args, fingerprint=None, version=None, **kwargs):
+        """
+        fn(data, *args, **kwargs) -> (TradeLog, capital), served from the cache
+        when the same data, strategy and parameters were run before
+
+        Runs uncached when a parameter isn't JSON-serializable (e.g. a
+        fill_model object).
+        """
+        bound = inspect.signature(fn).bind(data, *args, **kwargs)
+        bound.apply_defaults()
+        params = dict(list(bound.arguments.items())[1:])
+        try:
+            key = cache_key(fingerprint or data_fingerprint(data), strategy_identity(fn, version), params)
+        except TypeError:
+            key = None
+        if key is None:
+            return fn(data, *args, **kwargs)
+
+        stored = self.get(key)
+        if stored is not None:
+            self.hits += 1
+            records, meta = stored
+            return TradeLog.from_records(records), meta['capital']
+
+        self.misses += 1
+        trades, capital = fn(data, *args, **kwargs)
+        self.put(key, trades.records, {'capital': float(capital), 'strategy': fn.__qualname__, 'params': params})
+        return trades, capital
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest result cache maintenance')
+    parser.add_argument('--dir', default=CACHE_DIR)
+    parser.add_argument('--max-mb', type=float, default=DEFAULT_MAX_BYTES / 2**20)
+    parser.add_argument('--evict', action='store_true', help='Evict down to --max-mb')
+    parser.add_argument('--clear', action='store_true', help='Delete every entry')
+    args = parser.parse_args()
+
+    cache = ResultCache(args.dir, int(args.max_mb * 2**20))
+    if args.clear:
+        print(f"✓ Removed {cache.clear()} entries")
+    elif args.evict:
+        print(f"✓ Evicted {cache.evict()} entries")
+    info = cache.info()
+    print(f"{info['directory']}: {info['entries']} entries, "
+          f"{info['bytes'] / 2**20:.1f} / {info['max_bytes'] / 2**20:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
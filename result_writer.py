@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Streaming backtest result writer / reader
+
+Writes one row per run and one row per trade as the backtest goes, instead
+of building one big dict and json.dump()-ing it at the end. Memory stays
+bounded by `batch_rows` regardless of how many runs a sweep produces, and
+later sweeps append to the same result directory.
+
+Layout:
+    <dir>/runs.jsonl, <dir>/trades.jsonl              (format='jsonl')
+    <dir>/runs/part-*.parquet, <dir>/trades/part-*.parquet   (format='parquet', needs pyarrow)
+
+Usage:
+    with ResultWriter('results', format='jsonl') as writer:
+        run_id = writer.write_run('Combined', config, result)
+        writer.write_trades(run_id, trades)      # TradeLog
+
+    df = read_table('results', 'trades', columns=['run_id', 'type', 'profit'])
+"""
+
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.dataset as ds
+except ImportError:  # optional, only needed for format='parquet'
+    pa = None
+
+FORMATS = ('jsonl', 'parquet')
+TABLES = ('runs', 'trades')
+
+# Parquet run columns with a fixed type; every other numeric config / metric
+# is float64, so a zero-trade run (0) and a real one (1088.19) share a type
+RUN_STRING_FIELDS = ('run_id', 'strategy', 'created_at')
+RUN_COUNT_FIELDS = ('total_trades', 'winning_trades', 'losing_trades', 'data_points')
+
+
+class ResultWriter:
+    """Appends run and trade rows to a result directory in bounded batches"""
+
+    def __init__(self, directory, format='jsonl', batch_rows=100_000):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown result format: {format} (expected one of {FORMATS})")
+        if format == 'parquet' and pa is None:
+            raise ImportError("format='parquet' requires pyarrow (pip install pyarrow)")
+
+        self.directory = directory
+        self.format = format
+        self.batch_rows = batch_rows
+        # Unique per writer: several writers may open in one process within a second
+        self.session = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        os.makedirs(directory, exist_ok=True)
+        self._files = {}      # jsonl: table -> open file
+        self._writers = {}    # parquet: table -> ParquetWriter
+        self._parts = 0       # parquet: files opened this session
+        self._pending = {table: [] for table in TABLES}
+        self._pending_rows = {table: 0 for table in TABLES}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --------------------------------------------------------------------------
+    # Writing
+    # --------------------------------------------------------------------------
+
+    def write_run(self, strategy, config, result, run_id=None):
+        """Append one run row (config + result metrics); returns its run_id"""
+        run_id = run_id or uuid.uuid4().hex[:12]
+        row = {'run_id': run_id, 'strategy': strategy, 'created_at': datetime.now().isoformat()}
+        row.update(config)
+        row.update({k: v for k, v in result.items() if k != 'strategy'})
+        self._append('runs', [_plain(row)], 1)
+        return run_id
+
+    def write_trades(self, run_id, log):
+        """Append every row of a TradeLog / EntryLog, tagged with run_id"""
+        records = log.records
+        if len(records) == 0:
+            return
+
+        if self.format == 'jsonl':
+            # Rows are converted lazily, one batch at a time
+            batch = []
+            for row in log:
+                batch.append(_plain({'run_id': run_id, **row}))
+                if len(batch) >= self.batch_rows:
+                    self._append('trades', batch, len(batch))
+                    batch = []
+            if batch:
+                self._append('trades', batch, len(batch))
+        else:
+            self._append('trades', [_arrow_columns(run_id, log)], len(records))
+
+    def flush(self):
+        for table in TABLES:
+            self._flush(table)
+        for f in self._files.values():
+            f.flush()
+
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        for writer in self._writers.values():
+            writer.close()
+        self._files = {}
+        self._writers = {}
+
+    def _append(self, table, items, n_rows):
+        self._pending[table].extend(items)
+        self._pending_rows[table] += n_rows
+        if self._pending_rows[table] >= self.batch_rows:
+            self._flush(table)
+
+    def _flush(self, table):
+        items = self._pending[table]
+        if not items:
+            return
+
+        if self.format == 'jsonl':
+            f = self._files.get(table)
+            if f is None:
+                f = self._files[table] = open(os.path.join(self.directory, f'{table}.jsonl'), 'a')
+            f.writelines(json.dumps(row, default=str) + '\n' for row in items)
+        else:
+            writer = self._writers.get(table)
+            if table == 'runs':
+                schema = _run_schema(items, writer.schema if writer is not None else None)
+                if writer is not None and schema != writer.schema:
+                    # A run with new config / metric keys: a parquet file's schema
+                    # is fixed, so continue in a new part with the wider one
+                    writer.close()
+                    writer = None
+                arrow_table = _run_table(items, schema)
+            else:
+                arrow_table = pa.concat_tables([pa.Table.from_pydict(cols) for cols in items])
+            if writer is None:
+                writer = self._writers[table] = self._open_part(table, arrow_table.schema)
+            writer.write_table(arrow_table.cast(writer.schema))
+
+        self._pending[table] = []
+        self._pending_rows[table] = 0
+
+    def _open_part(self, table, schema):
+        os.makedirs(os.path.join(self.directory, table), exist_ok=True)
+        self._parts += 1
+        suffix = '' if self._parts == 1 else f'-{self._parts}'
+        path = os.path.join(self.directory, table, f'part-{self.session}{suffix}.parquet')
+        return pq.ParquetWriter(path, schema)
+
+
+# ==============================================================================
+# Reading
+# ==============================================================================
+
+def iter_rows(directory, table='trades', columns=None, run_ids=None):
+    """Stream rows (dicts) of a JSONL result table with optional column pruning"""
+    run_ids = set(run_ids) if run_ids is not None else None
+    path = os.path.join(directory, f'{table}.jsonl')
+    if not os.path.exists(path):
+        return
+
+    with open(path) as f:
+        for line in f:
+            row = json.loads(line)
+            if run_ids is not None and row.get('run_id') not in run_ids:
+                continue
+            if columns is not None:
+                row = {c: row.get(c) for c in columns}
+            yield row
+
+
+def read_table(directory, table='trades', columns=None, run_ids=None):
+    """
+    Load a result table as a DataFrame, reading only the requested columns
+
+    Parquet datasets are pruned at the file level (only the requested column
+    chunks are read); JSONL is streamed and projected row by row.
+    """
+    import pandas as pd
+
+    parquet_dir = os.path.join(directory, table)
+    if os.path.isdir(parquet_dir):
+        if pa is None:
+            raise ImportError("Reading parquet results requires pyarrow (pip install pyarrow)")
+        # Parts can carry different run columns; missing ones read as null
+        files = sorted(os.path.join(parquet_dir, f) for f in os.listdir(parquet_dir) if f.endswith('.parquet'))
+        schema = pa.unify_schemas([pq.read_schema(f) for f in files]) if files else None
+        dataset = ds.dataset(files, format='parquet', schema=schema)
+        row_filter = ds.field('run_id').isin(list(run_ids)) if run_ids is not None else None
+        return dataset.to_table(columns=columns, filter=row_filter).to_pandas()
+
+    if columns is not None:
+        data = {c: [] for c in columns}
+        for row in iter_rows(directory, table, columns, run_ids):
+            for c in columns:
+                data[c].append(row[c])
+        return pd.DataFrame(data)
+    return pd.DataFrame(list(iter_rows(directory, table, None, run_ids)))
+
+
+# ==============================================================================
+# Helpers
+# ==============================================================================
+
+def _plain(row):
+    """NumPy scalars -> Python scalars so json / arrow see plain types"""
+    return {k: (v.item() if isinstance(v, np.generic) else v) for k, v in row.items()}
+
+
+def _run_field_type(name, values):
+    if name in RUN_STRING_FIELDS:
+        return pa.string()
+    if name in RUN_COUNT_FIELDS:
+        return pa.int64()
+    value = next((v for v in values if v is not None), None)
+    if isinstance(value, bool):
+        return pa.bool_()
+    if value is None or isinstance(value, (int, float)):
+        return pa.float64()
+    return pa.string()
+
+
+def _run_schema(rows, base=None):
+    """Explicit run-table schema: `base` (the open file's) plus any new keys"""
+    fields = list(base) if base is not None else []
+    known = {f.name for f in fields}
+    for row in rows:
+        for name in row:
+            if name not in known:
+                known.add(name)
+                fields.append(pa.field(name, _run_field_type(name, [r.get(name) for r in rows])))
+    return pa.schema(fields)
+
+
+def _run_table(rows, schema):
+    """Run rows -> arrow table of `schema`, missing keys as null"""
+    columns = {}
+    for field in schema:
+        values = [row.get(field.name) for row in rows]
+        if pa.types.is_floating(field.type):
+            values = [None if v is None else float(v) for v in values]
+        elif pa.types.is_string(field.type):
+            values = [v if v is None or isinstance(v, str) else json.dumps(v, default=str) for v in values]
+        columns[field.name] = pa.array(values, type=field.type)
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+def _arrow_columns(run_id, log):
+    """TradeLog / EntryLog records -> arrow-ready columns (enums dictionary-encoded)"""
+    records = log.records
+    enums = getattr(log, 'enums', {})
+    columns = {'run_id': pa.array([run_id] * len(records), type=pa.string())}
+    for name in records.dtype.names:
+        values = records[name]
+        if name in enums:
+            columns[name] = pa.DictionaryArray.from_arrays(
+                pa.array(values.astype(np.int32)), pa.array(list(enums[name])))
+        else:
+            columns[name] = pa.array(values)
+    return columns
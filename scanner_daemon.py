@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+상주 스캐너 데몬 - 로컬 조회 API
+
+debug_bot_logic.py, check_recent_entries.py and analyze_bot_timing.py each
+start a fresh process, download 500 candles and warm up 200 bars of
+indicators to answer one question. This daemon keeps, per configured
+symbol, the candle buffer, incremental indicator state and the entry-signal
+bitmap index hot, polls Coinone for new candles, and answers from memory:
+
+    GET /health
+    GET /state/<SYMBOL>                      current state as debug_bot_logic sees it
+    GET /entries/<SYMBOL>?hours=4            entry decisions in the last N hours
+    GET /timing/<SYMBOL>?hours=4&signal=sideways_signal
+                                             entry windows (consecutive signal bars)
+                                             and the KST hour-of-day histogram
+
+Served on localhost HTTP, or on a Unix socket with --socket:
+
+    python3 scanner_daemon.py --symbols XRP ETH --port 8765
+    curl -s localhost:8765/state/XRP
+    python3 scanner_daemon.py --symbols XRP --socket /tmp/scanner.sock
+    curl -s --unix-socket /tmp/scanner.sock http://localhost/entries/XRP
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from candle_decoder import CandleColumns
+from candle_ring import CandleRing
+from candle_store import merge_candles
+from debug_bot_logic import check_sideways_conditions, detect_trend
+from incremental_indicators import IncrementalRSI, IncrementalBollinger, IncrementalEMA, IncrementalMA
+from regime_index import run_length_encode
+from signal_index import SignalIndex, DECISIONS, SIGNALS
+
+WARMUP_SIZE = 500       # candles fetched at start (same as the scripts)
+POLL_SIZE = 10          # candles fetched per poll
+MAX_BARS = 2000         # candles kept per symbol (ring buffer capacity)
+
+
+def fetch_coinone_candles(symbol, interval, size):
+    """Latest `size` candles from Coinone as oldest-first CandleColumns"""
+    import requests
+    from candle_decoder import decode_coinone_chart
+
+    url = f'https://api.coinone.co.kr/public/v2/chart/KRW/{symbol}'
+    response = requests.get(url, params={'interval': interval, 'size': size}, timeout=10)
+    return decode_coinone_chart(response.content)
+
+
+def _tail(columns, n):
+    return CandleColumns(**{field: getattr(columns, field)[-n:] for field in CandleColumns.__slots__})
+
+
+# ==============================================================================
+# Per-symbol state
+# ==============================================================================
+
+class SymbolState:
+    """
+    Candle buffer, indicator state and signal index of one symbol
+
+    The newest candle from the API is still forming: indicators are committed
+    up to the bar before it, and the current state peeks the forming close,
+    which is what debug_bot_logic computes from the full close list.
+    """
+
+    def __init__(self, symbol, interval='5m'):
+        self.symbol = symbol
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.ring = CandleRing(MAX_BARS)
+        self.index = None
+        self.snapshot = None
+        self.updated_at = None
+        self._reset_indicators()
+
+    def _reset_indicators(self):
+        self.rsi = IncrementalRSI(14)
+        self.bb = IncrementalBollinger(20, 2.0)
+        self.emas = {period: IncrementalEMA(period) for period in (9, 21, 50, 200)}
+        self.volume_ma = IncrementalMA(5)
+        self.committed_ts = None    # timestamp of the last bar fed into the indicators
+
+    @property
+    def columns(self):
+        """The candle window as CandleColumns of ring views"""
+        return self.ring.columns()
+
+    def ingest(self, candles):
+        """Merge freshly fetched candles and bring everything up to date"""
+        with self.lock:
+            ring = self.ring
+            rebuild = self.index is None
+            if not rebuild:
+                # Forming candle updated in place, new ones appended; no arrays allocated
+                for row in zip(*(getattr(candles, field).tolist() for field in CandleColumns.__slots__)):
+                    if not ring.upsert(*row):
+                        rebuild = True      # older candles were inserted; committed bars shifted
+                        break
+
+            if rebuild:
+                columns = merge_candles(ring.copy(), candles) if len(ring) else candles
+                ring.clear()
+                ring.extend(columns)
+                self._reset_indicators()
+                self.index = SignalIndex.build(ring.columns())
+            else:
+                self.index.update(ring.columns())
+
+            # Commit every bar except the forming one
+            timestamps = ring.timestamp
+            start = 0 if self.committed_ts is None else int(np.searchsorted(timestamps, self.committed_ts, side='right'))
+            closes = ring.close
+            volumes = ring.volume
+            for i in range(start, len(ring) - 1):
+                close = float(closes[i])
+                self.rsi.update(close)
+                self.bb.update(close)
+                for ema in self.emas.values():
+                    ema.update(close)
+                self.volume_ma.update(float(volumes[i]))
+            if len(ring) > 1:
+                self.committed_ts = int(timestamps[-2])
+
+            self.snapshot = self._current_state()
+            self.updated_at = time.time()
+
+    def _current_state(self):
+        """Same indicators and decision as debug_bot_logic.analyze_current_state"""
+        columns = self.columns
+        if len(columns) < 200:
+            return {'symbol': self.symbol, 'error': f'Not enough data (need 200+, got {len(columns)})'}
+
+        price = float(columns.close[-1])
+        volume = float(columns.volume[-1])
+        rsi = self.rsi.peek(price)
+        ema9, ema21, ema50, ema200 = (self.emas[p].peek(price) for p in (9, 21, 50, 200))
+        bb_upper, bb_middle, bb_lower = self.bb.peek(price)
+        volume_ma5 = self.volume_ma.peek(volume)
+        if None in [rsi, ema9, ema21, ema50, ema200, bb_upper, volume_ma5]:
+            return {'symbol': self.symbol, 'error': 'Failed to calculate indicators'}
+        bb_upper, bb_middle, bb_lower = float(bb_upper), float(bb_middle), float(bb_lower)
+
+        volume_ratio = volume / volume_ma5 if volume_ma5 > 0 else 1.0
+        trend = detect_trend(ema50, ema200, price)
+        bb_range = bb_upper - bb_lower
+        bb_position = (price - bb_lower) / bb_range if bb_range > 0 else 0.5
+
+        state = {
+            'symbol': self.symbol,
+            'interval': self.interval,
+            'timestamp': int(columns.timestamp[-1]),
+            'time': datetime.fromtimestamp(columns.timestamp[-1] / 1000).strftime('%Y-%m-%d %H:%M'),
+            'price': price,
+            'trend': trend,
+            'rsi': rsi,
+            'ema9': ema9,
+            'ema21': ema21,
+            'ema50': ema50,
+            'ema200': ema200,
+            'bb_upper': bb_upper,
+            'bb_middle': bb_middle,
+            'bb_lower': bb_lower,
+            'bb_position': bb_position,
+            'volume_ratio': volume_ratio,
+        }
+
+        if trend == 'sideways':
+            is_entry, strength, conditions, reasons = check_sideways_conditions(rsi, bb_position, volume_ratio)
+            state.update(strategy='sideways', conditions=conditions, strength=strength,
+                         reasons=reasons, is_entry=is_entry)
+            if is_entry:
+                state.update(stop_loss=price * (1 - 2.5 / 100), take_profit=price * (1 + 1.2 / 100))
+        elif trend == 'uptrend':
+            conditions = {
+                'price_near_ema21': price > ema21 * 0.98,
+                'short_term_uptrend': ema9 > ema21 * 0.99,
+                'not_overbought': price <= bb_middle * 1.01,
+                'volume_confirmation': volume_ratio >= 1.0,
+            }
+            strength = sum(conditions.values()) / 4
+            state.update(strategy='uptrend', conditions=conditions, strength=strength,
+                         is_entry=rsi <= 40 and strength >= 0.75)
+        else:
+            state.update(strategy='downtrend', is_entry=False)
+        return state
+
+    # --------------------------------------------------------------------------
+    # Queries
+    # --------------------------------------------------------------------------
+
+    def entries(self, hours=4.0):
+        """Entry decisions in the last `hours`, per decision name"""
+        with self.lock:
+            cutoff = self.ring.last_timestamp - int(hours * 3_600_000)
+            return {name: self.index.query(name, start_ms=cutoff).tolist() for name in DECISIONS}
+
+    def timing(self, signal='sideways_signal', hours=4.0):
+        """Windows of consecutive bars where `signal` held, plus the KST hour histogram"""
+        with self.lock:
+            cutoff = self.ring.last_timestamp - int(hours * 3_600_000)
+            timestamps, bits = self.index.bits(signal, start_ms=cutoff)
+            histogram = self.index.hour_histogram(signal)
+        starts, ends, values = run_length_encode(bits)
+        bar_ms = int(np.median(np.diff(timestamps))) if len(timestamps) > 1 else 0
+        windows = [
+            {'start': int(timestamps[s]), 'end': int(timestamps[e - 1]),
+             'bars': int(e - s), 'minutes': int(e - s) * bar_ms // 60_000}
+            for s, e, v in zip(starts, ends, values) if v
+        ]
+        return {'signal': signal, 'windows': windows, 'hour_histogram_kst': histogram.tolist()}
+
+
+# ==============================================================================
+# Daemon
+# ==============================================================================
+
+class ScannerDaemon:
+    """Keeps SymbolStates warm by polling for new candles in a background thread"""
+
+    def __init__(self, symbols, interval='5m', poll_seconds=10.0, fetch=fetch_coinone_candles, store=None):
+        self.interval = interval
+        self.poll_seconds = poll_seconds
+        self.fetch = fetch
+        self.store = store
+        self.states = {symbol.upper(): SymbolState(symbol.upper(), interval) for symbol in symbols}
+        self.started_at = time.time()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def warm_up(self):
+        for symbol, state in self.states.items():
+            candles = self.fetch(symbol, self.interval, WARMUP_SIZE)
+            if self.store is not None:
+                candles = self.store.append(symbol, self.interval, candles)
+            state.ingest(_tail(candles, MAX_BARS))
+            print(f"✓ {symbol}: {len(state.columns)} candles warm")
+
+    def poll_once(self):
+        for symbol, state in self.states.items():
+            try:
+                candles = self.fetch(symbol, self.interval, POLL_SIZE)
+            except Exception as e:
+                print(f"✗ {symbol}: {e}")
+                continue
+            if len(candles):
+                if self.store is not None:
+                    self.store.append(symbol, self.interval, candles)
+                state.ingest(candles)
+
+    def start(self):
+        self.warm_up()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.poll_once()
+
+    def handle(self, path):
+        """(status, payload) for a request path like /state/XRP?hours=4"""
+        url = urlparse(path)
+        parts = [p for p in url.path.split('/') if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if parts == ['health']:
+            return 200, {
+                'ok': True,
+                'uptime_seconds': time.time() - self.started_at,
+                'symbols': {s: st.updated_at for s, st in self.states.items()},
+            }
+        if len(parts) != 2 or parts[0] not in ('state', 'entries', 'timing'):
+            return 404, {'error': f'Unknown path {url.path}'}
+
+        state = self.states.get(parts[1].upper())
+        if state is None or state.snapshot is None:
+            return 404, {'error': f'Symbol {parts[1]} is not tracked'}
+        try:
+            hours = float(query.get('hours', 4))
+        except ValueError:
+            return 400, {'error': 'hours must be a number'}
+        if parts[0] == 'state':
+            return 200, state.snapshot
+        if parts[0] == 'entries':
+            return 200, state.entries(hours)
+        signal = query.get('signal', 'sideways_signal')
+        if signal not in SIGNALS:
+            return 400, {'error': f'Unknown signal {signal}'}
+        return 200, state.timing(signal, hours)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    daemon = None
+
+    def do_GET(self):
+        status, payload = self.daemon.handle(self.path)
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket peers have no (host, port)
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def serve(daemon, host='127.0.0.1', port=8765, socket_path=None):
+    """Block serving the query API over HTTP (or a Unix socket if given)"""
+    handler = type('Handler', (_Handler,), {'daemon': daemon})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = _UnixHTTPServer(socket_path, handler)
+        where = f'unix:{socket_path}'
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        where = f'http://{host}:{port}'
+    print(f"✓ Serving {', '.join(daemon.states)} on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Warm scanner daemon with a local query API')
+    parser.add_argument('--symbols', nargs='+', default=['XRP'])
+    parser.add_argument('--interval', default='5m')
+    parser.add_argument('--poll', type=float, default=10.0, help='Seconds between candle polls')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', help='Serve on this Unix socket instead of HTTP')
+    parser.add_argument('--store', help='Candle store directory to warm from / persist to')
+    args = parser.parse_args()
+
+    store = None
+    if args.store:
+        from candle_store import CandleStore
+        store = CandleStore(args.store)
+
+    daemon = ScannerDaemon(args.symbols, args.interval, args.poll, store=store)
+    daemon.start()
+    serve(daemon, args.host, args.port, args.socket)
+
+
+if __name__ == '__main__':
+    main()
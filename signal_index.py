@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+진입 신호 비트맵 인덱스
+
+check_recent_entries.analyze_recent_4_hours, check_actual_entry_times.py and
+analyze_bot_timing.py all recompute every indicator for every candle just to
+find where the sideways / uptrend entry fired. This keeps one bitmap per
+entry sub-condition plus the final decisions, per symbol / interval /
+parameter version, persisted (bit-packed, zlib) in the candle store.
+
+New candles only cost the new bars: EMA state is carried over and the other
+indicators need just a short tail of closes. "Entries in the last N hours"
+and time-of-day histograms (SIGNAL_TIMELINE_KST.md) then come straight from
+the bitmaps.
+
+Usage:
+    index = signal_index_for(store, 'XRP', '5m', candles)
+    index.query('sideways_signal', start_ms=cutoff)     # timestamps of entries
+    index.hour_histogram('sideways_entry')              # KST hour -> count
+
+    python3 signal_index.py --symbol XRP --hours 4 --histogram
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from indicator_series import rsi_series, ema_series, bollinger_series, volume_ratio_series
+from regime_index import trend_series, UPTREND, SIDEWAYS
+
+# Bump SIGNAL_VERSION whenever SIGNAL_PARAMS or the rules below change;
+# each version is stored as its own index.
+SIGNAL_VERSION = 'v1'
+SIGNAL_PARAMS = {
+    'rsi_period': 14,
+    'bb_period': 20,
+    'bb_std': 2.0,
+    'volume_ma': 5,
+    'emas': (9, 21, 50, 200),
+}
+
+# Same names / rules as check_uptrend_entry and check_sideways_entry
+UPTREND_CONDITIONS = ('price_near_ema21', 'short_term_uptrend', 'not_overbought', 'volume_confirmation')
+SIDEWAYS_CONDITIONS = ('near_lower_band', 'deeply_oversold', 'not_extreme', 'volume_spike')
+DECISIONS = (
+    'uptrend_entry',      # uptrend regime + check_uptrend_entry (check_recent_entries)
+    'sideways_entry',     # sideways regime + check_sideways_entry (check_recent_entries)
+    'sideways_signal',    # sideways conditions alone (check_actual_entry_times, analyze_bot_timing)
+)
+SIGNALS = UPTREND_CONDITIONS + SIDEWAYS_CONDITIONS + DECISIONS
+
+KST_OFFSET_HOURS = 9
+
+
+# ==============================================================================
+# Signal computation
+# ==============================================================================
+
+def compute_signals(columns, start=0, ema_state=None):
+    """
+    Condition / decision bits for bars [start, len(columns))
+
+    Args:
+        columns: Oldest-first CandleColumns (the whole stored series)
+        start: First bar to compute
+        ema_state: {period: EMA at bar start-1}; required when start > 0
+
+    Returns:
+        (dict signal -> bool array of length len(columns) - start,
+         {period: EMA of every computed bar})
+    """
+    params = SIGNAL_PARAMS
+    n = len(columns)
+    # Window indicators only need a short tail of history
+    lookback = max(params['rsi_period'], params['bb_period'], params['volume_ma'])
+    tail = max(start - lookback, 0)
+    offset = start - tail
+
+    closes = columns.close[tail:]
+    rsi = rsi_series(closes, params['rsi_period'])[offset:]
+    bb_upper, bb_middle, bb_lower = (band[offset:] for band in
+                                     bollinger_series(closes, params['bb_period'], params['bb_std']))
+    volume_ratio = volume_ratio_series(columns.volume[tail:], params['volume_ma'])[offset:]
+
+    emas = {}
+    for period in params['emas']:
+        prev = ema_state.get(str(period)) if ema_state else None
+        if start == 0 or prev is None or np.isnan(prev):
+            emas[period] = ema_series(columns.close, period)[start:]
+        else:
+            emas[period] = ema_series(columns.close[start:], period, prev=prev)
+
+    price = columns.close[start:n]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bb_range = bb_upper - bb_lower
+        bb_position = np.where(bb_range > 0, (price - bb_lower) / bb_range, 0.5)
+
+        bits = {
+            'price_near_ema21': price > emas[21] * 0.98,
+            'short_term_uptrend': emas[9] > emas[21] * 0.99,
+            'not_overbought': price <= bb_middle * 1.01,
+            'volume_confirmation': volume_ratio >= 1.0,
+            'near_lower_band': bb_position < 0.4,
+            'deeply_oversold': rsi <= 32,
+            'not_extreme': rsi >= 15,
+            'volume_spike': volume_ratio >= 1.1,
+        }
+
+        # Same addition order as check_sideways_entry, so 0.8 compares identically
+        sideways_strength = (np.where(bits['near_lower_band'], 0.35, 0.0) +
+                             np.where(bits['deeply_oversold'], 0.25, 0.0) +
+                             np.where(bits['not_extreme'], 0.2, 0.0) +
+                             np.where(bits['volume_spike'], 0.2, 0.0))
+        uptrend_strength = sum(bits[name].astype(np.int64) for name in UPTREND_CONDITIONS) / len(UPTREND_CONDITIONS)
+
+        # The scripts skip a bar when any indicator is still None
+        base_ready = ~(np.isnan(rsi) | np.isnan(bb_upper) | np.isnan(volume_ratio))
+        all_ready = base_ready & ~np.any([np.isnan(emas[p]) for p in params['emas']], axis=0)
+        trend = trend_series(emas[50], emas[200], price)
+
+        bits['uptrend_entry'] = all_ready & (trend == UPTREND) & (rsi <= 40) & (uptrend_strength >= 0.75)
+        bits['sideways_signal'] = base_ready & (sideways_strength >= 0.8)
+        bits['sideways_entry'] = all_ready & (trend == SIDEWAYS) & (rsi <= 32) & (sideways_strength >= 0.8)
+
+    return bits, emas
+
+
+# ==============================================================================
+# Index
+# ==============================================================================
+
+class SignalIndex:
+    """Bit-packed per-bar signal bitmaps for one symbol / interval / version"""
+
+    def __init__(self, timestamps, packed, ema_state):
+        self.timestamps = timestamps      # int64 ms, one per indexed bar
+        self.packed = packed              # signal -> np.packbits(bits)
+        self.ema_state = ema_state        # {period: EMA at the second-to-last bar}
+
+    @classmethod
+    def build(cls, columns):
+        index = cls(np.empty(0, dtype=np.int64),
+                    {name: np.empty(0, dtype=np.uint8) for name in SIGNALS}, {})
+        index.update(columns)
+        return index
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def update(self, columns):
+        """
+        Index bars of `columns` (the whole stored series) not indexed yet
+
+        The last indexed bar is always recomputed, since it may have been a
+        still-forming candle. Falls back to a full rebuild if the history no
+        longer lines up. `columns` may also be a sliding window (candle_ring):
+        indexed bars older than its first bar are dropped. Returns the number
+        of bars (re)computed.
+        """
+        if len(self.timestamps) and len(columns):
+            drop = int(np.searchsorted(self.timestamps, columns.timestamp[0]))
+            if drop:
+                for name in SIGNALS:
+                    bits = np.unpackbits(self.packed[name], count=len(self.timestamps)).astype(bool)
+                    self.packed[name] = np.packbits(bits[drop:])
+                self.timestamps = self.timestamps[drop:]
+
+        n_old = len(self.timestamps)
+        keep = n_old - 1
+        if keep < 1 or len(columns) < n_old or columns.timestamp[keep - 1] != self.timestamps[keep - 1]:
+            keep = 0
+
+        bits, emas = compute_signals(columns, start=keep, ema_state=self.ema_state if keep else None)
+        for name in SIGNALS:
+            old = np.unpackbits(self.packed[name], count=keep).astype(bool)
+            self.packed[name] = np.packbits(np.concatenate((old, bits[name])))
+        self.timestamps = np.asarray(columns.timestamp, dtype=np.int64).copy()
+
+        # EMA state at the bar before the (possibly forming) last bar
+        if len(columns) >= 2:
+            last = len(columns) - 2 - keep
+            if last >= 0:
+                self.ema_state = {str(p): float(emas[p][last]) for p in emas}
+            # else: no new committed bar, keep the previous state
+        return len(columns) - keep
+
+    # --------------------------------------------------------------------------
+    # Queries
+    # --------------------------------------------------------------------------
+
+    def bits(self, name, start_ms=None, end_ms=None):
+        """(timestamps, bool bits) of bars with start_ms <= timestamp < end_ms"""
+        lo = 0 if start_ms is None else int(np.searchsorted(self.timestamps, start_ms, side='left'))
+        hi = len(self.timestamps) if end_ms is None else int(np.searchsorted(self.timestamps, end_ms, side='left'))
+        if hi <= lo:
+            return self.timestamps[lo:lo], np.zeros(0, dtype=bool)
+        # Only unpack the bytes covering [lo, hi)
+        first_bit = lo - lo % 8
+        chunk = np.unpackbits(self.packed[name][first_bit // 8:(hi + 7) // 8]).astype(bool)
+        return self.timestamps[lo:hi], chunk[lo - first_bit:hi - first_bit]
+
+    def query(self, name, start_ms=None, end_ms=None):
+        """Timestamps (ms) where `name` fired"""
+        timestamps, bits = self.bits(name, start_ms, end_ms)
+        return timestamps[bits]
+
+    def count(self, name, start_ms=None, end_ms=None):
+        return int(self.bits(name, start_ms, end_ms)[1].sum())
+
+    def hour_histogram(self, name, start_ms=None, end_ms=None, tz_offset_hours=KST_OFFSET_HOURS):
+        """Signal count per hour of day (KST by default) -> int array of 24"""
+        fired = self.query(name, start_ms, end_ms)
+        hours = (fired // 3_600_000 + tz_offset_hours) % 24
+        return np.bincount(hours, minlength=24)
+
+    # --------------------------------------------------------------------------
+    # Persistence
+    # --------------------------------------------------------------------------
+
+    def save(self, store, symbol, interval, version=SIGNAL_VERSION):
+        arrays = {'timestamps': self.timestamps}
+        arrays.update({f'bits_{name}': self.packed[name] for name in SIGNALS})
+        store.save_index(symbol, interval, f'signals_{version}', arrays,
+                         meta={'params': SIGNAL_PARAMS, 'ema_state': self.ema_state},
+                         compressed=True)
+
+    @classmethod
+    def load(cls, store, symbol, interval, version=SIGNAL_VERSION):
+        stored = store.load_index(symbol, interval, f'signals_{version}')
+        if stored is None:
+            return None
+        arrays, meta = stored
+        if meta.get('params') != _json_params():
+            return None
+        packed = {name: arrays[f'bits_{name}'] for name in SIGNALS}
+        return cls(arrays['timestamps'], packed, meta.get('ema_state', {}))
+
+
+def signal_index_for(store, symbol, interval, columns=None):
+    """Load the persisted index, index any new candles and save it back"""
+    if columns is None:
+        columns = store.load(symbol, interval)
+        if columns is None:
+            raise ValueError(f"No stored candles for {symbol} {interval}")
+    index = SignalIndex.load(store, symbol, interval)
+    if index is None:
+        index = SignalIndex.build(columns)
+    elif len(index) != len(columns) or index.timestamps[-1] != columns.timestamp[-1]:
+        index.update(columns)
+    else:
+        return index
+    index.save(store, symbol, interval)
+    return index
+
+
+def _json_params():
+    # SIGNAL_PARAMS as it reads back from the JSON metadata
+    return {k: list(v) if isinstance(v, tuple) else v for k, v in SIGNAL_PARAMS.items()}
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def main():
+    import requests
+    from candle_decoder import decode_coinone_chart
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description='Entry signal bitmap index')
+    parser.add_argument('--symbol', default='XRP')
+    parser.add_argument('--interval', default='5m')
+    parser.add_argument('--size', type=int, default=500, help='Candles to fetch')
+    parser.add_argument('--store', default='candle_store', help='Candle store directory')
+    parser.add_argument('--hours', type=float, default=4, help='Report entries in the last N hours')
+    parser.add_argument('--histogram', action='store_true', help='Print KST hour-of-day histogram')
+    args = parser.parse_args()
+
+    url = f'https://api.coinone.co.kr/public/v2/chart/KRW/{args.symbol}'
+    response = requests.get(url, params={'interval': args.interval, 'size': args.size}, timeout=10)
+    store = CandleStore(args.store)
+    candles = store.append(args.symbol, args.interval, decode_coinone_chart(response.content))
+    index = signal_index_for(store, args.symbol, args.interval, candles)
+
+    cutoff = int((datetime.now() - timedelta(hours=args.hours)).timestamp() * 1000)
+    print(f"\n{'='*70}")
+    print(f"최근 {args.hours:g}시간 진입 신호 - {args.symbol} {args.interval} ({len(index)}개 캔들 인덱스)")
+    print(f"{'='*70}")
+    for name in DECISIONS:
+        fired = index.query(name, start_ms=cutoff)
+        times = ', '.join(datetime.fromtimestamp(t / 1000).strftime('%H:%M') for t in fired)
+        print(f"{name:>16}: {len(fired):>3}개  {times}")
+
+    if args.histogram:
+        print(f"\n{'시간(KST)':>10} " + ' '.join(f"{name:>16}" for name in DECISIONS))
+        histograms = [index.hour_histogram(name) for name in DECISIONS]
+        for hour in range(24):
+            print(f"{hour:>8}시 " + ' '.join(f"{h[hour]:>16}" for h in histograms))
+    print()
+
+
+if __name__ == '__main__':
+    main()
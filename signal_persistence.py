@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+진입 신호 지속 시간 시뮬레이터 (sub-candle)
+
+analyze_bot_timing.py only sees whole 5-minute candles, so it can't tell how
+many *seconds* an entry signal is actually visible to a bot that polls every
+second. This replays ticks (recorded public trades, or 1m candles as a proxy)
+through incremental indicator state: closed 5m candles are committed, and the
+forming candle's close / volume are updated on every tick exactly like the
+live bot sees them.
+
+For each entry window it reports the exact start / end time and duration in
+seconds, plus the probability that a bot polling every N seconds (random
+phase) never samples the window.
+
+Usage:
+    python3 signal_persistence.py                 # XRP, 1m candles as proxy
+    python3 signal_persistence.py --symbol BTC --poll 1 5 30
+    python3 signal_persistence.py --ticks trades.jsonl   # {"timestamp","price","qty"} per line
+    python3 signal_persistence.py --ticks tapes/coinone_XRP_20261018.tape
+"""
+
+import argparse
+import json
+from datetime import datetime
+
+import numpy as np
+
+from incremental_indicators import IncrementalRSI, IncrementalBollinger, IncrementalMA
+
+CANDLE_MS = 5 * 60 * 1000
+
+
+# ==============================================================================
+# Tick sources
+# ==============================================================================
+
+def ticks_from_trades(trades):
+    """
+    Recorded public trades -> (timestamp_ms, price, qty) arrays, oldest first
+
+    Accepts dicts with 'timestamp' (ms), 'price' and 'qty' (Coinone) or
+    'size' (Bybit) fields.
+    """
+    trades = sorted(trades, key=lambda t: int(t['timestamp']))
+    ts = np.array([int(t['timestamp']) for t in trades], dtype=np.int64)
+    price = np.array([float(t['price']) for t in trades], dtype=np.float64)
+    qty = np.array([float(t.get('qty', t.get('size', 0))) for t in trades], dtype=np.float64)
+    return ts, price, qty
+
+
+def ticks_from_candles(columns, interval_ms=60 * 1000):
+    """
+    1m candles as a tick proxy: four ticks per candle along the usual OHLC path
+
+    Up candles go open -> low -> high -> close, down candles open -> high ->
+    low -> close, at 0, 1/3, 2/3 and the end of the minute. Candle volume is
+    split evenly across the four ticks.
+    """
+    n = len(columns)
+    up = columns.close >= columns.open
+    second = np.where(up, columns.low, columns.high)
+    third = np.where(up, columns.high, columns.low)
+
+    price = np.column_stack([columns.open, second, third, columns.close]).ravel()
+    offsets = np.array([0, interval_ms // 3, 2 * interval_ms // 3, interval_ms - 1], dtype=np.int64)
+    ts = (columns.timestamp[:, None] + offsets[None, :]).ravel()
+    qty = np.repeat(columns.volume / 4.0, 4) if n else np.empty(0)
+    return ts, price, qty
+
+
+# ==============================================================================
+# Signal
+# ==============================================================================
+
+def sideways_entry_strength(rsi, bb_position, volume_ratio):
+    """Sideways strategy strength (same weights as check_sideways_entry); works on arrays"""
+    return (np.where(bb_position < 0.4, 0.35, 0.0) +
+            np.where(rsi <= 32, 0.25, 0.0) +
+            np.where(rsi >= 15, 0.2, 0.0) +
+            np.where(volume_ratio >= 1.1, 0.2, 0.0))
+
+
+# ==============================================================================
+# Simulator
+# ==============================================================================
+
+class SignalPersistenceSimulator:
+    """Replays ticks through incremental 5m indicator state and tracks entry windows"""
+
+    def __init__(self, candle_ms=CANDLE_MS, threshold=0.8, strength_fn=sideways_entry_strength):
+        self.candle_ms = candle_ms
+        self.threshold = threshold
+        self.strength_fn = strength_fn
+
+        self.rsi = IncrementalRSI(14)
+        self.bb = IncrementalBollinger(20, 2.0)
+        self.volume_ma = IncrementalMA(5)
+
+        self.bucket = None          # start (ms) of the forming candle
+        self.forming_close = None
+        self.forming_volume = 0.0
+
+        self.windows = []
+        self._open = None           # window currently in progress
+        self.last_ms = None         # timestamp of the last tick seen
+
+    def warm_up(self, closes, volumes):
+        """Commit closed candles that precede the tick stream"""
+        for close, volume in zip(closes, volumes):
+            self._commit(close, volume)
+
+    def run(self, ts, price, qty, final=True):
+        """
+        Replay oldest-first tick arrays; returns the list of entry windows
+
+        With final=False the stream may continue in a later call (tape replay
+        in batches); call finish() after the last batch.
+        """
+        if len(ts) == 0:
+            return self.windows
+
+        buckets = ts - ts % self.candle_ms
+        # Split the stream into runs of ticks that belong to one candle
+        bounds = np.flatnonzero(np.diff(buckets)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(ts)]))
+
+        for start, end in zip(starts, ends):
+            bucket = int(buckets[start])
+            if self.bucket is not None and bucket != self.bucket:
+                self._commit(self.forming_close, self.forming_volume)
+                self.forming_volume = 0.0
+            self.bucket = bucket
+            self._evaluate(ts[start:end], price[start:end], qty[start:end])
+
+        self.last_ms = int(ts[-1])
+        if final:
+            return self.finish()
+        return self.windows
+
+    def finish(self):
+        """End of the tick stream: a window still open is reported as truncated"""
+        if self.last_ms is not None:
+            self._close_window(self.last_ms, truncated=True)
+        return self.windows
+
+    def _commit(self, close, volume):
+        self.rsi.update(close)
+        self.bb.update(close)
+        self.volume_ma.update(volume)
+
+    def _evaluate(self, ts, price, qty):
+        """Evaluate every tick of one forming candle at once (committed state is fixed within it)"""
+        volume = self.forming_volume + np.cumsum(qty)
+        self.forming_close = float(price[-1])
+        self.forming_volume = float(volume[-1])
+
+        rsi = self.rsi.peek(price)
+        bb_upper, _, bb_lower = self.bb.peek(price)
+        volume_ma = self.volume_ma.peek(volume)
+        if rsi is None or bb_upper is None or volume_ma is None:
+            return
+
+        bb_range = bb_upper - bb_lower
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bb_position = np.where(bb_range > 0, (price - bb_lower) / bb_range, 0.5)
+            volume_ratio = np.where(volume_ma > 0, volume / volume_ma, 1.0)
+
+        strength = self.strength_fn(rsi, bb_position, volume_ratio)
+        active = strength >= self.threshold
+
+        # Each tick's state holds until the next tick, so windows open / close
+        # exactly at the ticks where `active` flips.
+        flips = np.flatnonzero(active[1:] != active[:-1]) + 1
+        was_active = self._open is not None
+        if active[0] != was_active:
+            flips = np.concatenate(([0], flips))
+
+        segment_start = 0
+        for i in flips:
+            if self._open is None:
+                self._open = {'start_ms': int(ts[i]), 'max_strength': 0.0}
+            else:
+                self._track_strength(strength[segment_start:i])
+                self._close_window(int(ts[i]))
+            segment_start = i
+        if self._open is not None:
+            self._track_strength(strength[segment_start:])
+
+    def _track_strength(self, strength):
+        if len(strength):
+            self._open['max_strength'] = max(self._open['max_strength'], float(strength.max()))
+
+    def _close_window(self, end_ms, truncated=False):
+        if self._open is None:
+            return
+        window = self._open
+        window['end_ms'] = end_ms
+        window['duration_s'] = (end_ms - window['start_ms']) / 1000.0
+        window['truncated'] = truncated
+        self.windows.append(window)
+        self._open = None
+
+
+# ==============================================================================
+# Poll-miss model
+# ==============================================================================
+
+def miss_probability(durations_s, poll_interval_s):
+    """
+    Probability that a bot polling every `poll_interval_s` seconds (uniformly
+    random phase) never samples a window of the given duration
+
+    Returns:
+        (per-window miss probability array, probability of missing at least
+         one window, expected number of missed windows)
+    """
+    durations = np.asarray(durations_s, dtype=np.float64)
+    per_window = np.clip(1.0 - durations / poll_interval_s, 0.0, 1.0)
+    miss_any = 1.0 - np.prod(1.0 - per_window) if len(per_window) else 0.0
+    return per_window, float(miss_any), float(per_window.sum())
+
+
+def print_report(windows, poll_intervals=(1, 5, 10, 30, 60)):
+    print(f"\n{'='*80}")
+    print("⏱ 진입 윈도우 (초 단위)")
+    print(f"{'='*80}")
+
+    if not windows:
+        print("⚠️ 진입 신호가 없었습니다.\n")
+        return
+
+    for i, w in enumerate(windows, 1):
+        start = datetime.fromtimestamp(w['start_ms'] / 1000)
+        end = datetime.fromtimestamp(w['end_ms'] / 1000)
+        flag = " (진행 중)" if w['truncated'] else ""
+        print(f"[{i}] {start.strftime('%m-%d %H:%M:%S')} ~ {end.strftime('%H:%M:%S')}  "
+              f"{w['duration_s']:>8.1f}초  최대 강도 {w['max_strength']:.2f}{flag}")
+
+    durations = np.array([w['duration_s'] for w in windows])
+    print(f"\n총 {len(windows)}개 | 평균 {durations.mean():.1f}초 | "
+          f"중앙값 {np.median(durations):.1f}초 | 최소 {durations.min():.1f}초")
+
+    print(f"\n{'폴링 주기':>10} {'윈도우당 놓칠 확률(평균)':>24} {'1개 이상 놓칠 확률':>18} {'예상 놓침':>10}")
+    print("-"*80)
+    for poll in poll_intervals:
+        per_window, miss_any, expected = miss_probability(durations, poll)
+        print(f"{poll:>9}s {per_window.mean()*100:>23.1f}% {miss_any*100:>17.1f}% {expected:>10.2f}")
+    print()
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def simulate_from_1m_candles(symbol='XRP', size=500):
+    """Fetch 1m candles and simulate with them as a tick proxy"""
+    import requests
+    from candle_decoder import decode_coinone_chart
+
+    url = f'https://api.coinone.co.kr/public/v2/chart/KRW/{symbol}'
+    response = requests.get(url, params={'interval': '1m', 'size': size}, timeout=10)
+    candles = decode_coinone_chart(response.content)
+    print(f"✓ Fetched {len(candles)} 1m candles for {symbol}")
+
+    ts, price, qty = ticks_from_candles(candles)
+    simulator = SignalPersistenceSimulator()
+    return simulator.run(ts, price, qty)
+
+
+def simulate_from_ticks_file(path):
+    """Simulate from a JSONL file of recorded trades, or a trade_tape .tape file"""
+    if path.endswith('.tape'):
+        from trade_tape import iter_segments
+
+        simulator = SignalPersistenceSimulator()
+        count = 0
+        for ts, price, qty, _ in iter_segments(path):
+            simulator.run(ts, price, qty, final=False)
+            count += len(ts)
+        print(f"✓ Replayed {count} ticks from {path}")
+        return simulator.finish()
+
+    with open(path) as f:
+        trades = [json.loads(line) for line in f if line.strip()]
+    ts, price, qty = ticks_from_trades(trades)
+    print(f"✓ Loaded {len(ts)} ticks from {path}")
+
+    simulator = SignalPersistenceSimulator()
+    return simulator.run(ts, price, qty)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sub-candle entry signal persistence simulator')
+    parser.add_argument('--symbol', default='XRP')
+    parser.add_argument('--size', type=int, default=500, help='1m candles to fetch (proxy mode)')
+    parser.add_argument('--ticks', help='JSONL file or .tape of recorded trades instead of 1m candles')
+    parser.add_argument('--poll', type=float, nargs='+', default=[1, 5, 10, 30, 60],
+                        help='Bot polling intervals in seconds')
+    args = parser.parse_args()
+
+    if args.ticks:
+        windows = simulate_from_ticks_file(args.ticks)
+    else:
+        windows = simulate_from_1m_candles(args.symbol, args.size)
+    print_report(windows, args.poll)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Successive-halving strategy tuner
+
+Tunes the bot's entry rules (coinone_strategy_backtest.check_uptrend_entry
+RSI tiers and check_sideways_entry weights / thresholds) without running the
+full grid on the full history. Candidates are first scored on a short
+prefix of the history; only the best 1/eta are promoted to an eta-times
+longer prefix, until the survivors run on everything (successive halving).
+--hyperband repeats this over several starting prefix lengths, trading
+aggressive early pruning against safer, wider rungs.
+
+Indicator arrays are computed once for the whole history and sliced for
+every prefix (they are causal, so a prefix of the arrays equals the arrays
+of the prefix); a candidate's entry signals are a few vectorized
+comparisons on them. Entries are simulated with the tier's TP / SL (first
+touch of the candle high / low; stop first when both hit), one position at
+a time, with the Coinone fee on both sides.
+
+Usage:
+    python3 strategy_tuner.py --symbol XRP --interval 5m --samples 243
+    python3 strategy_tuner.py --hyperband --compare-grid
+"""
+
+import argparse
+import itertools
+import random
+
+import numpy as np
+
+from indicator_cache import IndicatorStream
+from indicator_series import rsi_series, ema_series, bollinger_series, volume_ratio_series
+from regime_index import trend_series, UPTREND, SIDEWAYS
+
+FEE_RATE = 0.0002
+WARMUP_BARS = 200           # EMA200 (the scripts start evaluating here)
+TRUSTED_WINDOW = 20         # longest rolling window (BB / S/R); entries need it gap-free
+
+# Current bot rules (check_uptrend_entry / check_sideways_entry)
+DEFAULT_PARAMS = {
+    'tier1_rsi': 30, 'tier1_size': 1.0, 'tier1_tp': 3.0, 'tier1_sl': 5.0,
+    'tier2_rsi': 35, 'tier2_size': 0.5, 'tier2_tp': 2.0, 'tier2_sl': 4.0,
+    'tier3_rsi': 40, 'tier3_size': 0.25, 'tier3_tp': 1.5, 'tier3_sl': 3.0,
+    'uptrend_strength': 0.75,
+    'sideways_rsi': 32,
+    'w_near_lower_band': 0.35, 'w_deeply_oversold': 0.25, 'w_not_extreme': 0.2, 'w_volume_spike': 0.2,
+    'near_lower_band_cutoff': 0.4, 'volume_spike_ratio': 1.1,
+    'sideways_threshold': 0.8,
+    'sideways_size': 1.0, 'sideways_tp': 1.2, 'sideways_sl': 2.5,
+}
+
+# Grid searched by default (the rest of DEFAULT_PARAMS stays fixed)
+SEARCH_SPACE = {
+    'tier1_rsi': [25, 28, 30, 32],
+    'tier2_rsi': [33, 35, 37],
+    'tier3_rsi': [38, 40, 42, 45],
+    'uptrend_strength': [0.5, 0.75, 1.0],
+    'sideways_rsi': [28, 30, 32, 35],
+    'w_near_lower_band': [0.25, 0.35, 0.45],
+    'w_deeply_oversold': [0.15, 0.25, 0.35],
+    'w_volume_spike': [0.1, 0.2, 0.3],
+    'sideways_threshold': [0.7, 0.8, 0.9],
+}
+
+
+# ==============================================================================
+# Market arrays
+# ==============================================================================
+
+class Market:
+    """Indicator arrays of one candle history, computed once and shared by every candidate"""
+
+    def __init__(self, columns, ticks=None):
+        closes = np.asarray(columns.close, dtype=np.float64)
+        self.n = len(closes)
+        self.close = closes
+        self.high = np.asarray(columns.high, dtype=np.float64)
+        self.low = np.asarray(columns.low, dtype=np.float64)
+        # price_ticks.TickCandles of the same bars: TP / SL become exact tick levels
+        self.ticks = ticks
+
+        self.rsi = rsi_series(closes, 14)
+        self.bb_upper, self.bb_middle, self.bb_lower = bollinger_series(closes, 20, 2.0)
+        bb_upper, bb_lower = self.bb_upper, self.bb_lower
+        self.volume_ratio = volume_ratio = volume_ratio_series(columns.volume, 5)
+        self.emas = emas = {period: ema_series(closes, period) for period in (9, 21, 50, 200)}
+        self.trend = trend_series(emas[50], emas[200], closes)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            bb_range = bb_upper - bb_lower
+            self.bb_position = np.where(bb_range > 0, (closes - bb_lower) / bb_range, 0.5)
+            # Parameter-free conditions, same rules as the entry checks
+            uptrend_conditions = (
+                (closes > emas[21] * 0.98).astype(np.int64) +
+                (emas[9] > emas[21] * 0.99) +
+                (closes <= self.bb_middle * 1.01) +
+                (volume_ratio >= 1.0)
+            )
+            self.uptrend_strength = uptrend_conditions / 4
+            self.not_extreme = self.rsi >= 15
+
+        self.ready = ~(np.isnan(self.rsi) | np.isnan(bb_upper) | np.isnan(volume_ratio) | np.isnan(emas[200]))
+        self.ready[:WARMUP_BARS] = False
+        self._indicator_columns = None
+
+    def indicator_columns(self):
+        """
+        calculate_all_indicators' columns (ddof=1 Bollinger std, ewm(adjust=False)
+        EMAs), for rules ported from coinone_xrp_backtest; computed on first use
+        """
+        if self._indicator_columns is None:
+            self._indicator_columns = IndicatorStream().update(self.close)
+        return self._indicator_columns
+
+
+def load_market(store, symbol, interval, ticks=False):
+    columns = store.load(symbol, interval)
+    if columns is None:
+        raise ValueError(f"No stored candles for {symbol} {interval} "
+                         f"(fill the store first, e.g. python3 signal_index.py --size 10000)")
+    tick_candles = None
+    if ticks:
+        from price_ticks import tick_candles_for
+        tick_candles = tick_candles_for(store, symbol, interval, candles=columns)
+    market = Market(columns, tick_candles)
+
+    # No entries on bars whose indicator windows span a known gap (candle_gaps.py)
+    from candle_gaps import GapIndex
+    gaps = GapIndex.load(store, symbol, interval)
+    if gaps is not None:
+        market.ready &= gaps.trusted(columns.timestamp, TRUSTED_WINDOW)
+    return market
+
+
+# ==============================================================================
+# Evaluation
+# ==============================================================================
+
+def entry_plan(market, params, n):
+    """(entry bar mask, position size, TP %, SL %) for bars [0, n)"""
+    p = params
+    rsi = market.rsi[:n]
+    ready = market.ready[:n]
+    trend = market.trend[:n]
+
+    with np.errstate(invalid='ignore'):
+        uptrend = (ready & (trend == UPTREND) & (rsi <= p['tier3_rsi'])
+                   & (market.uptrend_strength[:n] >= p['uptrend_strength']))
+        oversold = rsi <= p['sideways_rsi']
+        near_lower_band = market.bb_position[:n] < p['near_lower_band_cutoff']
+        volume_spike = market.volume_ratio[:n] >= p['volume_spike_ratio']
+        strength = (np.where(near_lower_band, p['w_near_lower_band'], 0.0) +
+                    np.where(oversold, p['w_deeply_oversold'], 0.0) +
+                    np.where(market.not_extreme[:n], p['w_not_extreme'], 0.0) +
+                    np.where(volume_spike, p['w_volume_spike'], 0.0))
+        sideways = ready & (trend == SIDEWAYS) & oversold & (strength >= p['sideways_threshold'])
+
+        tier1 = rsi <= p['tier1_rsi']
+        tier2 = rsi <= p['tier2_rsi']
+
+    def pick(name):
+        up = np.where(tier1, p[f'tier1_{name}'], np.where(tier2, p[f'tier2_{name}'], p[f'tier3_{name}']))
+        return np.where(uptrend, up, p[f'sideways_{name}'])
+
+    return uptrend | sideways, pick('size'), pick('tp'), pick('sl')
+
+
+def evaluate(market, params, n=None, initial_capital=100000, fee_rate=FEE_RATE):
+    """Simulate `params` on the first n bars -> metrics dict"""
+    n = market.n if n is None else min(n, market.n)
+    entries, size, tp, sl = entry_plan(market, params, n)
+    close, high, low = market.close, market.high, market.low
+    ticks = market.ticks
+
+    capital = peak = initial_capital
+    max_drawdown = 0.0
+    trades = wins = 0
+    candidates = np.flatnonzero(entries)
+    k = 0
+    while k < len(candidates):
+        i = int(candidates[k])
+        entry = close[i]
+        if ticks is None:
+            take = entry * (1 + tp[i] / 100)
+            stop = entry * (1 - sl[i] / 100)
+            exit_bar, exit_price = _first_exit(high, low, i + 1, n, take, stop)
+        else:
+            # Integer tick levels: the first tick at / beyond each threshold
+            take = ticks.spec.target_ticks(ticks.close[i], tp[i])
+            stop = ticks.spec.stop_ticks(ticks.close[i], sl[i])
+            exit_bar, exit_level = _first_exit(ticks.high, ticks.low, i + 1, n, take, stop)
+            if exit_bar is not None:
+                exit_price = float(ticks.spec.prices([exit_level])[0])
+        if exit_bar is None:
+            exit_bar, exit_price = n - 1, close[n - 1]
+
+        invested = capital * size[i]
+        quantity = invested * (1 - fee_rate) / entry
+        proceeds = quantity * exit_price * (1 - fee_rate)
+        capital += proceeds - invested
+        trades += 1
+        wins += int(proceeds > invested)
+        peak = max(peak, capital)
+        max_drawdown = max(max_drawdown, (peak - capital) / peak * 100)
+
+        # Next entry after the exit bar
+        k = int(np.searchsorted(candidates, exit_bar, side='right'))
+
+    return {
+        'return_pct': (capital - initial_capital) / initial_capital * 100,
+        'final_capital': capital,
+        'trades': trades,
+        'win_rate': wins / trades * 100 if trades else 0.0,
+        'max_drawdown_pct': max_drawdown,
+        'bars': n,
+    }
+
+
+def _first_exit(high, low, start, end, take, stop, step=256):
+    """(bar, price) of the first stop / take-profit touch in [start, end), stop first"""
+    while start < end:
+        stop_at = start + min(step, end - start)
+        hit_stop = low[start:stop_at] <= stop
+        hit_take = high[start:stop_at] >= take
+        hits = np.flatnonzero(hit_stop | hit_take)
+        if len(hits):
+            j = int(hits[0])
+            return start + j, (stop if hit_stop[j] else take)
+        start = stop_at
+        step *= 2
+    return None, None
+
+
+# ==============================================================================
+# Search
+# ==============================================================================
+
+def candidate_grid(space=SEARCH_SPACE, samples=None, seed=0, base=DEFAULT_PARAMS):
+    """Full params dicts for the grid (or a random sample of it), the current rules first"""
+    names = sorted(space)
+    combos = itertools.product(*(space[name] for name in names))
+    if samples is not None:
+        total = np.prod([len(space[name]) for name in names])
+        rng = random.Random(seed)
+        picked = set(rng.sample(range(int(total)), min(samples, int(total))))
+        combos = (combo for index, combo in enumerate(combos) if index in picked)
+    candidates = [dict(base)]
+    for combo in combos:
+        params = dict(base, **dict(zip(names, combo)))
+        if params != base and params['tier1_rsi'] < params['tier2_rsi'] < params['tier3_rsi']:
+            candidates.append(params)
+    return candidates
+
+
+class SearchLog:
+    """Memoized evaluations plus the bar-evaluation count they cost"""
+
+    def __init__(self, market, objective='return_pct'):
+        self.market = market
+        self.objective = objective
+        self.results = {}           # (candidate id, bars) -> metrics
+        self.bar_evaluations = 0
+
+    def score(self, candidates, index, n):
+        key = (index, n)
+        if key not in self.results:
+            self.results[key] = evaluate(self.market, candidates[index], n)
+            self.bar_evaluations += n - WARMUP_BARS
+        return self.results[key][self.objective]
+
+
+def successive_halving(log, candidates, min_bars, eta=3, ids=None):
+    """
+    Score candidates on min_bars, keep the best 1/eta, multiply the prefix by
+    eta, until the survivors have run on the whole history
+
+    Returns (ranked candidate ids of the last rung, [(bars, n candidates) per rung]).
+    """
+    ids = list(range(len(candidates))) if ids is None else list(ids)
+    n_bars = min(min_bars, log.market.n)
+    rungs = []
+    while True:
+        scored = sorted(ids, key=lambda i: log.score(candidates, i, n_bars), reverse=True)
+        rungs.append((n_bars, len(ids)))
+        if n_bars >= log.market.n:
+            return scored, rungs
+        ids = scored[:max(1, len(ids) // eta)]
+        n_bars = _next_rung(n_bars, eta, log.market.n, len(ids))
+
+
+def _next_rung(n_bars, eta, n_max, survivors=None):
+    """eta times longer prefix; the full history once that is over half of it (or one survivor is left)"""
+    n_bars *= eta
+    if n_bars * 2 > n_max or survivors == 1:
+        return n_max
+    return n_bars
+
+
+def hyperband(log, candidates, min_bars, eta=3, seed=0):
+    """
+    Successive halving brackets from the most aggressive (min_bars) to plain
+    full-history evaluation, each on its own share of the candidates
+
+    Returns (ids ranked on the full history, [(bracket min bars, rungs)]).
+    """
+    n_max = log.market.n
+    starts = [min(min_bars, n_max)]
+    while starts[-1] < n_max:
+        starts.append(_next_rung(starts[-1], eta, n_max))
+
+    order = list(range(len(candidates)))
+    random.Random(seed).shuffle(order)
+    order.remove(0)
+    order.insert(0, 0)                      # the current rules always run in the first bracket
+    # Aggressive brackets get more candidates (n_i ~ eta^(s - i))
+    weights = [eta ** (len(starts) - 1 - i) for i in range(len(starts))]
+    cuts = np.cumsum([0] + [round(len(order) * w / sum(weights)) for w in weights])
+    cuts[-1] = len(order)
+
+    brackets = []
+    finalists = set()
+    for (lo, hi), start in zip(zip(cuts[:-1], cuts[1:]), starts):
+        ids = order[lo:hi]
+        if not ids:
+            continue
+        ranked, rungs = successive_halving(log, candidates, start, eta, ids)
+        brackets.append((start, rungs))
+        finalists.update(ranked[:1])
+    ranked = sorted(finalists, key=lambda i: log.score(candidates, i, n_max), reverse=True)
+    return ranked, brackets
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def main():
+    import time
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description='Successive-halving tuner for the entry rules')
+    parser.add_argument('--symbol', default='XRP')
+    parser.add_argument('--interval', default='5m')
+    parser.add_argument('--store', default='candle_store', help='Candle store directory')
+    parser.add_argument('--samples', type=int, default=243, help='Random grid sample (0 = full grid)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--min-bars', type=int, default=None, help='First rung prefix (default n / eta^4)')
+    parser.add_argument('--objective', default='return_pct', choices=('return_pct', 'win_rate'))
+    parser.add_argument('--hyperband', action='store_true', help='Several brackets instead of one')
+    parser.add_argument('--compare-grid', action='store_true', help='Also score every candidate on everything')
+    parser.add_argument('--top', type=int, default=5)
+    parser.add_argument('--ticks', action='store_true', help='Exact TP / SL on integer price ticks (price_ticks)')
+    args = parser.parse_args()
+
+    market = load_market(CandleStore(args.store), args.symbol, args.interval, args.ticks)
+    candidates = candidate_grid(samples=args.samples or None, seed=args.seed)
+    min_bars = args.min_bars or max(WARMUP_BARS * 2, market.n // args.eta ** 4)
+    log = SearchLog(market, args.objective)
+    print(f"✓ {args.symbol} {args.interval}: {market.n:,} bars, {len(candidates)} candidates")
+
+    started = time.perf_counter()
+    if args.hyperband:
+        ranked, brackets = hyperband(log, candidates, min_bars, args.eta, args.seed)
+        for start, rungs in brackets:
+            print(f"  bracket from {start:>7,} bars: " + ' -> '.join(f"{c}@{b:,}" for b, c in rungs))
+    else:
+        ranked, rungs = successive_halving(log, candidates, min_bars, args.eta)
+        print("  rungs: " + ' -> '.join(f"{c}@{b:,}" for b, c in rungs))
+    elapsed = time.perf_counter() - started
+
+    full_cost = len(candidates) * (market.n - WARMUP_BARS)
+    print(f"  {log.bar_evaluations:,} bar-evaluations vs {full_cost:,} for the full grid "
+          f"({full_cost / log.bar_evaluations:.1f}x fewer), {elapsed:.1f}s")
+
+    default = evaluate(market, candidates[0])
+    print(f"\n현재 규칙: return {default['return_pct']:+.2f}%  trades {default['trades']}  "
+          f"win {default['win_rate']:.0f}%  MDD {default['max_drawdown_pct']:.1f}%")
+    print(f"\nTop {args.top}:")
+    for rank, i in enumerate(ranked[:args.top], 1):
+        metrics = log.results[(i, market.n)]
+        changed = {k: v for k, v in candidates[i].items() if v != DEFAULT_PARAMS[k]}
+        print(f"  {rank}. return {metrics['return_pct']:+.2f}%  trades {metrics['trades']}  "
+              f"win {metrics['win_rate']:.0f}%  MDD {metrics['max_drawdown_pct']:.1f}%  {changed or '(current)'}")
+
+    if args.compare_grid:
+        scores = sorted(((evaluate(market, c)[args.objective], i) for i, c in enumerate(candidates)), reverse=True)
+        rank = [i for _, i in scores].index(ranked[0]) + 1
+        print(f"\nFull grid: best {scores[0][0]:+.2f}, tuner's pick ranks #{rank} of {len(candidates)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Out-of-core streaming backtest
+
+coinone_xrp_backtest.py puts the whole history into one DataFrame and adds
+a dozen indicator columns, so memory grows with the history. This runs the
+same Combined strategy (strategy_combined) over candles streamed from the
+candle store in fixed-size blocks: the store is memory-mapped, each block
+is copied in, its indicators are computed with a short tail of the previous
+block, and EMA / position state carries over. Peak memory depends on the
+block size, not on the history length.
+
+Indicators come from indicator_cache.IndicatorStream, whose rolling windows
+are summed per window rather than as a running sum, so a bar's value never
+depends on where a block started: any block size gives bit-identical trades
+to a single in-memory block. (pandas' running sums do depend on the series
+start, so the DataFrame run agrees to float rounding only.)
+
+Usage:
+    trades, capital = run_streaming(CandleStore(), 'XRP', '1m', block_bars=100_000)
+
+    python3 streaming_backtest.py --symbol XRP --interval 1m --block 100000 --verify
+"""
+
+import argparse
+
+import numpy as np
+
+from indicator_cache import IndicatorStream
+from trade_log import TradeLog
+
+BLOCK_BARS = 100_000
+
+
+def iter_blocks(columns, block_bars=BLOCK_BARS):
+    """(timestamp, close) arrays of consecutive blocks, copied out of (possibly memory-mapped) columns"""
+    for start in range(0, len(columns), block_bars):
+        stop = start + block_bars
+        yield np.array(columns.timestamp[start:stop]), np.array(columns.close[start:stop], dtype=np.float64)
+
+
+# ==============================================================================
+# Strategy
+# ==============================================================================
+
+class CombinedStrategyStream:
+    """strategy_combined with its position state carried across blocks"""
+
+    def __init__(self, initial_capital=100000, position_size=0.95, fee_rate=0.0002, stop_loss_pct=0.02):
+        self.capital = initial_capital
+        self.position_size = position_size
+        self.fee_rate = fee_rate
+        self.stop_loss_pct = stop_loss_pct
+        self.position = 0
+        self.entry_price = 0
+        self.invested = 0           # capital committed to the open position, buy fee included
+        self.trades = TradeLog()
+        self.prev_ema9 = None       # EMA_9 of the previous bar (None before the first bar)
+        self.last = None            # (timestamp, close) of the last bar seen
+
+    def update(self, timestamps, closes, ind):
+        fee_rate = self.fee_rate
+        rsis = ind['RSI'].tolist()
+        bb_lowers = ind['BB_Lower'].tolist()
+        bb_uppers = ind['BB_Upper'].tolist()
+        ema9s = ind['EMA_9'].tolist()
+        ema50s = ind['EMA_50'].tolist()
+        ema200s = ind['EMA_200'].tolist()
+
+        for i, close in enumerate(closes.tolist()):
+            ema9_prev, self.prev_ema9 = self.prev_ema9, ema9s[i]
+            rsi, bb_lower = rsis[i], bb_lowers[i]
+            # strategy_combined starts at the second bar and skips bars with NaN indicators
+            if ema9_prev is None or rsi != rsi or bb_lower != bb_lower:
+                continue
+            bb_upper, ema9, ema50, ema200 = bb_uppers[i], ema9s[i], ema50s[i], ema200s[i]
+            timestamp = np.datetime64(int(timestamps[i]), 'ms')
+
+            in_uptrend = ema50 > ema200
+            rsi_signal = rsi < 35
+            bb_signal = close <= bb_lower * 1.002
+            ema_trending_up = ema9 > ema9_prev
+
+            if self.position == 0 and in_uptrend and (rsi_signal or bb_signal) and ema_trending_up:
+                effective_capital = self.capital * (1 - fee_rate)
+                quantity = (effective_capital * self.position_size) / close
+                self.position = quantity
+                self.entry_price = close
+                self.invested = self.capital * self.position_size
+                self.trades.append(timestamp=timestamp, type='BUY', price=close, quantity=quantity,
+                                   capital=self.capital, rsi=rsi, ema50=ema50, ema200=ema200,
+                                   signal='RSI' if rsi_signal else 'BB', trend='UPTREND')
+
+            if self.position > 0:
+                rsi_exit = rsi > 65
+                bb_exit = close >= bb_upper * 0.998
+                stop_loss_hit = close <= self.entry_price * (1 - self.stop_loss_pct)
+                trend_reversal = ema50 <= ema200
+
+                if rsi_exit or bb_exit or stop_loss_hit or trend_reversal:
+                    self._sell(timestamp, close, rsi=rsi,
+                               exit_reason='TREND_REVERSAL' if trend_reversal else
+                               ('STOP_LOSS' if stop_loss_hit else ('RSI' if rsi_exit else 'BB')))
+
+        if len(closes):
+            self.last = (int(timestamps[-1]), float(closes[-1]))
+
+    def finish(self):
+        """Close any open position at the last bar; returns (trades, capital)"""
+        if self.position > 0:
+            timestamp, close = self.last
+            self._sell(np.datetime64(timestamp, 'ms'), close, exit_reason='END')
+        return self.trades, self.capital
+
+    def _sell(self, timestamp, close, rsi=float('nan'), exit_reason=''):
+        gross_proceeds = self.position * close
+        profit = gross_proceeds * (1 - self.fee_rate) - self.invested
+        self.capital += profit
+        self.trades.append(timestamp=timestamp, type='SELL', price=close, quantity=self.position,
+                           profit=profit, capital=self.capital, rsi=rsi, exit_reason=exit_reason)
+        self.position = 0
+        self.entry_price = 0
+
+
+# ==============================================================================
+# Pipeline
+# ==============================================================================
+
+def run_blocks(blocks, initial_capital=100000, position_size=0.95, fee_rate=0.0002):
+    """Run the streaming Combined strategy over an iterable of (timestamp, close) blocks"""
+    indicators = IndicatorStream()
+    strategy = CombinedStrategyStream(initial_capital, position_size, fee_rate)
+    for timestamps, closes in blocks:
+        strategy.update(timestamps, closes, indicators.update(closes))
+    return strategy.finish()
+
+
+def run_streaming(store, symbol, interval, block_bars=BLOCK_BARS, **kwargs):
+    """Stream a stored history (memory-mapped) through the Combined strategy"""
+    columns = store.load(symbol, interval, mmap=True)
+    if columns is None:
+        raise ValueError(f"No stored candles for {symbol} {interval}")
+    return run_blocks(iter_blocks(columns, block_bars), **kwargs)
+
+
+def _same_records(a, b):
+    """Bit-identical structured records (NaN fields included)"""
+    return a.tobytes() == b.tobytes()
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def main():
+    import time
+    import tracemalloc
+    from candle_store import CandleStore
+    from coinone_xrp_backtest import analyze_trades, print_results
+
+    parser = argparse.ArgumentParser(description='Out-of-core streaming backtest (Combined strategy)')
+    parser.add_argument('--symbol', default='XRP')
+    parser.add_argument('--interval', default='5m')
+    parser.add_argument('--store', default='candle_store', help='Candle store directory')
+    parser.add_argument('--block', type=int, default=BLOCK_BARS, help='Bars per block')
+    parser.add_argument('--capital', type=float, default=100000)
+    parser.add_argument('--verify', action='store_true',
+                        help='Also run the history as one in-memory block and compare trades')
+    args = parser.parse_args()
+
+    store = CandleStore(args.store)
+    tracemalloc.start()
+    started = time.perf_counter()
+    trades, capital = run_streaming(store, args.symbol, args.interval, args.block, initial_capital=args.capital)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    bars = len(store.load(args.symbol, args.interval, mmap=True))
+    print(f"✓ {bars:,} bars in blocks of {args.block:,}: {elapsed:.2f}s, peak {peak / 1e6:.1f} MB")
+    print_results([analyze_trades(trades, args.capital, 'Combined Strategy (streaming)')])
+
+    if args.verify:
+        columns = store.load(args.symbol, args.interval)
+        whole, _ = run_blocks([(columns.timestamp, columns.close)], initial_capital=args.capital)
+        same = len(whole) == len(trades) and _same_records(whole.records, trades.records)
+        print(f"{'✓' if same else '✗'} Streaming vs in-memory: {len(trades)} vs {len(whole)} trades, "
+              f"{'identical' if same else 'DIFFERENT'}")
+
+
+if __name__ == '__main__':
+    main()
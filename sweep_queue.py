@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Distributed sweep execution - SQLite job queue
+
+A coordinator expands a sweep (strategy x symbol x interval x parameter
+grid) into tasks, groups them into chunks and pushes the chunks into a
+SQLite queue. Workers on any node pull chunks, read candles from a shared
+candle store, run the backtests and push the results back.
+
+- Chunk IDs are a hash of the sweep name and the chunk's tasks, so
+  submitting the same sweep twice doesn't queue anything twice.
+- A claimed chunk is leased to its worker; a worker that dies lets the lease
+  expire and the chunk goes back to the queue, up to `max_attempts` times.
+  Failures are recorded with their traceback.
+- Progress is counted per sweep and status.
+
+Workers on the coordinator's machine (or on a filesystem with working
+POSIX locks) can open the .db file directly; everywhere else they talk to
+`serve` over HTTP. Chunks are independent and a claim is one short
+transaction, so throughput grows with the worker count until the queue
+round trip (about 1 ms on the .db file, 5 ms over HTTP) becomes comparable
+to a chunk's run time; size chunks to run for seconds, not milliseconds.
+
+Usage:
+    python3 sweep_queue.py submit --sweep xrp-grid --strategies combined rsi \\
+        --symbols XRP ETH --intervals 5m --grid position_size=0.5,0.75,0.95 --chunk 4
+    python3 sweep_queue.py serve --port 8766                     # on the coordinator
+    python3 sweep_queue.py worker --queue http://coordinator:8766 --store /mnt/shared/candle_store --processes 4
+    python3 sweep_queue.py progress --sweep xrp-grid
+    python3 sweep_queue.py results --sweep xrp-grid --top 10
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+QUEUE_PATH = 'sweep_queue.db'
+LEASE_SECONDS = 300.0
+MAX_ATTEMPTS = 3
+STATUSES = ('pending', 'running', 'done', 'failed')
+
+# Strategy name -> function in coinone_xrp_backtest
+STRATEGIES = {
+    'bollinger': 'strategy_bollinger_bands',
+    'rsi': 'strategy_rsi',
+    'ema': 'strategy_ema_crossover',
+    'combined': 'strategy_combined',
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id    TEXT PRIMARY KEY,
+    sweep       TEXT NOT NULL,
+    seq         INTEGER NOT NULL,
+    tasks       TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    worker      TEXT,
+    lease_until REAL,
+    result      TEXT,
+    error       TEXT,
+    updated_at  REAL
+);
+CREATE INDEX IF NOT EXISTS chunks_claim ON chunks (status, seq);
+CREATE INDEX IF NOT EXISTS chunks_sweep ON chunks (sweep, status);
+"""
+
+
+# ==============================================================================
+# Sweeps
+# ==============================================================================
+
+def strategy_parameters(strategy):
+    """Names of the parameters a strategy function accepts after the DataFrame"""
+    import inspect
+    import coinone_xrp_backtest
+
+    fn = getattr(coinone_xrp_backtest, STRATEGIES[strategy])
+    return list(inspect.signature(fn).parameters)[1:]
+
+
+def expand_sweep(strategies, symbols, intervals, grid):
+    """
+    Every (strategy, symbol, interval, params) combination as task dicts
+
+    Each strategy only gets the grid parameters it accepts, so e.g. a
+    fee_rate axis doesn't repeat strategy_rsi runs.
+    """
+    tasks = []
+    for strategy in strategies:
+        accepted = strategy_parameters(strategy)
+        names = sorted(name for name in grid if name in accepted)
+        for symbol, interval, values in itertools.product(
+                symbols, intervals, itertools.product(*(grid[name] for name in names))):
+            tasks.append({'strategy': strategy, 'symbol': symbol.upper(), 'interval': interval,
+                          'params': dict(zip(names, values))})
+    return tasks
+
+
+def chunk_id(sweep, tasks):
+    payload = json.dumps({'sweep': sweep, 'tasks': tasks}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def parse_grid(items):
+    """['position_size=0.5,0.95', 'fee_rate=0.0002'] -> {'position_size': [0.5, 0.95], ...}"""
+    grid = {}
+    for item in items:
+        name, _, values = item.partition('=')
+        grid[name] = [json.loads(v) for v in values.split(',')]
+    return grid
+
+
+# ==============================================================================
+# Queue
+# ==============================================================================
+
+class JobQueue:
+    """Chunk queue in one SQLite file (WAL mode, one connection per thread)"""
+
+    def __init__(self, path=QUEUE_PATH, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._db.executescript(_SCHEMA)
+
+    @property
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    def _transaction(self, fn):
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            result = fn(db)
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        return result
+
+    def submit(self, sweep, tasks, chunk_size=8):
+        """Queue `tasks` in chunks; returns the number of chunks that weren't queued before"""
+        now = time.time()
+        rows = []
+        for seq, start in enumerate(range(0, len(tasks), chunk_size)):
+            chunk = tasks[start:start + chunk_size]
+            rows.append((chunk_id(sweep, chunk), sweep, seq, json.dumps(chunk), now))
+
+        def insert(db):
+            before = db.total_changes
+            db.executemany('INSERT OR IGNORE INTO chunks (chunk_id, sweep, seq, tasks, updated_at) '
+                           'VALUES (?, ?, ?, ?, ?)', rows)
+            return db.total_changes - before
+        return self._transaction(insert)
+
+    def claim(self, worker):
+        """Lease the next pending (or abandoned) chunk to `worker`; None when nothing is left"""
+        def claim(db):
+            now = time.time()
+            db.execute("UPDATE chunks SET status = 'failed', error = 'lease expired', updated_at = ? "
+                       "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                       (now, now, self.max_attempts))
+            row = db.execute("SELECT chunk_id, sweep, tasks, attempts FROM chunks "
+                             "WHERE status = 'pending' OR (status = 'running' AND lease_until < ?) "
+                             "ORDER BY seq LIMIT 1", (now,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE chunks SET status = 'running', attempts = attempts + 1, worker = ?, "
+                       "lease_until = ?, updated_at = ? WHERE chunk_id = ?",
+                       (worker, now + self.lease_seconds, now, row[0]))
+            return {'chunk_id': row[0], 'sweep': row[1], 'tasks': json.loads(row[2]), 'attempt': row[3] + 1}
+        return self._transaction(claim)
+
+    def heartbeat(self, chunk_id, worker):
+        """Extend the lease; False if the chunk was taken over by another worker"""
+        cursor = self._db.execute("UPDATE chunks SET lease_until = ?, updated_at = ? "
+                                  "WHERE chunk_id = ? AND worker = ? AND status = 'running'",
+                                  (time.time() + self.lease_seconds, time.time(), chunk_id, worker))
+        return cursor.rowcount == 1
+
+    def complete(self, chunk_id, worker, result):
+        """Store a chunk's results; the first completion wins, later ones are ignored"""
+        cursor = self._db.execute("UPDATE chunks SET status = 'done', result = ?, worker = ?, error = NULL, "
+                                  "updated_at = ? WHERE chunk_id = ? AND status != 'done'",
+                                  (json.dumps(result), worker, time.time(), chunk_id))
+        return cursor.rowcount == 1
+
+    def fail(self, chunk_id, worker, error):
+        """Record an error; the chunk is retried until it has used max_attempts"""
+        cursor = self._db.execute("UPDATE chunks SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END, "
+                                  "error = ?, lease_until = NULL, updated_at = ? "
+                                  "WHERE chunk_id = ? AND worker = ? AND status = 'running'",
+                                  (self.max_attempts, error, time.time(), chunk_id, worker))
+        return cursor.rowcount == 1
+
+    def retry_failed(self, sweep):
+        """Put a sweep's failed chunks back in the queue with fresh attempts"""
+        cursor = self._db.execute("UPDATE chunks SET status = 'pending', attempts = 0, updated_at = ? "
+                                  "WHERE sweep = ? AND status = 'failed'", (time.time(), sweep))
+        return cursor.rowcount
+
+    def progress(self, sweep=None):
+        """{status: chunk count, "total": all chunks}, for one sweep or all"""
+        where, args = ('WHERE sweep = ?', (sweep,)) if sweep else ('', ())
+        counts = dict.fromkeys(STATUSES, 0)
+        for status, count in self._db.execute(f'SELECT status, COUNT(*) FROM chunks {where} GROUP BY status', args):
+            counts[status] = count
+        counts['total'] = sum(counts[status] for status in STATUSES)
+        return counts
+
+    def results(self, sweep):
+        """Per-task result dicts of a sweep's finished chunks"""
+        for (result,) in self._db.execute("SELECT result FROM chunks WHERE sweep = ? AND status = 'done' "
+                                          "ORDER BY seq", (sweep,)):
+            yield from json.loads(result)
+
+    def errors(self, sweep):
+        return self._db.execute("SELECT chunk_id, attempts, error FROM chunks WHERE sweep = ? AND error IS NOT NULL "
+                                "AND status != 'done' ORDER BY seq", (sweep,)).fetchall()
+
+
+class RemoteQueue:
+    """JobQueue's worker-side methods over `serve`'s HTTP API"""
+
+    def __init__(self, url, timeout=30):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _call(self, method, **payload):
+        import urllib.request
+
+        request = urllib.request.Request(f'{self.url}/{method}', data=json.dumps(payload).encode(),
+                                         headers={'Content-Type': 'application/json'}, method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())['result']
+
+    def claim(self, worker):
+        return self._call('claim', worker=worker)
+
+    def heartbeat(self, chunk_id, worker):
+        return self._call('heartbeat', chunk_id=chunk_id, worker=worker)
+
+    def complete(self, chunk_id, worker, result):
+        return self._call('complete', chunk_id=chunk_id, worker=worker, result=result)
+
+    def fail(self, chunk_id, worker, error):
+        return self._call('fail', chunk_id=chunk_id, worker=worker, error=error)
+
+    def progress(self, sweep=None):
+        return self._call('progress', sweep=sweep)
+
+
+def open_queue(location):
+    """JobQueue for a .db path, RemoteQueue for an http:// URL"""
+    if location.startswith(('http://', 'https://')):
+        return RemoteQueue(location)
+    return JobQueue(location)
+
+
+# ==============================================================================
+# Coordinator HTTP API
+# ==============================================================================
+
+class _Handler(BaseHTTPRequestHandler):
+    queue = None
+    methods = ('claim', 'heartbeat', 'complete', 'fail', 'progress')
+
+    def do_POST(self):
+        method = urlparse(self.path).path.strip('/')
+        if method not in self.methods:
+            return self._reply(404, {'error': f'Unknown method {method}'})
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            result = getattr(self.queue, method)(**payload)
+        except (TypeError, ValueError) as e:
+            return self._reply(400, {'error': str(e)})
+        self._reply(200, {'result': result})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.strip('/') != 'progress':
+            return self._reply(404, {'error': f'Unknown path {url.path}'})
+        sweep = parse_qs(url.query).get('sweep', [None])[-1]
+        self._reply(200, {'result': self.queue.progress(sweep)})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(queue, host='0.0.0.0', port=8766):
+    """Block serving the worker API for `queue`"""
+    server = ThreadingHTTPServer((host, port), type('Handler', (_Handler,), {'queue': queue}))
+    print(f"✓ Serving {queue.path} on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# ==============================================================================
+# Worker
+# ==============================================================================
+
+class SweepWorker:
+    """Pulls chunks, runs their backtests on candles from a shared store and pushes results"""
+
+    def __init__(self, queue, store, worker_id=None, cache=None):
+        self.queue = queue
+        self.store = store
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        self.cache = cache          # optional result_cache.ResultCache
+        self._frames = {}           # (symbol, interval) -> (last timestamp, DataFrame)
+
+    def run(self, poll_seconds=2.0, exit_when_idle=False):
+        """Work until the queue is empty (exit_when_idle) or forever; returns chunks done"""
+        done = 0
+        while True:
+            chunk = self.queue.claim(self.worker_id)
+            if chunk is None:
+                if exit_when_idle:
+                    return done
+                time.sleep(poll_seconds)
+                continue
+            try:
+                results = self.run_chunk(chunk)
+            except Exception:
+                self.queue.fail(chunk['chunk_id'], self.worker_id, traceback.format_exc())
+                continue
+            self.queue.complete(chunk['chunk_id'], self.worker_id, results)
+            done += 1
+
+    def run_chunk(self, chunk):
+        results = []
+        for k, task in enumerate(chunk['tasks']):
+            if k and not self.queue.heartbeat(chunk['chunk_id'], self.worker_id):
+                raise RuntimeError('lease lost')
+            results.append(self.run_task(task))
+        return results
+
+    def run_task(self, task):
+        import inspect
+        import coinone_xrp_backtest
+        from coinone_xrp_backtest import analyze_trades
+
+        fn = getattr(coinone_xrp_backtest, STRATEGIES[task['strategy']])
+        df = self._frame(task['symbol'], task['interval'])
+        params = dict(task['params'])
+        if self.cache is not None:
+            trades, capital = self.cache.run(fn, df, **params)
+        else:
+            trades, capital = fn(df, **params)
+        defaults = {name: param.default for name, param in inspect.signature(fn).parameters.items()}
+        initial_capital = params.get('initial_capital', defaults['initial_capital'])
+        fee_rate = params.get('fee_rate', defaults.get('fee_rate', 0.0))
+        result = analyze_trades(trades, initial_capital, task['strategy'], df, fee_rate)
+        result.update(task)
+        return result
+
+    def _frame(self, symbol, interval):
+        """Candles + calculate_all_indicators columns, from the store's indicator cache"""
+        from indicator_cache import indicator_cache_for
+
+        candles = self.store.load(symbol, interval)
+        if candles is None:
+            raise ValueError(f"No stored candles for {symbol} {interval}")
+        key = (symbol, interval)
+        last = int(candles.timestamp[-1])
+        if key not in self._frames or self._frames[key][0] != last:
+            df = indicator_cache_for(self.store, symbol, interval, candles).to_dataframe(candles)
+            self._frames[key] = (last, df)
+        return self._frames[key][1]
+
+
+def _worker_process(location, store_root, cache_dir, exit_when_idle):
+    from candle_store import CandleStore
+
+    cache = None
+    if cache_dir:
+        from result_cache import ResultCache
+        cache = ResultCache(cache_dir)
+    worker = SweepWorker(open_queue(location), CandleStore(store_root), cache=cache)
+    done = worker.run(exit_when_idle=exit_when_idle)
+    print(f"✓ {worker.worker_id}: {done} chunks")
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Distributed sweep queue (coordinator + workers)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    submit = commands.add_parser('submit', help='Expand a sweep and queue its chunks')
+    submit.add_argument('--sweep', required=True, help='Sweep name')
+    submit.add_argument('--strategies', nargs='+', default=['combined'], choices=sorted(STRATEGIES))
+    submit.add_argument('--symbols', nargs='+', default=['XRP'])
+    submit.add_argument('--intervals', nargs='+', default=['5m'])
+    submit.add_argument('--grid', nargs='*', default=[], help='name=v1,v2,... strategy parameters')
+    submit.add_argument('--chunk', type=int, default=8, help='Tasks per chunk')
+
+    serve_parser = commands.add_parser('serve', help='HTTP API for remote workers')
+    serve_parser.add_argument('--host', default='0.0.0.0')
+    serve_parser.add_argument('--port', type=int, default=8766)
+
+    worker = commands.add_parser('worker', help='Pull and run chunks')
+    worker.add_argument('--store', default='candle_store', help='Shared candle store directory')
+    worker.add_argument('--cache', help='Result cache directory (result_cache.py)')
+    worker.add_argument('--processes', type=int, default=1)
+    worker.add_argument('--exit-when-idle', action='store_true')
+
+    progress = commands.add_parser('progress', help='Chunk counts per status')
+    progress.add_argument('--sweep')
+
+    results = commands.add_parser('results', help='Best results of a sweep')
+    results.add_argument('--sweep', required=True)
+    results.add_argument('--top', type=int, default=10)
+
+    retry = commands.add_parser('retry', help='Requeue failed chunks')
+    retry.add_argument('--sweep', required=True)
+
+    for sub in (submit, serve_parser, worker, progress, results, retry):
+        sub.add_argument('--queue', default=QUEUE_PATH, help='Queue .db path (or http://host:port for workers)')
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        if args.processes == 1:
+            _worker_process(args.queue, args.store, args.cache, args.exit_when_idle)
+            return
+        import multiprocessing
+        processes = [multiprocessing.Process(target=_worker_process,
+                                             args=(args.queue, args.store, args.cache, args.exit_when_idle))
+                     for _ in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        return
+
+    queue = open_queue(args.queue)
+    if args.command == 'submit':
+        tasks = expand_sweep(args.strategies, args.symbols, args.intervals, parse_grid(args.grid))
+        added = queue.submit(args.sweep, tasks, args.chunk)
+        print(f"✓ {args.sweep}: {len(tasks)} tasks, {added} new chunks queued")
+    elif args.command == 'serve':
+        serve(queue, args.host, args.port)
+    elif args.command == 'progress':
+        counts = queue.progress(args.sweep)
+        done = counts['done'] / counts['total'] * 100 if counts['total'] else 0
+        print(f"{args.sweep or 'all sweeps'}: {done:.0f}% done  " +
+              '  '.join(f"{status} {counts[status]}" for status in STATUSES))
+    elif args.command == 'retry':
+        print(f"✓ {queue.retry_failed(args.sweep)} chunks requeued")
+    elif args.command == 'results':
+        rows = sorted(queue.results(args.sweep), key=lambda r: r['return_pct'], reverse=True)
+        print(f"{'Strategy':<10} {'Symbol':<7} {'Int':<4} {'Trades':>6} {'Win %':>6} {'Return %':>9}  Params")
+        for r in rows[:args.top]:
+            print(f"{r['strategy']:<10} {r['symbol']:<7} {r['interval']:<4} {r['total_trades']:>6} "
+                  f"{r.get('win_rate', 0):>6.1f} {r['return_pct']:>9.2f}  {json.dumps(r['params'])}")
+        for chunk, attempts, error in queue.errors(args.sweep):
+            print(f"✗ {chunk} ({attempts} attempts): {error.strip().splitlines()[-1]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Streaming swing-point tracker for RSI divergence
+
+detect_rsi_divergence used to rescan the last 20 candles on every call and
+read RSI from pre-baked 'rsi14' dict fields, falling back to 50 when the
+field was missing, which quietly turned the check off. This tracks swing
+highs / lows (close above / below both neighbours, confirmed one bar later)
+together with the RSI at each pivot as bars arrive, and expires pivots that
+leave the window, so each bar costs O(1).
+
+Divergences use the same rule as before over the same window:
+    bullish: last swing low is lower than the previous one, its RSI higher
+    bearish: last swing high is higher than the previous one, its RSI lower
+
+Usage:
+    tracker = SwingTracker(window=20)
+    for close in closes:
+        state = tracker.update(close)         # RSI(14) computed internally
+    bullish, bearish = divergence_series(closes, rsi_series(closes, 14))
+"""
+
+from collections import deque
+
+import numpy as np
+
+from incremental_indicators import IncrementalRSI
+
+NAN = float('nan')
+
+
+class SwingTracker:
+    """Price / RSI pivots within the last `window` bars"""
+
+    def __init__(self, window=20, rsi_period=14):
+        self.window = window
+        self.rsi = IncrementalRSI(rsi_period)
+        self.n = 0                      # bars seen
+        self.prev = deque(maxlen=2)     # (close, rsi) of the last two bars
+        self.lows = deque()             # (bar, close, rsi) swing lows in the window
+        self.highs = deque()            # (bar, close, rsi) swing highs in the window
+
+    def update(self, close, rsi=None):
+        """
+        Add a closed bar; `rsi` overrides the internal RSI(14) if given
+
+        Returns:
+            Same dict as detect_rsi_divergence
+        """
+        # The internal RSI follows every bar, so later bars without an `rsi` still get one
+        self.rsi.update(close)
+        if rsi is None:
+            value = self.rsi.value()
+            rsi = NAN if value is None else value
+
+        # The middle of the last three bars becomes a pivot once this bar is in
+        if len(self.prev) == 2:
+            (before, _), (middle, middle_rsi) = self.prev
+            pivot = self.n - 1
+            if before < middle > close:
+                self.highs.append((pivot, middle, middle_rsi))
+            if before > middle < close:
+                self.lows.append((pivot, middle, middle_rsi))
+
+        self.prev.append((close, rsi))
+        self.n += 1
+
+        # Pivots must lie strictly inside the last `window` bars
+        oldest = self.n - self.window + 1
+        while self.highs and self.highs[0][0] < oldest:
+            self.highs.popleft()
+        while self.lows and self.lows[0][0] < oldest:
+            self.lows.popleft()
+
+        return self.state()
+
+    def state(self):
+        if self.n < self.window:
+            return {'bullish_divergence': False, 'bearish_divergence': False}
+        return {
+            'bullish_divergence': _diverges(self.lows, lower_price=True),
+            'bearish_divergence': _diverges(self.highs, lower_price=False),
+            'price_lows_count': len(self.lows),
+            'price_highs_count': len(self.highs)
+        }
+
+
+def _diverges(pivots, lower_price):
+    if len(pivots) < 2:
+        return False
+    _, prev_price, prev_rsi = pivots[-2]
+    _, last_price, last_rsi = pivots[-1]
+    if lower_price:
+        return last_price < prev_price and last_rsi > prev_rsi
+    return last_price > prev_price and last_rsi < prev_rsi
+
+
+def divergence_series(closes, rsi, window=20):
+    """
+    Bullish / bearish divergence flags for every bar at once (backtests)
+
+    Element i is what SwingTracker reports after bar i.
+
+    Returns:
+        (bullish bool array, bearish bool array)
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    rsi = np.asarray(rsi, dtype=np.float64)
+    n = len(closes)
+    bars = np.arange(n)
+    if n < 3:
+        return np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+
+    before, middle, after = closes[:-2], closes[1:-1], closes[2:]
+    high_pivots = np.flatnonzero((before < middle) & (middle > after)) + 1
+    low_pivots = np.flatnonzero((before > middle) & (middle < after)) + 1
+
+    def flags(pivots, lower_price):
+        # Latest pivot confirmed by bar i is the latest one at or before i - 1
+        last = np.searchsorted(pivots, bars - 1, side='right') - 1
+        prev = last - 1
+        oldest = bars - window + 2
+        ok = (prev >= 0) & (bars >= window - 1)
+        last_bar = pivots[np.maximum(last, 0)] if len(pivots) else np.zeros(n, dtype=np.int64)
+        prev_bar = pivots[np.maximum(prev, 0)] if len(pivots) else np.zeros(n, dtype=np.int64)
+        ok &= prev_bar >= oldest
+        with np.errstate(invalid='ignore'):
+            if lower_price:
+                diverges = (closes[last_bar] < closes[prev_bar]) & (rsi[last_bar] > rsi[prev_bar])
+            else:
+                diverges = (closes[last_bar] > closes[prev_bar]) & (rsi[last_bar] < rsi[prev_bar])
+        return ok & diverges
+
+    return flags(low_pivots, True), flags(high_pivots, False)
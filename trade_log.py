@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Compact array-backed trade / entry logs
+
+Backtests used to append one dict per trade (and per entry signal, with a
+nested `conditions` dict). These logs keep the same information in a
+preallocated NumPy structured array instead: fixed-width numeric fields,
+string fields stored as small enum codes, condition flags packed into a
+bitmask. Metrics run directly on `log.records`; dicts are only built lazily
+when iterating / indexing for display or JSON output.
+
+Usage:
+    trades = TradeLog()
+    trades.append(timestamp=ts, type='BUY', price=close, quantity=qty, capital=capital)
+    sells = trades.records[trades.records['type'] == SELL]
+    for t in trades:            # dicts, same shape as the old list entries
+        print(t['type'], t['price'])
+"""
+
+import abc
+
+import numpy as np
+
+NAN = float('nan')
+
+# Enum tables for string-valued fields ('' means "not set")
+TRADE_TYPES = ('BUY', 'SELL')
+SIGNALS = ('', 'RSI', 'BB')
+TRENDS = ('', 'UPTREND')
+EXIT_REASONS = ('', 'TREND_REVERSAL', 'STOP_LOSS', 'RSI', 'BB', 'END')
+
+BUY = TRADE_TYPES.index('BUY')
+SELL = TRADE_TYPES.index('SELL')
+
+TRADE_DTYPE = np.dtype([
+    ('timestamp', 'datetime64[ms]'),
+    ('type', 'u1'),
+    ('price', 'f8'),
+    ('quantity', 'f8'),
+    ('profit', 'f8'),
+    ('capital', 'f8'),
+    ('rsi', 'f8'),
+    ('ema50', 'f8'),
+    ('ema200', 'f8'),
+    ('signal', 'u1'),
+    ('trend', 'u1'),
+    ('exit_reason', 'u1'),
+])
+
+PORTFOLIO_TRADE_DTYPE = np.dtype([
+    ('timestamp', 'datetime64[ms]'),
+    ('symbol', 'u2'),
+    ('type', 'u1'),
+    ('price', 'f8'),
+    ('quantity', 'f8'),
+    ('profit', 'f8'),
+    ('cash', 'f8'),
+    ('exit_reason', 'u1'),
+])
+
+ENTRY_DTYPE = np.dtype([
+    ('time', 'datetime64[ms]'),
+    ('price', 'f8'),
+    ('rsi', 'f8'),
+    ('bb_position', 'f8'),
+    ('volume_ratio', 'f8'),
+    ('strength', 'f8'),
+    ('position_size', 'f8'),
+    ('sl_percent', 'f8'),
+    ('tp_percent', 'f8'),
+    ('conditions', 'u1'),
+])
+
+_CODES = {
+    'type': {name: i for i, name in enumerate(TRADE_TYPES)},
+    'signal': {name: i for i, name in enumerate(SIGNALS)},
+    'trend': {name: i for i, name in enumerate(TRENDS)},
+    'exit_reason': {name: i for i, name in enumerate(EXIT_REASONS)},
+}
+_NAMES = {
+    'type': TRADE_TYPES,
+    'signal': SIGNALS,
+    'trend': TRENDS,
+    'exit_reason': EXIT_REASONS,
+}
+
+
+class RecordLog(abc.ABC):
+    """Growable structured-array buffer; subclasses set `dtype` and the row <-> dict mapping"""
+
+    dtype = None
+
+    def __init__(self, capacity=64):
+        self._buf = np.zeros(capacity, dtype=self.dtype)
+        self._n = 0
+
+    @classmethod
+    def from_records(cls, records):
+        """Log holding a copy of previously saved `records`"""
+        log = cls(max(len(records), 1))
+        log._buf[:len(records)] = records
+        log._n = len(records)
+        return log
+
+    @property
+    def records(self):
+        """Structured array view of the filled rows (no copy)"""
+        return self._buf[:self._n]
+
+    def __len__(self):
+        return self._n
+
+    def __bool__(self):
+        return self._n > 0
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self._to_dict(self._buf[i])
+
+    def __getitem__(self, index):
+        return self._to_dict(self.records[index])
+
+    def to_dicts(self):
+        """Materialize every row as a dict (for display / JSON)"""
+        return list(self)
+
+    def extend(self, **columns):
+        """Append several rows at once from equal-length field arrays"""
+        n = len(next(iter(columns.values())))
+        if self._n + n > len(self._buf):
+            grown = np.zeros(max(2 * len(self._buf), self._n + n, 16), dtype=self.dtype)
+            grown[:self._n] = self._buf[:self._n]
+            self._buf = grown
+        rows = self._buf[self._n:self._n + n]
+        for field, values in columns.items():
+            rows[field] = values
+        self._n += n
+
+    def _next_slot(self):
+        if self._n == len(self._buf):
+            grown = np.zeros(max(2 * len(self._buf), 16), dtype=self.dtype)
+            grown[:self._n] = self._buf
+            self._buf = grown
+        self._n += 1
+        return self._n - 1
+
+    @abc.abstractmethod
+    def _to_dict(self, row):
+        """One structured-array row -> display dict"""
+
+
+class TradeLog(RecordLog):
+    """BUY / SELL fills produced by the strategy_* backtests"""
+
+    dtype = TRADE_DTYPE
+    enums = _NAMES  # field -> names, for writers that keep the enum labels
+
+    def append(self, timestamp, type, price, quantity, capital, profit=NAN, rsi=NAN,
+               ema50=NAN, ema200=NAN, signal='', trend='', exit_reason=''):
+        slot = self._next_slot()
+        self._buf[slot] = (
+            np.datetime64(timestamp, 'ms'),
+            _CODES['type'][type],
+            price,
+            quantity,
+            profit,
+            capital,
+            rsi,
+            ema50,
+            ema200,
+            _CODES['signal'][signal],
+            _CODES['trend'][trend],
+            _CODES['exit_reason'][exit_reason],
+        )
+
+    def _to_dict(self, row):
+        trade = {
+            'timestamp': row['timestamp'].item(),
+            'type': TRADE_TYPES[row['type']],
+            'price': float(row['price']),
+            'quantity': float(row['quantity']),
+        }
+        if not np.isnan(row['profit']):
+            trade['profit'] = float(row['profit'])
+        trade['capital'] = float(row['capital'])
+        for field in ('rsi', 'ema50', 'ema200'):
+            if not np.isnan(row[field]):
+                trade[field] = float(row[field])
+        for field in ('signal', 'trend', 'exit_reason'):
+            if row[field]:
+                trade[field] = _NAMES[field][row[field]]
+        return trade
+
+
+class EntryLog(RecordLog):
+    """Entry signals found by the scanners; condition flags packed into a bitmask"""
+
+    dtype = ENTRY_DTYPE
+
+    def __init__(self, condition_names, capacity=64):
+        condition_names = tuple(condition_names)
+        bits = self.dtype['conditions'].itemsize * 8
+        if len(condition_names) > bits:
+            raise ValueError(f"EntryLog packs at most {bits} conditions, got {len(condition_names)}")
+        super().__init__(capacity)
+        self.condition_names = condition_names
+
+    def append(self, time, price, rsi, volume_ratio, strength, conditions,
+               bb_position=NAN, position_size=NAN, sl_percent=NAN, tp_percent=NAN):
+        mask = 0
+        for bit, name in enumerate(self.condition_names):
+            if conditions.get(name):
+                mask |= 1 << bit
+        slot = self._next_slot()
+        self._buf[slot] = (
+            np.datetime64(time, 'ms'),
+            price,
+            rsi,
+            bb_position,
+            volume_ratio,
+            strength,
+            position_size,
+            sl_percent,
+            tp_percent,
+            mask,
+        )
+
+    def condition_mask(self, name):
+        """Boolean array: which entries had condition `name` met"""
+        bit = self.condition_names.index(name)
+        return (self.records['conditions'] >> bit) & 1 == 1
+
+    def _to_dict(self, row):
+        entry = {
+            'time': row['time'].item(),
+            'price': float(row['price']),
+            'rsi': float(row['rsi']),
+        }
+        if not np.isnan(row['bb_position']):
+            entry['bb_position'] = float(row['bb_position'])
+        entry['volume_ratio'] = float(row['volume_ratio'])
+        entry['strength'] = float(row['strength'])
+        mask = int(row['conditions'])
+        entry['conditions'] = {
+            name: bool(mask >> bit & 1) for bit, name in enumerate(self.condition_names)
+        }
+        for field in ('position_size', 'sl_percent', 'tp_percent'):
+            if not np.isnan(row[field]):
+                entry[field] = float(row[field])
+        return entry
+
+
+class PortfolioTradeLog(RecordLog):
+    """BUY / SELL fills of a multi-symbol portfolio backtest (symbol = index into `symbols`)"""
+
+    dtype = PORTFOLIO_TRADE_DTYPE
+    enums = {'type': TRADE_TYPES, 'exit_reason': EXIT_REASONS}
+
+    def __init__(self, symbols, capacity=64):
+        super().__init__(capacity)
+        self.symbols = tuple(symbols)
+
+    def _to_dict(self, row):
+        trade = {
+            'timestamp': row['timestamp'].item(),
+            'symbol': self.symbols[row['symbol']],
+            'type': TRADE_TYPES[row['type']],
+            'price': float(row['price']),
+            'quantity': float(row['quantity']),
+        }
+        if not np.isnan(row['profit']):
+            trade['profit'] = float(row['profit'])
+        trade['cash'] = float(row['cash'])
+        if row['exit_reason']:
+            trade['exit_reason'] = EXIT_REASONS[row['exit_reason']]
+        return trade
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Public trade tape recorder and tick-level replay
+
+Nothing in the project has tick data, so intra-candle questions (how long a
+signal is visible, whether TP or SL was hit first inside a candle) could
+only be approximated from 1m candles. This records Coinone / Bybit public
+trades into append-only compressed segments and replays them as a stream:
+ticks in bounded batches, candles rebuilt on the fly, paced in real time,
+N x faster, or as fast as possible.
+
+File format (<exchange>_<SYMBOL>_<YYYYMMDD>.tape):
+    b'TAP1' | u4 meta length | meta JSON (symbol, exchange, decimals)
+    segment*: u4 payload bytes | u4 trades | i8 first ts | i8 last ts
+              | zlib(ts deltas i8, price deltas i8, qty i8, side u1)
+
+Usage:
+    with TapeWriter('tapes/coinone_XRP_20261018.tape', 'XRP', 'coinone') as tape:
+        tape.write(ts, price, qty, side)                 # arrays or scalars
+    for ticks, candles in replay(['tapes/coinone_XRP_20261018.tape'], interval='5m', speed=10):
+        ...                                              # (ts, price, qty), closed CandleColumns
+
+    python3 trade_tape.py record --exchange coinone --symbol XRP
+    python3 trade_tape.py replay tapes/coinone_XRP_*.tape --interval 5m
+"""
+
+import argparse
+import json
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+from candle_decoder import CandleColumns
+from multi_timeframe import INTERVAL_MS
+
+MAGIC = b'TAP1'
+SEGMENT_HEADER = struct.Struct('<IIqq')
+BUY, SELL, UNKNOWN = 0, 1, 2
+
+
+# ==============================================================================
+# Writer
+# ==============================================================================
+
+class TapeWriter:
+    """Buffers trades and appends them as compressed segments of `segment_trades`"""
+
+    def __init__(self, path, symbol, exchange, price_decimals=8, qty_decimals=8,
+                 segment_trades=5000, compress_level=6):
+        self.path = path
+        self.segment_trades = segment_trades
+        self.compress_level = compress_level
+        self.price_scale = 10 ** price_decimals
+        self.qty_scale = 10 ** qty_decimals
+        self.last_ts = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'ab')
+        if new_file:
+            meta = json.dumps({'symbol': symbol, 'exchange': exchange,
+                               'price_decimals': price_decimals, 'qty_decimals': qty_decimals}).encode()
+            self._file.write(MAGIC + struct.pack('<I', len(meta)) + meta)
+        self._pending = []
+        self._pending_trades = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, ts, price, qty, side=UNKNOWN):
+        """Append trades (oldest first); scalars or equal-length arrays"""
+        ts = np.atleast_1d(np.asarray(ts, dtype=np.int64))
+        n = len(ts)
+        batch = (
+            ts,
+            np.rint(np.broadcast_to(np.asarray(price, dtype=np.float64), n) * self.price_scale).astype(np.int64),
+            np.rint(np.broadcast_to(np.asarray(qty, dtype=np.float64), n) * self.qty_scale).astype(np.int64),
+            np.broadcast_to(np.asarray(side, dtype=np.uint8), n),
+        )
+        self._pending.append(batch)
+        self._pending_trades += n
+        if n:
+            self.last_ts = int(ts[-1])
+        if self._pending_trades >= self.segment_trades:
+            self.flush()
+
+    def flush(self):
+        if not self._pending_trades:
+            return
+        ts, prices, qtys, sides = (np.concatenate(column) for column in zip(*self._pending))
+        payload = b''.join((
+            np.diff(ts, prepend=ts[0]).tobytes(),
+            np.diff(prices, prepend=0).tobytes(),
+            qtys.tobytes(),
+            sides.astype(np.uint8).tobytes(),
+        ))
+        compressed = zlib.compress(payload, self.compress_level)
+        self._file.write(SEGMENT_HEADER.pack(len(compressed), len(ts), ts[0], ts[-1]))
+        self._file.write(compressed)
+        self._file.flush()
+        self._pending = []
+        self._pending_trades = 0
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+
+# ==============================================================================
+# Reader
+# ==============================================================================
+
+class TapeReader:
+    """Reads a .tape file one segment at a time"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(4) != MAGIC:
+                raise ValueError(f"{path} is not a trade tape")
+            (length,) = struct.unpack('<I', f.read(4))
+            self.meta = json.loads(f.read(length))
+            self._data_start = f.tell()
+        self.price_scale = 10 ** self.meta['price_decimals']
+        self.qty_scale = 10 ** self.meta['qty_decimals']
+
+    def first_ts(self):
+        """Timestamp of the first recorded trade (0 for an empty tape)"""
+        with open(self.path, 'rb') as f:
+            f.seek(self._data_start)
+            header = f.read(SEGMENT_HEADER.size)
+        return SEGMENT_HEADER.unpack(header)[2] if len(header) == SEGMENT_HEADER.size else 0
+
+    def segments(self, start_ms=None, end_ms=None):
+        """
+        Yield (ts, price, qty, side) arrays per segment overlapping [start_ms, end_ms)
+
+        Segments entirely outside the range are skipped without being read;
+        the first / last yielded segments are trimmed to the range.
+        """
+        with open(self.path, 'rb') as f:
+            f.seek(self._data_start)
+            while True:
+                header = f.read(SEGMENT_HEADER.size)
+                if len(header) < SEGMENT_HEADER.size:
+                    return
+                size, n, first_ts, last_ts = SEGMENT_HEADER.unpack(header)
+                if start_ms is not None and last_ts < start_ms:
+                    f.seek(size, os.SEEK_CUR)
+                    continue
+                if end_ms is not None and first_ts >= end_ms:
+                    return
+                payload = f.read(size)
+                if len(payload) < size:
+                    return      # torn write at the end of a tape being recorded
+                raw = zlib.decompress(payload)
+
+                ts = np.cumsum(np.frombuffer(raw, np.int64, n, 0)) + first_ts
+                price = np.cumsum(np.frombuffer(raw, np.int64, n, 8 * n)) / self.price_scale
+                qty = np.frombuffer(raw, np.int64, n, 16 * n) / self.qty_scale
+                side = np.frombuffer(raw, np.uint8, n, 24 * n)
+
+                lo = 0 if start_ms is None else int(np.searchsorted(ts, start_ms, side='left'))
+                hi = n if end_ms is None else int(np.searchsorted(ts, end_ms, side='left'))
+                if hi > lo:
+                    yield ts[lo:hi], price[lo:hi], qty[lo:hi], side[lo:hi]
+
+
+def iter_segments(paths, start_ms=None, end_ms=None):
+    """Segments of several tapes (e.g. one per day) in time order"""
+    readers = [TapeReader(p) for p in ([paths] if isinstance(paths, str) else paths)]
+    readers.sort(key=TapeReader.first_ts)
+    for reader in readers:
+        yield from reader.segments(start_ms, end_ms)
+
+
+# ==============================================================================
+# Candles / replay
+# ==============================================================================
+
+class CandleBuilder:
+    """Rebuilds OHLCV candles from tick batches; only closed candles are emitted"""
+
+    def __init__(self, interval_ms=60_000):
+        self.interval_ms = interval_ms
+        self.forming = None     # [bucket, open, high, low, close, volume]
+
+    def add(self, ts, price, qty):
+        """Feed oldest-first tick arrays; returns CandleColumns of candles closed by them"""
+        if len(ts) == 0:
+            return _candles([])
+        buckets = ts - ts % self.interval_ms
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        rows = np.column_stack((
+            buckets[starts],
+            price[starts],
+            np.maximum.reduceat(price, starts),
+            np.minimum.reduceat(price, starts),
+            price[np.concatenate((starts[1:], [len(ts)])) - 1],
+            np.add.reduceat(qty, starts),
+        )).tolist()
+
+        # Merge the first run into the candle still forming from the last batch
+        if self.forming is not None and rows[0][0] == self.forming[0]:
+            first = rows[0]
+            f = self.forming
+            rows[0] = [f[0], f[1], max(f[2], first[2]), min(f[3], first[3]), first[4], f[5] + first[5]]
+        elif self.forming is not None:
+            rows.insert(0, self.forming)
+        self.forming = rows.pop()
+        return _candles(rows)
+
+    def flush(self):
+        """Close the forming candle (end of tape)"""
+        rows = [self.forming] if self.forming is not None else []
+        self.forming = None
+        return _candles(rows)
+
+
+def _candles(rows):
+    values = np.array(rows, dtype=np.float64).reshape(-1, 6)
+    return CandleColumns(values[:, 0].astype(np.int64), values[:, 1], values[:, 2],
+                         values[:, 3], values[:, 4], values[:, 5])
+
+
+def replay(paths, interval='1m', speed=None, start_ms=None, end_ms=None, batch_ms=1000):
+    """
+    Stream a tape as (ticks, closed candles) batches
+
+    Args:
+        interval: Candle interval to rebuild ('1m', '5m', ... or ms)
+        speed: None = as fast as possible (one batch per segment),
+            1.0 = real time, N = N x real time (batches of `batch_ms` tape time)
+
+    Yields:
+        ((ts, price, qty) arrays, CandleColumns closed by those ticks); the
+        forming candle is flushed with an empty tick batch at the end.
+    """
+    interval_ms = INTERVAL_MS[interval] if isinstance(interval, str) else int(interval)
+    builder = CandleBuilder(interval_ms)
+    wall_start = tape_start = None
+
+    for ts, price, qty, _ in iter_segments(paths, start_ms, end_ms):
+        if speed is None:
+            batches = [(0, len(ts))]
+        else:
+            cuts = np.flatnonzero(np.diff(ts // batch_ms)) + 1
+            edges = np.concatenate(([0], cuts, [len(ts)])).tolist()
+            batches = list(zip(edges[:-1], edges[1:]))
+
+        for lo, hi in batches:
+            if speed is not None:
+                if wall_start is None:
+                    wall_start, tape_start = time.monotonic(), int(ts[lo])
+                delay = (int(ts[lo]) - tape_start) / 1000 / speed - (time.monotonic() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+            ticks = (ts[lo:hi], price[lo:hi], qty[lo:hi])
+            yield ticks, builder.add(*ticks)
+
+    empty = np.empty(0, dtype=np.int64)
+    yield (empty, np.empty(0), np.empty(0)), builder.flush()
+
+
+def first_hit(paths, entry_ms, take_profit, stop_loss, end_ms=None):
+    """
+    Which of take-profit (price >= take_profit) / stop-loss (price <= stop_loss)
+    traded first after entry_ms, from the tape
+
+    Returns:
+        ('TP' | 'SL' | None, timestamp ms or None)
+    """
+    for ts, price, _, _ in iter_segments(paths, entry_ms + 1, end_ms):
+        tp = np.flatnonzero(price >= take_profit)
+        sl = np.flatnonzero(price <= stop_loss)
+        if len(tp) or len(sl):
+            if len(sl) == 0 or (len(tp) and tp[0] < sl[0]):
+                return 'TP', int(ts[tp[0]])
+            return 'SL', int(ts[sl[0]])
+    return None, None
+
+
+# ==============================================================================
+# Recording
+# ==============================================================================
+
+def fetch_trades(exchange, symbol, limit=200):
+    """Recent public trades as [(id, timestamp ms, price, qty, side)], oldest first"""
+    import requests
+
+    if exchange == 'coinone':
+        url = f'https://api.coinone.co.kr/public/v2/trades/KRW/{symbol}'
+        data = requests.get(url, params={'size': limit}, timeout=10).json()
+        if data.get('result') != 'success':
+            raise ValueError(f"API Error: {data.get('error_message', 'Unknown error')}")
+        # Seller is maker -> the buyer took liquidity
+        aggressor = {True: BUY, False: SELL}
+        trades = [(t['id'], int(t['timestamp']), float(t['price']), float(t['qty']),
+                   aggressor.get(t.get('is_seller_maker'), UNKNOWN))
+                  for t in data.get('transactions', [])]
+    elif exchange == 'bybit':
+        url = 'https://api.bybit.com/v5/market/recent-trade'
+        data = requests.get(url, params={'category': 'spot', 'symbol': symbol, 'limit': min(limit, 60)},
+                            timeout=10).json()
+        if data.get('retCode') != 0:
+            raise ValueError(f"API Error: {data.get('retMsg', 'Unknown error')}")
+        trades = [(t['execId'], int(t['time']), float(t['price']), float(t['size']),
+                   BUY if t['side'] == 'Buy' else SELL)
+                  for t in data['result']['list']]
+    else:
+        raise ValueError(f"Unknown exchange: {exchange}")
+    return sorted(trades, key=lambda t: t[1])
+
+
+def record(exchange, symbol, directory='tapes', interval=1.0, duration=None):
+    """Poll recent trades into one tape per UTC day, skipping ones already written"""
+    seen = deque(maxlen=10_000)
+    seen_ids = set()
+    writer = None
+    day = None
+    count = 0
+    started = time.time()
+    try:
+        while duration is None or time.time() - started < duration:
+            tick = time.time()
+            try:
+                trades = fetch_trades(exchange, symbol)
+            except Exception as e:
+                print(f"✗ {e}")
+                time.sleep(interval)
+                continue
+
+            new = [t for t in trades if t[0] not in seen_ids]
+            for t in new:
+                if len(seen) == seen.maxlen:
+                    seen_ids.discard(seen[0])
+                seen.append(t[0])
+                seen_ids.add(t[0])
+            if writer is not None and writer.last_ts is not None:
+                new = [t for t in new if t[1] >= writer.last_ts]    # keep the tape ordered
+
+            for t in new:
+                today = datetime.utcfromtimestamp(t[1] / 1000).strftime('%Y%m%d')
+                if today != day:
+                    if writer is not None:
+                        writer.close()
+                    day = today
+                    path = os.path.join(directory, f'{exchange}_{symbol}_{day}.tape')
+                    writer = TapeWriter(path, symbol, exchange)
+                    print(f"✓ Recording {exchange} {symbol} trades -> {path}")
+                writer.write(t[1], t[2], t[3], t[4])
+            count += len(new)
+            time.sleep(max(0.0, interval - (time.time() - tick)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+# ==============================================================================
+# Main Execution
+# ==============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Public trade tape recorder / replay')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    rec = commands.add_parser('record', help='Record public trades')
+    rec.add_argument('--exchange', choices=('coinone', 'bybit'), default='coinone')
+    rec.add_argument('--symbol', default='XRP', help='XRP for Coinone, XRPUSDT for Bybit')
+    rec.add_argument('--dir', default='tapes')
+    rec.add_argument('--interval', type=float, default=1.0, help='Seconds between polls')
+    rec.add_argument('--duration', type=float, help='Stop after N seconds')
+
+    rep = commands.add_parser('replay', help='Rebuild candles and run the signal persistence simulator')
+    rep.add_argument('files', nargs='+')
+    rep.add_argument('--interval', default='5m', choices=sorted(INTERVAL_MS))
+    rep.add_argument('--speed', type=float, help='N x real time (default: as fast as possible)')
+    rep.add_argument('--poll', type=float, nargs='+', default=[1, 5, 10, 30, 60])
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        count = record(args.exchange, args.symbol, args.dir, args.interval, args.duration)
+        print(f"✓ Recorded {count} trades")
+        return
+
+    from signal_persistence import SignalPersistenceSimulator, print_report
+
+    simulator = SignalPersistenceSimulator(candle_ms=INTERVAL_MS[args.interval])
+    ticks_seen = candles_seen = 0
+    for (ts, price, qty), candles in replay(args.files, args.interval, args.speed):
+        if len(ts):
+            simulator.run(ts, price, qty, final=False)
+        ticks_seen += len(ts)
+        candles_seen += len(candles)
+    windows = simulator.finish()
+    print(f"✓ Replayed {ticks_seen} trades, {candles_seen} {args.interval} candles")
+    print_report(windows, args.poll)
+
+
+if __name__ == '__main__':
+    main()